@@ -0,0 +1,99 @@
+import datetime
+import random
+import sys
+from decimal import Decimal
+
+from django.db import connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Category
+from .models import Country
+from .models import Product
+from .models import Supplier
+from .models import Tag
+
+
+WORDS = (
+    'alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot', 'golf', 'hotel', 'india', 'juliet',
+    'kilo', 'lima', 'mike', 'november', 'oscar', 'papa', 'quebec', 'romeo', 'sierra', 'tango',
+    'uniform', 'victor', 'whiskey', 'xray', 'yankee', 'zulu',
+)
+
+NUM_COUNTRIES = 50
+NUM_SUPPLIERS = 500
+NUM_CATEGORIES = 40
+NUM_TAGS = 30
+BATCH_SIZE = 5000
+
+
+def words(rnd, count):
+    return ' '.join([rnd.choice(WORDS) for i in range(count)])
+
+
+def dataset_size():
+    return Product.objects.count()
+
+
+@transaction.atomic
+def generate_dataset(size, seed=0, verbose=True):
+    """
+    (Re)builds a deterministic dataset with "size" products
+    """
+    rnd = random.Random(seed)
+
+    for model in (Product.tags.through, Product, Supplier, Country, Category, Tag):
+        model.objects.all().delete()
+
+    Country.objects.bulk_create([Country(id=i + 1, name='Country %s' % words(rnd, 2)) for i in range(NUM_COUNTRIES)])
+    Supplier.objects.bulk_create([
+        Supplier(id=i + 1, name='Supplier %d' % (i + 1), country_id=rnd.randint(1, NUM_COUNTRIES))
+        for i in range(NUM_SUPPLIERS)
+    ])
+    Category.objects.bulk_create([Category(id=i + 1, name='Category %s' % words(rnd, 1)) for i in range(NUM_CATEGORIES)])
+    Tag.objects.bulk_create([Tag(id=i + 1, name='tag-%d' % (i + 1)) for i in range(NUM_TAGS)])
+
+    status_values = [choice[0] for choice in Product.STATUS_CHOICES]
+    t0 = timezone.make_aware(datetime.datetime(2015, 1, 1))
+    seconds = 5 * 365 * 24 * 3600
+    through = Product.tags.through
+
+    for start in range(0, size, BATCH_SIZE):
+        products = []
+        tags = []
+        for pk in range(start + 1, min(start + BATCH_SIZE, size) + 1):
+            products.append(Product(
+                id=pk,
+                code='P%08d' % pk,
+                name=words(rnd, 4).title(),
+                description=words(rnd, 12),
+                status=rnd.choice(status_values),
+                price=Decimal(rnd.randint(100, 100000)) / 100,
+                quantity=rnd.randint(0, 1000),
+                active=rnd.random() < 0.8,
+                created=t0 + datetime.timedelta(seconds=rnd.randint(0, seconds)),
+                category_id=rnd.randint(1, NUM_CATEGORIES),
+                supplier_id=rnd.randint(1, NUM_SUPPLIERS),
+            ))
+            for tag_id in rnd.sample(range(1, NUM_TAGS + 1), rnd.randint(0, 3)):
+                tags.append(through(product_id=pk, tag_id=tag_id))
+        Product.objects.bulk_create(products)
+        through.objects.bulk_create(tags)
+        if verbose and sys.stdout.isatty():
+            print('%d/%d products' % (min(start + BATCH_SIZE, size), size), end='\r')
+
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+
+def ensure_dataset(size, seed=0, verbose=True):
+    """
+    Generates the dataset, unless already available; returns True when generated
+    """
+    if dataset_size() != size:
+        if verbose:
+            print('Generating %d products ...' % size)
+        generate_dataset(size, seed, verbose)
+        return True
+    return False
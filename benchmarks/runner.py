@@ -0,0 +1,235 @@
+"""
+Benchmarks for DatatablesView, run against a synthetic dataset.
+
+Usage:
+
+    python runtests.py --benchmark [--size 10000] [--repeat 5] [--output results.json]
+
+Each benchmark is timed "repeat" times; median and min times (in [ms]) are reported,
+and compared with the thresholds listed in benchmarks/thresholds.json for the same size.
+The exit status is nonzero when any threshold is exceeded (unless --no-check is given).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import django
+from django.core.management import call_command
+from django.db import connection
+
+
+THRESHOLDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'thresholds.json')
+
+
+def timeit(func, repeat):
+    timings = []
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - t0) * 1000.0)
+    return {
+        'median_ms': round(statistics.median(timings), 3),
+        'min_ms': round(min(timings), 3),
+    }
+
+
+def build_view(view_class, request):
+    view = view_class()
+    view.request = request
+    view.initialize(request, collect_autofilter_choices=False)
+    return view
+
+
+def list_benchmarks(size):
+    """
+    Returns a list of (name, func) tuples
+    """
+    from datatables_view.pagination import KeysetPaginator
+    from datatables_view.testing import build_datatables_request
+    from .views import ConcurrentProductDatatablesView
+    from .views import FullTextProductDatatablesView
+    from .views import KeysetProductDatatablesView
+    from .views import ProductDatatablesView
+    from .views import TaggedProductDatatablesView
+
+    view_class = ProductDatatablesView
+    request = build_datatables_request(view_class, length=10, order=[[1, 'asc']])
+    view = build_view(view_class, request)
+    params = view.read_parameters(request.POST)
+    initial_qs = view.get_initial_queryset(request)
+    qs = view.prepare_queryset(params, view.optimize_queryset(initial_qs))
+
+    search_request = build_datatables_request(view_class, search_value='lima', order=[[1, 'asc']])
+    search_params = view.read_parameters(search_request.POST)
+
+    deep_start = max(size - 1000, 0)
+    deep_request = build_datatables_request(view_class, start=deep_start, length=10, order=[[1, 'asc']])
+    deep_params = view.read_parameters(deep_request.POST)
+
+    response_dict = view.get_response_dict(request, view.get_paginator(qs, params), 1, 0)
+
+    def initialize_cold():
+        view_class.__dict__.get('_table_schemas', {}).clear()
+        build_view(view_class, request).update_autofilter_choices(request)
+
+    def initialize_warm():
+        build_view(view_class, request).update_autofilter_choices(request)
+
+    def search():
+        view.prepare_queryset(search_params, initial_qs).count()
+
+    def first_page():
+        list(qs[:10])
+
+    def deep_offset_page():
+        list(qs[deep_start:deep_start + 10])
+
+    # Cursor pointing to the last row before the deep page
+    keyset_paginator = KeysetPaginator(qs, 10, deep_params['orders'])
+    deep_cursor = keyset_paginator.get_cursor(qs[deep_start - 1]) if deep_start else None
+
+    def deep_keyset_page():
+        paginator = KeysetPaginator(qs, 10, deep_params['orders'], cursor=deep_cursor)
+        paginator.count = size
+        paginator.page(deep_start // 10 + 1)
+
+    def render_instances():
+        view.use_values_list = False
+        try:
+            view.prepare_results(request, qs[:100])
+        finally:
+            view.use_values_list = True
+
+    def render_values_list():
+        view.prepare_results(request, qs[:100])
+
+    def end_to_end(view_class, request):
+        def func():
+            response = view_class.as_view()(request)
+            assert response.status_code == 200, response.status_code
+        return func
+
+    return [
+        ('initialize_cold', initialize_cold),
+        ('initialize_warm', initialize_warm),
+        ('read_parameters', lambda: view.read_parameters(request.POST)),
+        ('count_total', lambda: initial_qs.count()),
+        ('search_count', search),
+        ('first_page', first_page),
+        ('deep_offset_page', deep_offset_page),
+        ('deep_keyset_page', deep_keyset_page),
+        ('render_100_instances', render_instances),
+        ('render_100_values_list', render_values_list),
+        ('encode_response', lambda: view.encode_response_dict(response_dict)),
+        ('request', end_to_end(view_class, request)),
+        ('request_search', end_to_end(view_class, search_request)),
+        ('request_search_fts', end_to_end(
+            FullTextProductDatatablesView,
+            build_datatables_request(FullTextProductDatatablesView, search_value='lima', order=[[1, 'asc']])
+        )),
+        ('request_deep_page', end_to_end(view_class, deep_request)),
+        ('request_deep_keyset_page', end_to_end(
+            KeysetProductDatatablesView,
+            build_datatables_request(KeysetProductDatatablesView, start=deep_start, length=10, order=[[1, 'asc']],
+                                     cursor=deep_cursor or '', cursor_direction='next')
+        )),
+        ('request_search_concurrent', end_to_end(
+            ConcurrentProductDatatablesView,
+            build_datatables_request(ConcurrentProductDatatablesView, search_value='lima', order=[[1, 'asc']])
+        )),
+        # Ordering by an unindexed column: both the count and the page scan the table
+        ('request_search_by_name', end_to_end(
+            view_class,
+            build_datatables_request(view_class, search_value='lima', order=[[2, 'desc']])
+        )),
+        ('request_search_by_name_concurrent', end_to_end(
+            ConcurrentProductDatatablesView,
+            build_datatables_request(ConcurrentProductDatatablesView, search_value='lima', order=[[2, 'desc']])
+        )),
+        ('request_to_many', end_to_end(
+            TaggedProductDatatablesView,
+            build_datatables_request(TaggedProductDatatablesView, length=100, order=[[1, 'asc']])
+        )),
+    ]
+
+
+def load_thresholds(size):
+    try:
+        with open(THRESHOLDS_FILE) as f:
+            thresholds = json.load(f)
+    except (IOError, ValueError):
+        return {}
+    return thresholds.get(str(size), {})
+
+
+def run(size, repeat, seed=0, verbose=True):
+    from .data import ensure_dataset
+    from .views import FullTextProductDatatablesView
+
+    call_command('migrate', run_syncdb=True, verbosity=0)
+    generated = ensure_dataset(size, seed=seed, verbose=verbose)
+    # The dataset is written with bulk_create(), which doesn't keep the full-text index in sync
+    FullTextProductDatatablesView.search_backend.build_index(rebuild=generated)
+
+    results = {}
+    for name, func in list_benchmarks(size):
+        # Warm up
+        func()
+        results[name] = timeit(func, repeat)
+        if verbose:
+            print('%-24s median %10.3f [ms]   min %10.3f [ms]' % (
+                name, results[name]['median_ms'], results[name]['min_ms']))
+    return results
+
+
+def check_thresholds(results, thresholds):
+    """
+    Returns a list of (name, median_ms, max_ms) for results exceeding thresholds
+    """
+    regressions = []
+    for name, max_ms in sorted(thresholds.items()):
+        if name in results and results[name]['median_ms'] > max_ms:
+            regressions.append((name, results[name]['median_ms'], max_ms))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark DatatablesView against a synthetic dataset')
+    parser.add_argument('--size', type=int, default=10000, help='number of products (default: 10000)')
+    parser.add_argument('--repeat', type=int, default=5, help='timings per benchmark (default: 5)')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the dataset generator')
+    parser.add_argument('--output', help='save results to this JSON file')
+    parser.add_argument('--no-check', action='store_true', help='do not compare results with thresholds')
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    django.setup()
+
+    print('Benchmarking %d products (%s) ...' % (args.size, connection.settings_dict['NAME']))
+    results = run(args.size, args.repeat, args.seed)
+
+    regressions = [] if args.no_check else check_thresholds(results, load_thresholds(args.size))
+    for name, median_ms, max_ms in regressions:
+        print('REGRESSION: %s took %.3f [ms] (threshold: %.3f [ms])' % (name, median_ms, max_ms))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'size': args.size,
+                'repeat': args.repeat,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'results': results,
+                'regressions': [name for name, median_ms, max_ms in regressions],
+            }, f, indent=4, sort_keys=True)
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,22 @@
+# -*- coding: utf-8
+from __future__ import unicode_literals, absolute_import
+
+import os
+
+from tests.settings import *  # noqa
+
+
+# A file-backed database, so that large datasets are generated only once
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ.get(
+            'DATATABLES_VIEW_BENCHMARK_DB',
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark.sqlite3')
+        ),
+    }
+}
+
+INSTALLED_APPS = INSTALLED_APPS + [
+    "benchmarks",
+]
@@ -0,0 +1,68 @@
+from datatables_view.search import SqliteFTS5SearchBackend
+from datatables_view.views import DatatablesView
+
+from .models import Product
+
+
+class ProductDatatablesView(DatatablesView):
+
+    model = Product
+    title = 'Products'
+    length_menu = [[10, 100, 1000], [10, 100, 1000]]
+
+    column_defs = [
+        {
+            'name': 'id',
+            'visible': False,
+        }, {
+            'name': 'code',
+        }, {
+            'name': 'name',
+            'max_length': 40,
+        }, {
+            'name': 'status',
+            'choices': True,
+        }, {
+            'name': 'price',
+        }, {
+            'name': 'quantity',
+        }, {
+            'name': 'active',
+            'choices': True,
+        }, {
+            'name': 'created',
+        }, {
+            'name': 'category',
+            'foreign_field': 'category__name',
+            'choices': True,
+            'autofilter': True,
+        }, {
+            'name': 'country',
+            'foreign_field': 'supplier__country__name',
+        },
+    ]
+
+
+class TaggedProductDatatablesView(ProductDatatablesView):
+
+    column_defs = ProductDatatablesView.column_defs + [
+        {
+            'name': 'tags',
+            'foreign_field': 'tags__name',
+        },
+    ]
+
+
+class FullTextProductDatatablesView(ProductDatatablesView):
+
+    search_backend = SqliteFTS5SearchBackend()
+
+
+class ConcurrentProductDatatablesView(ProductDatatablesView):
+
+    concurrent_queries = True
+
+
+class KeysetProductDatatablesView(ProductDatatablesView):
+
+    keyset_pagination = True
@@ -1,6 +1,10 @@
 from __future__ import unicode_literals
 __version__ = '3.2.3'
 
+import django
+if django.VERSION < (3, 2):
+    default_app_config = 'datatables_view.apps.DatatablesViewConfig'
+
 from .columns import (
     Column,
     ForeignColumn,
@@ -9,8 +13,13 @@ from .columns import (
     Order,
 )
 
+from .schema import (
+    TableSchema,
+)
+
 from .exceptions import (
     ColumnOrderError,
+    QueryBudgetExceeded,
 )
 
 from .views import (
@@ -5,3 +5,19 @@ ENABLE_QUERYDICT_TRACING = getattr(settings, 'DATATABLES_VIEW_ENABLE_QUERYDICT_T
 ENABLE_QUERYSET_TRACING = getattr(settings, 'DATATABLES_VIEW_ENABLE_QUERYSET_TRACING', False)
 TEST_FILTERS = getattr(settings, 'DATATABLES_VIEW_TEST_FILTERS', False)
 DISABLE_QUERYSET_OPTIMIZATION = getattr(settings, 'DATATABLES_VIEW_DISABLE_QUERYSET_OPTIMIZATION', False)
+CACHE_ALIAS = getattr(settings, 'DATATABLES_VIEW_CACHE', 'default')
+AUTOFILTER_CACHE_TIMEOUT = getattr(settings, 'DATATABLES_VIEW_AUTOFILTER_CACHE_TIMEOUT', 0)
+AUTOFILTER_MAX_CHOICES = getattr(settings, 'DATATABLES_VIEW_AUTOFILTER_MAX_CHOICES', 0)
+AUTOFILTER_PAGE_SIZE = getattr(settings, 'DATATABLES_VIEW_AUTOFILTER_PAGE_SIZE', 50)
+COUNT_CACHE_TIMEOUT = getattr(settings, 'DATATABLES_VIEW_COUNT_CACHE_TIMEOUT', 0)
+ESTIMATE_COUNT_THRESHOLD = getattr(settings, 'DATATABLES_VIEW_ESTIMATE_COUNT_THRESHOLD', 100000)
+STREAMING_THRESHOLD = getattr(settings, 'DATATABLES_VIEW_STREAMING_THRESHOLD', 0)
+STREAMING_CHUNK_SIZE = getattr(settings, 'DATATABLES_VIEW_STREAMING_CHUNK_SIZE', 2000)
+MAX_QUERIES = getattr(settings, 'DATATABLES_VIEW_MAX_QUERIES', None)
+N_PLUS_ONE_THRESHOLD = getattr(settings, 'DATATABLES_VIEW_N_PLUS_ONE_THRESHOLD', 0)
+RAISE_QUERY_BUDGET_EXCEEDED = getattr(settings, 'DATATABLES_VIEW_RAISE_QUERY_BUDGET_EXCEEDED', False)
+ENABLE_TIMING = getattr(settings, 'DATATABLES_VIEW_ENABLE_TIMING', False)
+SEARCH_DELAY = getattr(settings, 'DATATABLES_VIEW_SEARCH_DELAY', 300)
+DROP_STALE_DRAWS = getattr(settings, 'DATATABLES_VIEW_DROP_STALE_DRAWS', False)
+CONCURRENT_QUERIES = getattr(settings, 'DATATABLES_VIEW_CONCURRENT_QUERIES', False)
+CONCURRENT_WORKERS = getattr(settings, 'DATATABLES_VIEW_CONCURRENT_WORKERS', 4)
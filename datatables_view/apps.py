@@ -1,5 +1,10 @@
 from django.apps import AppConfig
 
 
-class DatatablesQuerysetConfig(AppConfig):
-    name = 'datatables_queryset'
+class DatatablesViewConfig(AppConfig):
+    name = 'datatables_view'
+
+    def ready(self):
+        # Expire cached data whenever any model is changed (see "Response caching")
+        from .cache import connect_signals
+        connect_signals()
@@ -0,0 +1,280 @@
+import asyncio
+import itertools
+import sys
+import django
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ImproperlyConfigured
+from django.http import JsonResponse
+from django.http.response import HttpResponseBadRequest
+from django.http.response import StreamingHttpResponse
+from django.views.generic import View
+
+from .views import DatatablesView
+from .views import is_overridden
+from .app_settings import COUNT_CACHE_TIMEOUT
+from .concurrency import on_own_connection
+from .counting import RecordsCount
+from .counting import count_fingerprint
+from .pagination import page_bounds
+from .utils import is_ajax
+
+
+async def aiter_streaming_content(chunks, batch_size=100):
+    """
+    Iterates over chunks (a synchronous iterator, possibly reading from the database)
+    in the thread which runs synchronous code, a batch at a time
+    """
+    chunks = iter(chunks)
+    next_batch = sync_to_async(lambda: list(itertools.islice(chunks, batch_size)))
+    while True:
+        batch = await next_batch()
+        if not batch:
+            break
+        for chunk in batch:
+            yield chunk
+
+
+class AsyncDatatablesView(DatatablesView):
+    """
+    Same as DatatablesView, for ASGI deployments (Django >= 4.1): data requests
+    are served with the async ORM (acount(), async iteration and aget()),
+    so that no thread is held while waiting for the database.
+
+    Code which can't run in the event loop (custom hooks, template rendering, cache access)
+    is run with sync_to_async(); the "initialize", "choices" and "export" actions
+    are served by the synchronous implementation altogether.
+
+    The queryset returned by aget_initial_queryset(request) is awaited once per request,
+    then used by all code paths (data, export, autofilter choices, cache and ETag keys),
+    including the synchronous ones calling get_initial_queryset(request).
+
+    Large pages are streamed from an async iterator (Django >= 4.2),
+    and not at all with Django 4.1.
+
+    Async-aware hooks default to their synchronous counterpart:
+
+    - aget_initial_queryset(request)
+    - acustomize_row(row, obj)
+    - afooter_message(qs, params)
+    - arender_row_details(id, request)
+    """
+
+    # Count records and retrieve the page at the same time (see "Concurrent queries")
+    concurrent_queries = True
+
+    # Resolved by dispatch() with aget_initial_queryset()
+    _initial_queryset = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        if django.VERSION < (4, 1):
+            raise ImproperlyConfigured('AsyncDatatablesView requires Django 4.1 or later')
+        return super(AsyncDatatablesView, cls).as_view(**initkwargs)
+
+    async def dispatch(self, request, *args, **kwargs):
+
+        if not getattr(request, 'REQUEST', None):
+            request.REQUEST = request.GET if request.method=='GET' else request.POST
+
+        # Queries are executed by the thread which runs synchronous code,
+        # whose connection is watched by the profile
+        self.profile = self.get_profile(request)
+        await sync_to_async(self.profile.__enter__)()
+        try:
+            # Rows are scoped once, for every action (see get_initial_queryset())
+            with self.profile.phase('initialize'):
+                self._initial_queryset = await self.aget_initial_queryset(request)
+            response = await self.adispatch_action(request, request.REQUEST.get('action', ''), *args, **kwargs)
+            if response.streaming:
+                response.streaming_content = self.profile.stream(response.streaming_content)
+                if django.VERSION >= (4, 2):
+                    # The ASGI handler would consume a synchronous iterator all at once
+                    response.streaming_content = aiter_streaming_content(response.streaming_content)
+        except BaseException:
+            await sync_to_async(self.profile.__exit__)(*sys.exc_info())
+            raise
+        await sync_to_async(self.profile.__exit__)(None, None, None)
+        self.profile.report(self, request, response)
+        return response
+
+    async def adispatch_action(self, request, action, *args, **kwargs):
+
+        if action in ('initialize', 'choices', 'export') or not is_ajax(request):
+            return await sync_to_async(self.dispatch_action)(request, action, *args, **kwargs)
+
+        with self.profile.phase('initialize'):
+            await sync_to_async(self.initialize)(request, collect_autofilter_choices=False)
+        if action == 'details':
+            row_id = request.REQUEST.get(self.table_row_id_fieldname)
+            return JsonResponse({
+                'html': await self.arender_row_details(row_id, request),
+                'parent-row-id': row_id,
+            })
+        return await View.dispatch(self, request, *args, **kwargs)
+
+    async def post(self, request, *args, **kwargs):
+        """
+        Treat POST and GET the like
+        """
+        return await self.get(request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+
+        if not is_ajax(request):
+            return HttpResponseBadRequest()
+
+        profile = self.profile
+        try:
+            with profile.phase('parse'):
+                params = self.read_parameters(request.REQUEST)
+        except ValueError:
+            return HttpResponseBadRequest()
+
+        # Remember the latest draw of the table, and give up on older ones
+        drop_stale_draws = self.get_drop_stale_draws()
+        if drop_stale_draws and await sync_to_async(self.is_stale_draw)(request, params['draw'], register=True):
+            return self.stale_draw_response(params['draw'])
+
+        with profile.phase('cache'):
+            response, etag, cache_key = await sync_to_async(self.get_cached_response)(request, params)
+        if response is not None:
+            return response
+
+        with profile.phase('filter'):
+            initial_qs = self.get_initial_queryset(request)
+            qs = await sync_to_async(self.get_filtered_queryset)(params, initial_qs)
+
+        if drop_stale_draws and await sync_to_async(self.is_stale_draw)(request, params['draw']):
+            return self.stale_draw_response(params['draw'])
+
+        if self.use_concurrent_queries(qs, params):
+            with profile.phase('fetch'):
+                response_dict = await self.aget_concurrent_response_dict(request, initial_qs, qs, params)
+        else:
+            with profile.phase('count'):
+                records_count = await self.acount_records(request, initial_qs, qs) if self.exact_count else None
+
+            # Render and send large pages incrementally
+            if self.use_streaming(params):
+                response = StreamingHttpResponse(
+                    self.stream_response_content(request, qs, params, records_count),
+                    content_type="application/json")
+                if etag is not None:
+                    self.set_etag(response, etag)
+                return response
+
+            if records_count is not None and not (self.keyset_pagination and params['length'] != -1):
+                response_dict = await self.aget_page_response_dict(request, qs, params, records_count)
+            else:
+                # Keyset pagination, capped and unknown counts
+                response_dict = await sync_to_async(self.get_paginated_response_dict)(request, qs, params, records_count)
+
+        with profile.phase('footer'):
+            response_dict['footer_message'] = await self.afooter_message(qs, params)
+
+        return await sync_to_async(self.build_response)(params, response_dict, etag, cache_key)
+
+    async def aget_concurrent_response_dict(self, request, initial_qs, qs, params):
+        """
+        Counts the records in another thread (on its own connection) while retrieving
+        the page requested by the client; when "start" turns out to be out of range,
+        the last page is retrieved once the count is known
+        """
+        per_page = params['length']
+        bottom, top = page_bounds(params['start'], per_page, sys.maxsize)
+        count_records = sync_to_async(
+            on_own_connection(self.count_records, qs.db, self.profile, 'count'),
+            thread_sensitive=False)
+        records_count, data = await asyncio.gather(
+            count_records(request, initial_qs, qs),
+            self.aprepare_results(request, qs[bottom:top]),
+        )
+        if page_bounds(params['start'], per_page, records_count.filtered)[0] != bottom:
+            bottom, top = page_bounds(params['start'], per_page, records_count.filtered)
+            data = await self.aprepare_results(request, qs[bottom:top])
+        return self.build_page_response_dict(params, records_count, data)
+
+    async def aget_page_response_dict(self, request, qs, params, records_count):
+        per_page = params['length'] if params['length'] != -1 else max(records_count.filtered, 1)
+        bottom, top = page_bounds(params['start'], per_page, records_count.filtered)
+        with self.profile.phase('fetch'):
+            data = await self.aprepare_results(request, qs[bottom:top])
+        return self.build_page_response_dict(params, records_count, data)
+
+    async def acount_records(self, request, initial_qs, qs):
+        """
+        Same as count_records(), with acount(); cached and estimated counts
+        are left to count_records()
+        """
+        timeout = self.count_cache_timeout
+        if timeout is None:
+            timeout = COUNT_CACHE_TIMEOUT
+        if timeout or self.count_estimator is not None:
+            return await sync_to_async(self.count_records)(request, initial_qs, qs)
+
+        records_total = await initial_qs.acount()
+        if count_fingerprint(initial_qs) == count_fingerprint(qs):
+            # No filters have been applied
+            return RecordsCount(records_total, records_total, False)
+        return RecordsCount(records_total, await qs.acount(), False)
+
+    async def aprepare_results(self, request, qs):
+        """
+        Same as prepare_results(), retrieving qs with async iteration;
+        model instances are rendered by prepare_results() with sync_to_async(),
+        then passed to acustomize_row()
+        """
+        paths = self.get_values_list_paths(request)
+        if paths is not None:
+            rows = [row async for row in qs.values_list(*paths)]
+            return list(self.iter_values_list_results(request, rows, paths))
+
+        if qs._prefetch_related_lookups and django.VERSION < (5, 0):
+            # prefetch_related() is not supported with async iteration before Django 5.0
+            objects = await sync_to_async(list)(qs)
+        else:
+            objects = [obj async for obj in qs]
+        data = await sync_to_async(self.prepare_results)(request, objects)
+        if type(self).acustomize_row is not AsyncDatatablesView.acustomize_row:
+            for row, obj in zip(data, objects):
+                await self.acustomize_row(row, obj)
+        return data
+
+    def use_streaming(self, params):
+        # Async iterators are accepted by StreamingHttpResponse since Django 4.2
+        if django.VERSION < (4, 2):
+            return False
+        return super(AsyncDatatablesView, self).use_streaming(params)
+
+    def get_initial_queryset(self, request=None):
+        """
+        Returns the queryset resolved by aget_initial_queryset(request) for the current request,
+        so that the synchronous code paths (export, autofilter choices, get_cache_scope())
+        are scoped the same way as data requests
+        """
+        if request is not None and self._initial_queryset is not None:
+            return self._initial_queryset.all()
+        return super(AsyncDatatablesView, self).get_initial_queryset(request)
+
+    def get_values_list_paths(self, request):
+        if type(self).acustomize_row is not AsyncDatatablesView.acustomize_row:
+            return None
+        return super(AsyncDatatablesView, self).get_values_list_paths(request)
+
+    async def aget_initial_queryset(self, request=None):
+        return await sync_to_async(self.get_initial_queryset)(request)
+
+    async def acustomize_row(self, row, obj):
+        # Called after customize_row(), for model instances only
+        pass
+
+    async def afooter_message(self, qs, params):
+        if not is_overridden(self, 'footer_message'):
+            return None
+        return await sync_to_async(self.footer_message)(qs, params)
+
+    async def arender_row_details(self, id, request=None):
+        if is_overridden(self, 'render_row_details'):
+            return await sync_to_async(self.render_row_details)(id, request)
+        obj = await self.model.objects.aget(id=id)
+        return await sync_to_async(self.render_object_details)(obj, request)
@@ -0,0 +1,158 @@
+import hashlib
+import time
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+from django.db.models.signals import post_save, post_delete, m2m_changed
+
+from .app_settings import CACHE_ALIAS
+from .columns import model_fields_lut
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def build_cache_key(prefix, *parts):
+    """
+    Hash arbitrary (printable) parts into a key suitable for any cache backend
+    """
+    digest = hashlib.md5('|'.join([str(part) for part in parts]).encode('utf-8')).hexdigest()
+    return 'datatables_view:%s:%s' % (prefix, digest)
+
+
+def queryset_fingerprint(qs):
+    """
+    Identifies the SQL statement (and parameters) of a queryset;
+    used to keep cached data apart for differently scoped querysets
+    """
+    try:
+        sql, params = qs.query.sql_with_params()
+    except EmptyResultSet:
+        return 'EMPTY'
+    return '%s|%r' % (sql, params)
+
+
+################################################################################
+# Model generations
+
+def list_related_models(model, column_defs):
+    """
+    Lists the model, followed by any model traversed by "foreign_field" paths
+    """
+    models = [model, ]
+    for column_def in column_defs:
+        foreign_field = column_def.get('foreign_field', None)
+        if not foreign_field:
+            continue
+        current_model = model
+        for path_item in foreign_field.split('__')[:-1]:
+            try:
+                current_model = model_fields_lut(current_model)[path_item].related_model
+            except (KeyError, AttributeError):
+                break
+            if current_model is None:
+                break
+            models.append(current_model)
+    return models
+
+
+def _generation_key(model):
+    return 'datatables_view:generation:%s' % model._meta.concrete_model._meta.label_lower
+
+
+# Labels of the models whose generation is used, hence must be bumped on changes;
+# None until the URLconf has been scanned (see get_tracked_models())
+_tracked_models = None
+
+
+def get_tracked_models():
+    """
+    Lists the models cached by the views found in the URLconf (see DatatablesView.get_cached_models()),
+    plus those whose generation has been read by this process; the URLconf is scanned once,
+    on first use, so that processes which never serve a view (i.e. task workers) bump the same models
+    """
+    global _tracked_models
+    if _tracked_models is None:
+        from .indexes import iter_view_classes
+        labels = set()
+        for url, view_class in iter_view_classes():
+            labels.update([model._meta.concrete_model._meta.label_lower for model in view_class.get_cached_models()])
+        _tracked_models = labels
+    return _tracked_models
+
+
+def _new_generation():
+    # Never reuse an old value, even when the cache has been flushed
+    return int(time.time() * 1000000)
+
+
+def get_model_generation(model):
+    """
+    Returns a value which changes whenever an instance of model
+    is saved or deleted, or its many-to-many relations are changed
+    """
+    get_tracked_models().add(model._meta.concrete_model._meta.label_lower)
+    cache = get_cache()
+    key = _generation_key(model)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, _new_generation(), None)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_model_generation(model):
+    if model._meta.concrete_model._meta.label_lower not in get_tracked_models():
+        # Nothing is cached for this model: spare a cache round-trip
+        return
+    cache = get_cache()
+    key = _generation_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Never read yet (or evicted): nothing can have been cached with it,
+        # and get_model_generation() will start with a brand new value
+        pass
+
+
+def _on_model_changed(sender, **kwargs):
+    bump_model_generation(sender)
+
+
+def _on_m2m_changed(sender, instance, action, model, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        for changed_model in (type(instance), model):
+            bump_model_generation(changed_model)
+
+
+def connect_signals():
+    """
+    Called by DatatablesViewConfig.ready(), so that model changes are noticed
+    by every process (including management commands and task workers),
+    whether or not a view has been imported; only the models listed by
+    get_tracked_models() cost a cache access
+    """
+    post_save.connect(_on_model_changed, dispatch_uid='datatables_view_post_save')
+    post_delete.connect(_on_model_changed, dispatch_uid='datatables_view_post_delete')
+    m2m_changed.connect(_on_m2m_changed, dispatch_uid='datatables_view_m2m_changed')
+
+
+################################################################################
+# Cached querysets
+
+def cached_queryset_values(qs, models, timeout, prefix='values'):
+    """
+    Evaluates qs as a list, caching the result for "timeout" seconds;
+    cached data expires as soon as any of "models" is changed
+    """
+    key = build_cache_key(
+        prefix,
+        queryset_fingerprint(qs),
+        *[get_model_generation(model) for model in models]
+    )
+    cache = get_cache()
+    values = cache.get(key)
+    if values is None:
+        values = list(qs)
+        cache.set(key, values, timeout)
+    return values
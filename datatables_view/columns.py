@@ -1,7 +1,51 @@
 import datetime
-from django.utils.translation import ugettext_lazy as _
+from decimal import Decimal
+from functools import lru_cache
+from django.db import models
+from django.db.models.manager import BaseManager
+from django.utils import translation
+from django.utils.translation import gettext_lazy as _
 from .exceptions import ColumnOrderError
 from .utils import format_datetime
+from .utils import compile_format_datetime
+
+
+# Values rendered as they are by render_column_value()
+PLAIN_VALUE_TYPES = (str, int, float, Decimal, type(None))
+
+
+@lru_cache(maxsize=None)
+def model_fields_lut(model):
+    """
+    Returns a {field name: field} dictionary for the given model;
+    built once per model, since column_factory() and ForeignColumn
+    need it for every column and every path item.
+    """
+    return {f.name: f for f in model._meta.get_fields()}
+
+
+def resolve_field_path(model, path):
+    """
+    Resolves a "foreign_field" path (i.e. "customer__orders__code") into a list
+    of (field, attribute name, to_many) tuples, one for each path item;
+    raises KeyError for unknown fields.
+
+    The attribute name differs from the field name for reverse relations
+    without a "related_name" (i.e. "order" -> "order_set").
+    """
+    hops = []
+    current_model = model
+    for path_item in path.split('__'):
+        if current_model is None:
+            raise KeyError(path_item)
+        field = model_fields_lut(current_model)[path_item]
+        attname = path_item
+        if field.is_relation and field.auto_created and not field.concrete:
+            attname = field.get_accessor_name()
+        to_many = bool(field.is_relation and (field.many_to_many or field.one_to_many))
+        hops.append((field, attname, to_many))
+        current_model = field.related_model if field.is_relation else None
+    return hops
 
 
 class Column(object):
@@ -53,7 +97,7 @@ class Column(object):
         """
         Build either a Column or a ForeignColumn as required
         """
-        fields = {f.name: f for f in model._meta.get_fields()}
+        fields = model_fields_lut(model)
         col_name = column_spec['name']
         foreign_field = column_spec.get('foreign_field', None)
 
@@ -98,6 +142,65 @@ class Column(object):
             value = _('Yes') if value else _('No')
         return value
 
+    def compile_formatter(self):
+        """
+        Returns a function equivalent to render_column_value(obj, value),
+        specialized on the type of the model field; the active language,
+        timezone and date format are resolved once, so call this once per request
+        """
+        if self._allow_choices_lookup:
+            choices_lookup = self._choices_lookup
+            return lambda value: choices_lookup.get(value, '')
+
+        render_column_value = self.render_column_value
+
+        def format_value(value):
+            if type(value) in PLAIN_VALUE_TYPES:
+                return value
+            return render_column_value(None, value)
+
+        field = self.model_field
+        if isinstance(field, models.DateTimeField):
+            format_datetime_value = compile_format_datetime(True)
+            return lambda value: format_datetime_value(value) if isinstance(value, datetime.datetime) else format_value(value)
+        if isinstance(field, models.DateField):
+            format_date_value = compile_format_datetime(False)
+            return lambda value: format_date_value(value) if type(value) is datetime.date else format_value(value)
+        if isinstance(field, models.BooleanField):
+            yes, no = str(_('Yes')), str(_('No'))
+            return lambda value: (yes if value else no) if isinstance(value, bool) else value
+        return format_value
+
+    def compile_renderer(self):
+        """
+        Returns a function equivalent to render_column(obj)
+        """
+        name = self.name
+        format_value = self.compile_formatter()
+
+        def render(obj):
+            try:
+                value = getattr(obj, name)
+            except:
+                value = '???'
+            return format_value(value)
+
+        return render
+
+    def get_raw_value(self, obj):
+        return getattr(obj, self.name)
+
+    def get_values_path(self, model):
+        """
+        The path to be used with values_list() to retrieve the same raw value,
+        or None when the value can only be obtained from a model instance
+        (i.e. properties, relations)
+        """
+        field = self.model_field
+        if field is None or not field.concrete or field.is_relation:
+            return None
+        return self.name
+
     def render_column(self, obj):
         try:
             value = getattr(obj, self.name)
@@ -111,9 +214,22 @@ class Column(object):
         #return [matching_value for key, matching_value in six.iteritems(self._search_choices_lookup) if key.startswith(value)]
         pattern = pattern.lower()
         #values = [key for (key, text) in self._choices_lookup.items() if pattern in text.lower()]
-        values = [key for (key, text) in self._choices_lookup.items() if text.lower().startswith(pattern)]
+        values = [key for (text, key) in self.get_search_choices() if text.startswith(pattern)]
         return values
 
+    def get_search_choices(self):
+        """
+        The list of (lowercase text, key) choices for the active language,
+        computed once for each language
+        """
+        language = translation.get_language()
+        cache = self.__dict__.setdefault('_search_choices', {})
+        search_choices = cache.get(language)
+        if search_choices is None:
+            search_choices = [(str(text).lower(), key) for (key, text) in self._choices_lookup.items()]
+            cache[language] = search_choices
+        return search_choices
+
 
 class ForeignColumn(Column):
     def __init__(self, name, model, path_to_column, allow_choices_lookup=True):
@@ -121,6 +237,10 @@ class ForeignColumn(Column):
         self._field_search_path = path_to_column
         self._field_path = path_to_column.split('__')
         foreign_field = self.get_foreign_field(model)
+        try:
+            self._attribute_path = [attname for field, attname, to_many in resolve_field_path(model, path_to_column)]
+        except KeyError:
+            self._attribute_path = self._field_path
         super(ForeignColumn, self).__init__(foreign_field, allow_choices_lookup)
 
     def get_field_search_path(self):
@@ -132,7 +252,7 @@ class ForeignColumn(Column):
         current_model = model
 
         for idx, cur_field_name in enumerate(path_items):
-            fields = {f.name: f for f in current_model._meta.get_fields()}
+            fields = model_fields_lut(current_model)
 
             if idx < path_item_count-1:
                 try:
@@ -171,28 +291,61 @@ class ForeignColumn(Column):
         return foreign_field
 
     def get_foreign_value(self, obj):
+        """
+        Follows the path from obj; to-many relations produce a list of values.
+
+        Related managers are read with all(), which uses the prefetch cache
+        when the queryset has been optimized (see DatatablesView.optimize_queryset())
+        """
         current_value = obj
 
-        for current_path_item in self._field_path:
+        for current_path_item in self._attribute_path:
             try:
-                current_value = getattr(current_value, current_path_item)
+                if isinstance(current_value, BaseManager):
+                    current_value = list(current_value.all())
+                if isinstance(current_value, list):
+                    values = []
+                    for item in current_value:
+                        value = getattr(item, current_path_item)
+                        if isinstance(value, BaseManager):
+                            values.extend(value.all())
+                        elif value is not None:
+                            values.append(value)
+                    current_value = values
+                else:
+                    current_value = getattr(current_value, current_path_item)
             except:
-                try:
-                    current_value = [
-                        getattr(current_value, current_path_item)
-                        for current_value in current_value.get_queryset()
-                    ]
-                except:
-                    try:
-                        current_value = [getattr(f, current_path_item) for f in current_value]
-                    except:
-                        current_value = None
+                current_value = None
 
             if current_value is None:
                 return None
 
+        if isinstance(current_value, BaseManager):
+            current_value = list(current_value.all())
         return current_value
 
+    def get_raw_value(self, obj):
+        return self.get_foreign_value(obj)
+
+    def compile_renderer(self):
+        get_foreign_value = self.get_foreign_value
+        format_value = self.compile_formatter()
+        return lambda obj: format_value(get_foreign_value(obj))
+
+    def get_values_path(self, model):
+        # Only forward many-to-one and one-to-one hops are supported,
+        # since to-many relations would multiply the rows
+        current_model = model
+        for path_item in self._field_path[:-1]:
+            field = model_fields_lut(current_model).get(path_item)
+            if field is None or not field.concrete or not (field.many_to_one or field.one_to_one):
+                return None
+            current_model = field.related_model
+        field = model_fields_lut(current_model).get(self._field_path[-1])
+        if field is None or not field.concrete or field.is_relation:
+            return None
+        return self._field_search_path
+
     def render_column(self, obj):
         value = self.get_foreign_value(obj)
         return self.render_column_value(obj, value)
@@ -216,6 +369,9 @@ class ColumnLink(object):
     def get_field_search_path(self):
         return self._model_column.get_field_search_path()
 
+    def get_model_column(self):
+        return self._model_column
+
     def get_value(self, object_instance):
         return self._model_column.render_column(object_instance)
 
@@ -0,0 +1,53 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.db import connections
+
+from .app_settings import CONCURRENT_WORKERS
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    The (lazily created) thread pool used to run queries concurrently
+    with the request thread; see DATATABLES_VIEW_CONCURRENT_WORKERS
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=CONCURRENT_WORKERS, thread_name_prefix='datatables_view')
+    return _executor
+
+
+def supports_concurrent_queries(using):
+    """
+    Tells whether queries for database "using" can run on separate connections;
+    this is not the case for in-memory sqlite databases (each connection would get
+    a different, empty database), nor within a transaction (other connections
+    wouldn't see uncommitted changes)
+    """
+    connection = connections[using]
+    if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+        return False
+    return not connection.in_atomic_block
+
+
+def on_own_connection(func, using, profile=None, phase=None):
+    """
+    Wraps func to be run by another thread, which opens its own connection to
+    database "using"; the connection is closed as soon as func returns, and the queries
+    executed are reported to profile (if any), in the given phase
+    """
+    def wrapper(*args, **kwargs):
+        connection = connections[using]
+        try:
+            if profile is None:
+                return func(*args, **kwargs)
+            with profile.watch(connection, phase):
+                return func(*args, **kwargs)
+        finally:
+            connection.close()
+    return wrapper
@@ -0,0 +1,93 @@
+import json
+from collections import namedtuple
+from django.db import connections
+from django.db import DatabaseError
+
+from .cache import build_cache_key
+from .cache import get_cache
+from .cache import get_model_generation
+from .cache import queryset_fingerprint
+
+
+RecordsCount = namedtuple('RecordsCount', ['total', 'filtered', 'estimated'])
+
+
+def count_fingerprint(qs):
+    """
+    Identifies the set of rows selected by qs, regardless of
+    ordering, selected columns and select_related()
+    """
+    return queryset_fingerprint(qs.order_by().values('pk'))
+
+
+def cached_count(qs, timeout):
+    """
+    Counts the records in qs, caching the result for "timeout" seconds;
+    the cached value expires as soon as the model is changed
+    """
+    key = build_cache_key(
+        'count',
+        count_fingerprint(qs),
+        get_model_generation(qs.model),
+    )
+    cache = get_cache()
+    count = cache.get(key)
+    if count is None:
+        count = qs.count()
+        cache.set(key, count, timeout)
+    return count
+
+
+class CountEstimator(object):
+    """
+    Base class for count estimators;
+    estimate() returns either the estimated number of records in qs,
+    or None when no estimate is available (an exact count will be used instead)
+    """
+
+    def estimate(self, qs):
+        return None
+
+
+class PostgresPlannerEstimator(CountEstimator):
+    """
+    Uses the row estimate of PostgreSQL's planner;
+    requires up-to-date statistics (see ANALYZE)
+    """
+
+    def estimate(self, qs):
+        connection = connections[qs.db]
+        if connection.vendor != 'postgresql':
+            return None
+        sql, params = qs.order_by().values('pk').query.sql_with_params()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+                plan = cursor.fetchone()[0]
+        except DatabaseError:
+            return None
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+class SqliteStatEstimator(CountEstimator):
+    """
+    Uses the table size recorded by SQLite in "sqlite_stat1" (see ANALYZE);
+    only unfiltered querysets can be estimated this way
+    """
+
+    def estimate(self, qs):
+        connection = connections[qs.db]
+        if connection.vendor != 'sqlite' or qs.query.where:
+            return None
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s', [qs.model._meta.db_table])
+                rows = cursor.fetchall()
+        except DatabaseError:
+            return None
+        if not rows:
+            return None
+        # The first integer in "stat" is the (approximate) number of rows
+        return max([int(row[0].split()[0]) for row in rows])
@@ -1,3 +1,7 @@
 
 class ColumnOrderError(Exception):
     pass
+
+
+class QueryBudgetExceeded(Exception):
+    pass
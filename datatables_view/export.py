@@ -0,0 +1,91 @@
+import csv
+import json
+import re
+import zlib
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+# format: (content type, file extension)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'tsv': ('text/tab-separated-values', 'tsv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+
+# Leading characters which make spreadsheet applications evaluate a cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+# Rendered negative numbers (i.e. "-1", "-1,234.50") are safe to leave as they are
+NEGATIVE_NUMBER_RE = re.compile(r'^-\d+(?:[.,]\d+)*(?:[eE][+-]?\d+)?\Z')
+
+
+class Echo(object):
+    """
+    A file-like object which returns what's written, instead of buffering it;
+    see: https://docs.djangoproject.com/en/dev/howto/outputting-csv/#streaming-large-csv-files
+    """
+
+    def write(self, value):
+        return value
+
+
+def escape_formula(value):
+    """
+    Prevents "CSV injection": text starting with a formula prefix is quoted with a leading "'",
+    see: https://owasp.org/www-community/attacks/CSV_Injection
+    """
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        if value.startswith(FORMULA_PREFIXES) and not NEGATIVE_NUMBER_RE.match(value):
+            return "'" + value
+        return value
+    # Numbers (i.e. negative ones) are not text
+    return str(value)
+
+
+def iter_delimited(titles, names, rows, delimiter=','):
+    writer = csv.writer(Echo(), delimiter=delimiter)
+    yield writer.writerow([escape_formula(str(title)) for title in titles])
+    for row in rows:
+        yield writer.writerow([
+            escape_formula(row.get(name))
+            for name in names
+        ])
+
+
+def iter_ndjson(titles, names, rows):
+    for row in rows:
+        yield json.dumps({name: row.get(name) for name in names}, cls=DjangoJSONEncoder) + '\n'
+
+
+def iter_export_content(export_format, titles, names, rows):
+    """
+    Encodes rows (an iterable of dictionaries) in the required format, one row at a time
+    """
+    if export_format == 'csv':
+        return iter_delimited(titles, names, rows)
+    if export_format == 'tsv':
+        return iter_delimited(titles, names, rows, delimiter='\t')
+    if export_format == 'ndjson':
+        return iter_ndjson(titles, names, rows)
+    raise ValueError('Unknown export format "%s"' % export_format)
+
+
+def gzip_content(chunks, buffer_size=65536):
+    """
+    Compresses a stream of strings on the fly, in gzip format
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    buffer = []
+    size = 0
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= buffer_size:
+            yield compressor.compress(b''.join(buffer))
+            buffer = []
+            size = 0
+    yield compressor.compress(b''.join(buffer)) + compressor.flush()
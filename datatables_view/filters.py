@@ -1,12 +1,245 @@
 
+import datetime
+import re
+from decimal import Decimal
+from decimal import InvalidOperation
+from decimal import ROUND_CEILING
+from decimal import ROUND_FLOOR
 from django.db.models import fields
 from django.db.models import Q
+from django.db import connections
 from django.db import models
+from django.db import router
 from .utils import parse_date
+from .utils import start_of_day
 
 
-def build_column_filter(column_name, column_obj, column_spec, search_value):
+# Lookups available for text search (see column "lookup" and "global_lookup")
+LOOKUPS = ('startswith', 'istartswith', 'exact', 'iexact', 'contains', 'icontains')
+
+
+# Fields searched with numeric comparisons rather than text lookups
+NUMERIC_FIELDS = (models.IntegerField, models.AutoField, models.DecimalField, models.FloatField)
+
+# i.e. "10", ">100", "<= 5", "10..20", "-1.5..2.5"
+NUMBER = r'[-+]?(?:\d+\.?\d*|\.\d+)'
+NUMERIC_FILTER_RE = re.compile(r'^(?:(?P<op>[<>]=?|=)?\s*(?P<value>%s)|(?P<low>%s)\s*\.\.\s*(?P<high>%s))$' % (NUMBER, NUMBER, NUMBER))
+
+# Values any driver can bind as an integer parameter (a 64-bit signed integer)
+BIGINT_RANGE = (-2 ** 63, 2 ** 63 - 1)
+
+OPERATOR_LOOKUPS = {
+    '': 'exact',
+    '=': 'exact',
+    '>': 'gt',
+    '>=': 'gte',
+    '<': 'lt',
+    '<=': 'lte',
+}
+
+
+def parse_numeric_filter(search_value, integer=False):
+    """
+    Parses search_value as either a number, a comparison (">100", "<=5")
+    or an inclusive range ("10..20"); returns a {lookup: value} dictionary,
+    or None when search_value is not numeric.
+
+    For integer fields, bounds are rounded so that the comparisons remain exact,
+    and fractional values never match.
+    """
+    match = NUMERIC_FILTER_RE.match(search_value.strip())
+    if match is None:
+        return None
+    try:
+        if match.group('value') is not None:
+            lookup = OPERATOR_LOOKUPS[match.group('op') or '']
+            value = Decimal(match.group('value'))
+            if integer:
+                if lookup in ('gt', 'lte'):
+                    value = value.to_integral_value(ROUND_FLOOR)
+                elif lookup in ('gte', 'lt'):
+                    value = value.to_integral_value(ROUND_CEILING)
+                elif value != value.to_integral_value():
+                    return None
+            return {lookup: value}
+        low = Decimal(match.group('low'))
+        high = Decimal(match.group('high'))
+        if integer:
+            low = low.to_integral_value(ROUND_CEILING)
+            high = high.to_integral_value(ROUND_FLOOR)
+        return {'range': (low, high)}
+    except InvalidOperation:
+        return None
+
+
+def clamp_numeric_filter(numeric_filter, low, high):
+    """
+    Restricts numeric_filter (see parse_numeric_filter()) to the values between low and high;
+    returns None when no value in that range can match
+    """
+    ((lookup, value), ) = numeric_filter.items()
+    if lookup == 'range':
+        value = (max(value[0], low), min(value[1], high))
+        return {lookup: value} if value[0] <= value[1] else None
+    if lookup == 'exact':
+        return numeric_filter if low <= value <= high else None
+    if lookup in ('gt', 'gte'):
+        if value > high or (lookup == 'gt' and value == high):
+            return None
+        return {'gte': low} if value < low else numeric_filter
+    if value < low or (lookup == 'lt' and value == low):
+        return None
+    return {'lte': high} if value > high else numeric_filter
+
+
+def get_integer_range(field):
+    """
+    The (low, high) values an integer field can hold in its database;
+    larger values can't even be bound as parameters (OverflowError with SQLite,
+    DataError with PostgreSQL)
+    """
+    connection = connections[router.db_for_read(field.model)]
+    try:
+        low, high = connection.ops.integer_field_range(field.get_internal_type())
+    except KeyError:
+        low, high = None, None
+    return (
+        BIGINT_RANGE[0] if low is None else max(low, BIGINT_RANGE[0]),
+        BIGINT_RANGE[1] if high is None else min(high, BIGINT_RANGE[1]),
+    )
+
+
+def get_numeric_filter(term, field):
+    """
+    The {lookup: value} filter matching term in a numeric field, with integer values
+    clamped to the range of the field, or None when term can't match
+    """
+    integer = is_integer_field(field)
+    numeric_filter = term.numeric(integer)
+    if numeric_filter is None or not integer:
+        return numeric_filter
+    return clamp_numeric_filter(numeric_filter, *get_integer_range(field))
+
+
+def build_date_range_filter(query_param_name, model_field, date_from=None, date_to=None):
+    """
+    Selects the dates between date_from and date_to (both included, and both optional);
+    for DateTimeFields, the half-open range [start of date_from, start of the day after date_to)
+    is computed in the active timezone, so that the column is compared as it is,
+    and an index can be used (while the "__date" transform wraps the column in a cast)
+    """
+    date_filter = Q()
+    if isinstance(model_field, models.DateTimeField):
+        if date_from is not None:
+            date_filter &= Q(**{query_param_name + '__gte': start_of_day(date_from)})
+        if date_to is not None:
+            date_filter &= Q(**{query_param_name + '__lt': start_of_day(date_to + datetime.timedelta(days=1))})
+    else:
+        if date_from is not None and date_from == date_to:
+            return Q(**{query_param_name: date_from})
+        if date_from is not None:
+            date_filter &= Q(**{query_param_name + '__gte': date_from})
+        if date_to is not None:
+            date_filter &= Q(**{query_param_name + '__lte': date_to})
+    return date_filter
+
+
+class SearchTerm(object):
+    """
+    A search value, classified once (as a number, a date, or text only)
+    for all the columns it's matched against
+    """
+
+    def __init__(self, value):
+        self.value = value
+        self.length = len(value)
+        self._numeric = {}
+        self._date = False
+
+    def __str__(self):
+        return self.value
+
+    def numeric(self, integer=False):
+        """
+        See parse_numeric_filter()
+        """
+        if integer not in self._numeric:
+            self._numeric[integer] = parse_numeric_filter(self.value, integer)
+        return self._numeric[integer]
+
+    @property
+    def date(self):
+        """
+        The date represented by value, or None
+        """
+        if self._date is False:
+            try:
+                self._date = parse_date(self.value)
+            except ValueError:
+                self._date = None
+        return self._date
+
+    def describe(self):
+        kinds = []
+        if self.numeric() is not None:
+            kinds.append('numeric')
+        if self.date is not None:
+            kinds.append('date')
+        kinds.append('length %d' % self.length)
+        return ', '.join(kinds)
+
+
+def get_column_lookup(column_spec, global_search=False):
+    """
+    The global search may use a different lookup than the column filter
+    """
+    lookup = column_spec.get('lookup', None)
+    if global_search and column_spec.get('global_lookup', None) is not None:
+        lookup = column_spec['global_lookup']
+    return lookup
+
+
+def get_skip_reason(column_obj, column_spec, term, lookup):
+    """
+    Tells why term can't match the column (and the column can be skipped), or returns None
+    """
+    if callable(lookup):
+        return None
+    field = column_obj.model_field
+    if column_obj.has_choices_available:
+        if not column_spec['choices'] and not column_obj.search_in_choices(term.value):
+            return 'no matching choices'
+    elif isinstance(field, (models.DateTimeField, models.DateField)):
+        if term.date is None:
+            return 'not a date'
+    elif lookup is None and isinstance(field, NUMERIC_FIELDS):
+        if term.numeric(is_integer_field(field)) is None:
+            return 'not a number'
+        if get_numeric_filter(term, field) is None:
+            return 'out of range'
+    elif isinstance(field, models.CharField) and field.max_length and term.length > field.max_length:
+        return 'longer than %d' % field.max_length
+    return None
+
+
+def is_integer_field(field):
+    return not isinstance(field, (models.DecimalField, models.FloatField))
+
+
+def build_column_filter(column_name, column_obj, column_spec, search_value, global_search=False):
+    """
+    Builds the filter matching search_value (either a string or a SearchTerm)
+    in the given column, or returns None when no match is possible
+    """
     search_filter = None
+    term = search_value if isinstance(search_value, SearchTerm) else SearchTerm(search_value)
+    search_value = term.value
+
+    lookup = get_column_lookup(column_spec, global_search)
+    if callable(lookup):
+        # A custom lookup: a function receiving the search path and value,
+        # and returning either a Q object or None
+        return lookup(column_obj.get_field_search_path(), search_value)
 
     # if type(column_obj.model_field) == fields.CharField:
     #     # do something special with this field
@@ -24,19 +257,66 @@ def build_column_filter(column_name, column_obj, column_spec, search_value):
         search_filter = Q(**{column_obj.name + '__in': values})
 
     elif isinstance(column_obj.model_field, (models.DateTimeField, models.DateField)):
-        try:
-            parsed_date = parse_date(search_value)
-            date_range = [parsed_date.isoformat(), parsed_date.isoformat()]
+        if term.date is not None:
+            search_filter = build_date_range_filter(
+                column_obj.get_field_search_path(), column_obj.model_field, term.date, term.date)
+    elif lookup is None and isinstance(column_obj.model_field, NUMERIC_FIELDS):
+        # Numeric values and ranges only; anything else (or out of range) can't match
+        integer = is_integer_field(column_obj.model_field)
+        numeric_filter = get_numeric_filter(term, column_obj.model_field)
+        if numeric_filter is not None:
             query_param_name = column_obj.get_field_search_path()
-            if isinstance(column_obj.model_field, models.DateTimeField):
-                search_filter = Q(**{query_param_name + '__date__range': date_range})
+            ((numeric_lookup, value), ) = numeric_filter.items()
+            if integer:
+                cast = int
+            elif isinstance(column_obj.model_field, models.FloatField):
+                cast = float
             else:
-                search_filter = Q(**{query_param_name + '__range': date_range})
-        except ValueError:
-            pass
+                cast = Decimal
+            value = tuple([cast(v) for v in value]) if numeric_lookup == 'range' else cast(value)
+            search_filter = Q(**{query_param_name + '__' + numeric_lookup: value})
     else:
         query_param_name = column_obj.get_field_search_path()
-        #search_filters |= Q(**{query_param_name + '__istartswith': search_value})
-        search_filter = Q(**{query_param_name + '__icontains': search_value})
+        search_filter = Q(**{query_param_name + '__' + (lookup or 'icontains'): search_value})
 
     return search_filter
+
+
+class SearchPlan(object):
+    """
+    Matches search_value against the given columns, a list of (column_name, column_obj, column_spec);
+    the value is classified once, and only the columns it can match are included in the predicate
+    """
+
+    def __init__(self, columns, search_value, global_search=False):
+        self.term = SearchTerm(search_value)
+        self.filters = []
+        self.skipped = []
+        for column_name, column_obj, column_spec in columns:
+            lookup = get_column_lookup(column_spec, global_search)
+            reason = get_skip_reason(column_obj, column_spec, self.term, lookup)
+            column_filter = None
+            if reason is None:
+                column_filter = build_column_filter(column_name, column_obj, column_spec, self.term, global_search)
+                if not column_filter:
+                    reason = 'no filter'
+            if reason is None:
+                self.filters.append((column_name, column_filter))
+            else:
+                self.skipped.append((column_name, reason))
+
+    @property
+    def predicate(self):
+        """
+        The OR of all column filters; empty when no column can match
+        """
+        predicate = Q()
+        for column_name, column_filter in self.filters:
+            predicate |= column_filter
+        return predicate
+
+    def describe(self):
+        lines = ['"%s" (%s)' % (self.term.value, self.term.describe())]
+        lines += ['  + %s: %s' % (column_name, column_filter) for column_name, column_filter in self.filters]
+        lines += ['  - %s: skipped, %s' % (column_name, reason) for column_name, reason in self.skipped]
+        return '\n'.join(lines)
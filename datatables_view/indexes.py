@@ -0,0 +1,195 @@
+import os
+import sysconfig
+from collections import OrderedDict
+import django
+from django.db import models
+from django.urls import get_resolver
+from django.urls import URLPattern
+from django.urls import URLResolver
+
+from .columns import resolve_field_path
+from .filters import NUMERIC_FIELDS
+from .filters import get_column_lookup
+
+
+# Lookups which can take advantage of a B-tree index
+INDEXABLE_LOOKUPS = ('exact', 'iexact', 'startswith', 'istartswith')
+
+
+def iter_view_classes(patterns=None, prefix=''):
+    """
+    Yields (url, view class) for each DatatablesView-derived class found in the URLconf
+    """
+    from .views import DatatablesView
+
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_view_classes(pattern.url_patterns, prefix + str(pattern.pattern))
+        elif isinstance(pattern, URLPattern):
+            view_class = getattr(pattern.callback, 'view_class', None)
+            if view_class is not None and issubclass(view_class, DatatablesView):
+                yield prefix + str(pattern.pattern), view_class
+
+
+def is_project_app(app_config):
+    """
+    Tells whether app_config belongs to the project, rather than to Django
+    or an installed package (whose models and migrations are not to be changed)
+    """
+    library_paths = [os.path.dirname(django.__file__)]
+    library_paths += [sysconfig.get_paths()[name] for name in ('purelib', 'platlib')]
+    path = os.path.realpath(app_config.path)
+    for library_path in library_paths:
+        library_path = os.path.realpath(library_path)
+        if path == library_path or path.startswith(library_path + os.sep):
+            return False
+    return True
+
+
+def get_indexed_fields(model):
+    """
+    Lists the names of the fields which lead an index (or a unique constraint) of model
+    """
+    opts = model._meta
+    indexed = set()
+    for field in opts.concrete_fields:
+        if field.primary_key or field.unique or field.db_index:
+            indexed.add(field.name)
+    for index in opts.indexes:
+        if index.fields:
+            indexed.add(index.fields[0].lstrip('-'))
+    for fields in list(opts.unique_together) + list(opts.index_together):
+        if fields:
+            indexed.add(fields[0])
+    return indexed
+
+
+class IndexRecommendation(object):
+    """
+    An index on a single field, and the reasons (per view) why it's needed
+    """
+
+    def __init__(self, model, field):
+        self.model = model
+        self.field = field
+        self.reasons = OrderedDict()
+
+    def add_reason(self, view_name, reason):
+        reasons = self.reasons.setdefault(view_name, [])
+        if reason not in reasons:
+            reasons.append(reason)
+
+    def build_index(self):
+        index = models.Index(fields=[self.field.name])
+        index.set_name_with_model(self.model)
+        return index
+
+    def __str__(self):
+        return '%s.%s' % (self.model._meta.label, self.field.name)
+
+
+class IndexAdvisor(object):
+    """
+    Compares the columns of DatatablesView-derived classes with the existing indexes;
+    columns which are used for ordering, filtering by a lookup which can use an index,
+    or global date filtering ("latest_by") should be indexed.
+    """
+
+    def __init__(self):
+        self.recommendations = OrderedDict()
+        # (view name, column name, message)
+        self.notes = []
+
+    def analyze(self, view_class):
+        view = view_class()
+        view_name = '%s.%s' % (view_class.__module__, view_class.__name__)
+        schema = view.compile_table_schema(None)
+
+        initial_order = [row[0] for row in view.fix_initial_order(view.get_initial_order(None))]
+        for position, (column_spec, column_obj, use_autofilter) in enumerate(schema.columns):
+            if not column_spec['name'] or column_obj.model_field is None:
+                continue
+            reasons = []
+            if column_spec['orderable']:
+                reasons.append('initial order' if position in initial_order else 'order')
+            if column_spec['searchable']:
+                reason = self.get_search_reason(view_name, column_spec, column_obj)
+                if reason:
+                    reasons.append(reason)
+            if reasons:
+                self.check_path(view_name, view_class.model, column_obj.get_field_search_path(), reasons)
+
+        if schema.latest_by:
+            self.check_path(view_name, view_class.model, schema.latest_by, ['date range ("latest_by")'])
+
+    def get_search_reason(self, view_name, column_spec, column_obj):
+        field = column_obj.model_field
+        lookup = get_column_lookup(column_spec)
+        if callable(lookup):
+            return None
+        if column_obj.has_choices_available or column_spec['choices']:
+            return 'filter by choice'
+        if isinstance(field, (models.DateField, models.DateTimeField)):
+            return 'filter by date'
+        if lookup is None and isinstance(field, NUMERIC_FIELDS):
+            return 'filter by number'
+        if lookup in INDEXABLE_LOOKUPS:
+            return 'filter by "%s"' % lookup
+        if isinstance(field, (models.CharField, models.TextField)):
+            self.notes.append((
+                view_name, column_spec['name'],
+                '"%s" can\'t use a B-tree index; consider a prefix "lookup" or a "search_backend"' % (lookup or 'icontains')))
+        return None
+
+    def check_path(self, view_name, model, path, reasons):
+        try:
+            hops = resolve_field_path(model, path)
+        except KeyError:
+            return
+        field = hops[-1][0]
+        if field.is_relation or not field.concrete or isinstance(field, models.BooleanField):
+            return
+        # Joined tables should be reached by indexed foreign keys
+        for hop_field, attname, to_many in hops[:-1]:
+            if hop_field.concrete and hop_field.many_to_one and not hop_field.db_index:
+                self.add_recommendation(hop_field.model, hop_field, view_name, 'join "%s"' % path)
+        if field.name not in get_indexed_fields(field.model):
+            for reason in reasons:
+                self.add_recommendation(field.model, field, view_name, '%s "%s"' % (reason, path) if path != field.name else reason)
+
+    def add_recommendation(self, model, field, view_name, reason):
+        key = (model._meta.label, field.name)
+        if key not in self.recommendations:
+            self.recommendations[key] = IndexRecommendation(model, field)
+        self.recommendations[key].add_reason(view_name, reason)
+
+    def get_explain_queries(self, view_class):
+        """
+        Yields (description, queryset) for representative queries of the view:
+        ordering by each orderable column, and filtering by "latest_by"
+        """
+        view = view_class()
+        view.initialize(None, collect_autofilter_choices=False)
+        qs = view.get_initial_queryset(None)
+        for cs in view.column_specs:
+            if cs['name'] and cs['orderable'] and view.column_obj(cs['name']).model_field is not None:
+                path = view.column_obj(cs['name']).get_field_search_path()
+                yield 'order by %s' % path, qs.order_by(path)[:10]
+        if view.latest_by:
+            yield 'filter by %s' % view.latest_by, view.filter_queryset_by_date_range('2000-01-01', '2000-01-31', qs)[:10]
+
+    def explain(self, qs):
+        """
+        Returns the query plan of qs, and whether it looks like a full table scan
+        """
+        plan = qs.explain()
+        full_scan = False
+        for line in plan.splitlines():
+            line = line.strip()
+            # sqlite: "SCAN TABLE t" (without an index) or "USE TEMP B-TREE FOR ORDER BY";
+            # PostgreSQL: "Seq Scan on t"; MySQL: "type: ALL"
+            if (line.startswith('SCAN') and 'INDEX' not in line) or 'TEMP B-TREE' in line or 'Seq Scan' in line:
+                full_scan = True
+        return plan, full_scan
@@ -0,0 +1,294 @@
+import logging
+import re
+import time
+from collections import Counter
+from collections import OrderedDict
+from contextlib import ExitStack
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+
+from .exceptions import QueryBudgetExceeded
+from .signals import request_profiled
+
+
+logger = logging.getLogger('datatables_view')
+
+# Lists of placeholders and literals, which vary while the "shape" of the query does not
+_PLACEHOLDER_LIST_RE = re.compile(r'(%s|\?)(\s*,\s*(%s|\?))+')
+_NUMBER_RE = re.compile(r'\b\d+\b')
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+
+
+def sql_shape(sql):
+    """
+    Normalizes sql, so that the same query executed with different parameters
+    (or a different number of parameters in an IN clause) has the same shape
+    """
+    shape = _STRING_RE.sub("'?'", sql)
+    shape = _NUMBER_RE.sub('?', shape)
+    shape = _PLACEHOLDER_LIST_RE.sub('%s, ...', shape)
+    return shape
+
+
+class NullProfile(object):
+    """
+    Does nothing; used when no instrumentation is required
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def phase(self, name):
+        return self
+
+    def watch(self, connection, phase=None):
+        return self
+
+    def stream(self, content):
+        return content
+
+    def set_queryset(self, qs):
+        pass
+
+    def report(self, view, request, response):
+        pass
+
+
+class RequestProfile(object):
+    """
+    Captures the queries executed while processing a request, via connection.execute_wrapper(),
+    grouped by "phase" (see phase()); queries executed outside any phase
+    are attributed to the "prepare" phase.
+
+    When "timing" is active, the duration of each phase (and of the queries executed
+    within it) is measured as well, and published by report().
+
+    On exit:
+
+    - identical query shapes repeated at least "n_plus_one_threshold" times
+      within the same phase are reported as N+1 queries
+    - when more than "max_queries" queries have been executed, QueryBudgetExceeded is either
+      raised or logged (according to "raise_exceptions")
+    """
+
+    def __init__(self, name, max_queries=None, n_plus_one_threshold=None, raise_exceptions=False, timing=False):
+        self.name = name
+        self.max_queries = max_queries
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.raise_exceptions = raise_exceptions
+        self.timing = timing
+        self.queries = []
+        self.current_phase = 'prepare'
+        # phase -> elapsed seconds
+        self.timings = OrderedDict()
+        self.sql_timings = {}
+        self.duration = None
+        self.query_shape = None
+        self._exit_stack = None
+        self._t0 = None
+        self._streaming = False
+
+    def __call__(self, execute, sql, params, many, context):
+        return self.execute(self.current_phase, execute, sql, params, many, context)
+
+    def execute(self, phase, execute, sql, params, many, context):
+        self.queries.append((phase, sql))
+        if not self.timing:
+            return execute(sql, params, many, context)
+        t0 = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_timings[phase] = self.sql_timings.get(phase, 0.0) + time.perf_counter() - t0
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        self._exit_stack = self.watch_all_connections()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._exit_stack.close()
+        self.duration = time.perf_counter() - self._t0
+        if exc_type is None and not self._streaming:
+            self.check()
+        return False
+
+    def watch_all_connections(self):
+        exit_stack = ExitStack()
+        for alias in connections:
+            exit_stack.enter_context(connections[alias].execute_wrapper(self))
+        return exit_stack
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def watch(self, connection, phase=None):
+        """
+        Captures the queries executed by a connection opened after __enter__()
+        (i.e. by another thread); when "phase" is given, they are attributed (and timed)
+        to it, rather than to the phase the request thread is in meanwhile
+        """
+        if phase is None:
+            return connection.execute_wrapper(self)
+        return _Watch(self, connection, phase)
+
+    def stream(self, content):
+        """
+        Wraps the content of a streaming response, whose queries are executed while
+        the response is being sent: they are captured in the "stream" phase, and checked
+        once the content has been exhausted.
+        Must be called before __exit__(); timings are reported before streaming,
+        hence don't include the "stream" phase
+        """
+        self._streaming = True
+        return self._iter_stream(content)
+
+    def _iter_stream(self, content):
+        iterator = iter(content)
+        while True:
+            with self.watch_all_connections(), self.phase('stream'):
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    break
+            yield chunk
+        self.check()
+
+    def add_timing(self, name, elapsed):
+        self.timings[name] = self.timings.get(name, 0.0) + elapsed
+
+    def set_queryset(self, qs):
+        """
+        Records the shape of the main query, to identify the request in logs
+        """
+        if self.timing:
+            try:
+                self.query_shape = sql_shape(str(qs.query))
+            except EmptyResultSet:
+                self.query_shape = 'EMPTY'
+
+    def server_timing(self):
+        """
+        Formats timings for the "Server-Timing" response header; for example:
+
+            parse;dur=0.1, filter;dur=0.4, count;dur=2.3;desc="1 queries (sql 2.1 ms)", ..., total;dur=8.2
+        """
+        counts = self.count_by_phase()
+        metrics = []
+        for name, elapsed in self.timings.items():
+            metric = '%s;dur=%.1f' % (name, elapsed * 1000.0)
+            if counts.get(name):
+                metric += ';desc="%d queries (sql %.1f ms)"' % (counts[name], self.sql_timings.get(name, 0.0) * 1000.0)
+            metrics.append(metric)
+        if self.duration is not None:
+            metrics.append('total;dur=%.1f' % (self.duration * 1000.0))
+        return ', '.join(metrics)
+
+    def report(self, view, request, response):
+        """
+        Publishes timings via the "Server-Timing" response header,
+        the "request_profiled" signal and the "datatables_view" logger
+        """
+        if not self.timing:
+            return
+        response['Server-Timing'] = self.server_timing()
+        request_profiled.send(sender=type(view), view=view, request=request, response=response, profile=self)
+        logger.info(
+            '%s: %.1f ms, %d queries (%s)',
+            self.name,
+            (self.duration or 0.0) * 1000.0,
+            self.num_queries,
+            ', '.join(['%s %.1f ms' % (name, elapsed * 1000.0) for name, elapsed in self.timings.items()]),
+            extra={
+                'datatables_view': self.name,
+                'query_shape': self.query_shape,
+                'duration': self.duration,
+                'timings': dict(self.timings),
+                'num_queries': self.num_queries,
+            }
+        )
+
+    @property
+    def num_queries(self):
+        return len(self.queries)
+
+    def count_by_phase(self):
+        counter = OrderedDict()
+        for phase, sql in self.queries:
+            counter[phase] = counter.get(phase, 0) + 1
+        return counter
+
+    def find_n_plus_one(self):
+        """
+        Lists the (phase, shape, count) of queries repeated too many times
+        """
+        if not self.n_plus_one_threshold:
+            return []
+        counter = Counter([(phase, sql_shape(sql)) for phase, sql in self.queries])
+        return [
+            (phase, shape, count)
+            for (phase, shape), count in counter.items()
+            if count >= self.n_plus_one_threshold
+        ]
+
+    def check(self):
+        for phase, shape, count in self.find_n_plus_one():
+            logger.warning('%s: possible N+1 queries in phase "%s" (%d times): %s', self.name, phase, count, shape)
+
+        if self.max_queries is not None and self.num_queries > self.max_queries:
+            message = '%s: %d queries executed (max %d); by phase: %s' % (
+                self.name,
+                self.num_queries,
+                self.max_queries,
+                ', '.join(['%s=%d' % item for item in self.count_by_phase().items()]),
+            )
+            if self.raise_exceptions:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+
+class _Watch(object):
+
+    def __init__(self, profile, connection, phase):
+        self.profile = profile
+        self.phase = phase
+        self.execute_wrapper = connection.execute_wrapper(self)
+        self.t0 = None
+
+    def __call__(self, execute, sql, params, many, context):
+        return self.profile.execute(self.phase, execute, sql, params, many, context)
+
+    def __enter__(self):
+        self.execute_wrapper.__enter__()
+        self.t0 = time.perf_counter()
+        return self.profile
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.profile.timing:
+            self.profile.add_timing(self.phase, time.perf_counter() - self.t0)
+        self.execute_wrapper.__exit__(exc_type, exc_value, traceback)
+        return False
+
+
+class _Phase(object):
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+        self.previous_phase = None
+        self.t0 = None
+
+    def __enter__(self):
+        self.previous_phase = self.profile.current_phase
+        self.profile.current_phase = self.name
+        self.t0 = time.perf_counter()
+        return self.profile
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.profile.timing:
+            self.profile.add_timing(self.name, time.perf_counter() - self.t0)
+        self.profile.current_phase = self.previous_phase
+        return False
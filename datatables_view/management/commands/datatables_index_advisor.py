@@ -0,0 +1,113 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.module_loading import import_string
+
+from datatables_view.indexes import IndexAdvisor
+from datatables_view.indexes import is_project_app
+from datatables_view.indexes import iter_view_classes
+
+
+class Command(BaseCommand):
+    help = (
+        "Lists the indexes needed by the DatatablesView-derived classes found in the URLconf "
+        "for ordering and filtering, and not yet available, with the Meta.indexes to add them "
+        "(or, for models of installed packages, the SQL for a RunSQL migration)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--view', action='append', dest='views', default=[],
+            help='Dotted path of a view class to analyze (instead of the URLconf); can be repeated.',
+        )
+        parser.add_argument(
+            '--explain', action='store_true',
+            help='Run EXPLAIN for representative order and filter queries of each view.',
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='The database used for EXPLAIN and the SQL of indexes. Defaults to the "default" database.',
+        )
+
+    def handle(self, *args, **options):
+
+        if options['views']:
+            try:
+                view_classes = [import_string(path) for path in options['views']]
+            except ImportError as e:
+                raise CommandError(str(e))
+        else:
+            view_classes = []
+            for url, view_class in iter_view_classes():
+                if view_class not in view_classes:
+                    view_classes.append(view_class)
+
+        advisor = IndexAdvisor()
+        for view_class in view_classes:
+            if view_class.model is None:
+                continue
+            self.stdout.write('Analyzing %s.%s (%s)' % (view_class.__module__, view_class.__name__, view_class.model._meta.label))
+            advisor.analyze(view_class)
+            if options['explain']:
+                self.explain(advisor, view_class, options['database'])
+
+        for view_name, column_name, message in advisor.notes:
+            self.stdout.write('Note: %s, column "%s": %s' % (view_name, column_name, message))
+
+        if not advisor.recommendations:
+            self.stdout.write(self.style.SUCCESS('No missing indexes found.'))
+            return
+
+        self.stdout.write(self.style.WARNING('Recommended indexes:'))
+        for recommendation in advisor.recommendations.values():
+            index = recommendation.build_index()
+            self.stdout.write('  %s: models.Index(fields=%r, name=%r)' % (recommendation, index.fields, index.name))
+            for view_name, reasons in recommendation.reasons.items():
+                self.stdout.write('      %s: %s' % (view_name, ', '.join(reasons)))
+
+        self.write_instructions(advisor.recommendations.values(), options['database'])
+
+    def explain(self, advisor, view_class, database):
+        for description, qs in advisor.get_explain_queries(view_class):
+            try:
+                plan, full_scan = advisor.explain(qs.using(database))
+            except Exception as e:
+                self.stdout.write('  %s: EXPLAIN failed (%s)' % (description, e))
+                continue
+            status = self.style.WARNING('full scan or sort') if full_scan else self.style.SUCCESS('ok')
+            self.stdout.write('  %s: %s' % (description, status))
+            for line in plan.splitlines():
+                self.stdout.write('      ' + line)
+
+    def write_instructions(self, recommendations, database):
+        """
+        Indexes are added to the Meta.indexes of project models, so that "makemigrations"
+        keeps the migration state consistent; models of installed packages (i.e. django.contrib.auth)
+        can't be changed, and their indexes are rather created with RunSQL in a project app
+        """
+        by_model = {}
+        for recommendation in recommendations:
+            by_model.setdefault(recommendation.model, []).append(recommendation.build_index())
+
+        project_models = [model for model in by_model if is_project_app(apps.get_app_config(model._meta.app_label))]
+        if project_models:
+            self.stdout.write('Add to Meta.indexes, then run "makemigrations":')
+            for model in project_models:
+                self.stdout.write('  %s:' % model._meta.label)
+                self.stdout.write('      indexes = [')
+                for index in by_model[model]:
+                    self.stdout.write('          models.Index(fields=%r, name=%r),' % (index.fields, index.name))
+                self.stdout.write('      ]')
+
+        other_models = [model for model in by_model if model not in project_models]
+        if other_models:
+            self.stdout.write('Models of installed packages; create the indexes with a RunSQL migration in a project app:')
+            connection = connections[database]
+            for model in other_models:
+                self.stdout.write('  %s:' % model._meta.label)
+                for index in by_model[model]:
+                    with connection.schema_editor(collect_sql=True) as editor:
+                        editor.add_index(model, index)
+                    for sql in editor.collected_sql:
+                        self.stdout.write('      ' + sql)
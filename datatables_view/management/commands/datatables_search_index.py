@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.module_loading import import_string
+
+from datatables_view.indexes import iter_view_classes
+from datatables_view.search import FullTextSearchBackend
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates and fills the full-text indexes of the DatatablesView-derived classes found in the URLconf "
+        "which specify a full-text \"search_backend\"; existing indexes are left untouched, unless --rebuild is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--view', action='append', dest='views', default=[],
+            help='Dotted path of a view class (instead of the URLconf); can be repeated.',
+        )
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Refill existing indexes as well (i.e. after bulk updates, which bypass signals).',
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='The database holding the indexes. Defaults to the "default" database.',
+        )
+
+    def handle(self, *args, **options):
+
+        if options['views']:
+            try:
+                view_classes = [import_string(path) for path in options['views']]
+            except ImportError as e:
+                raise CommandError(str(e))
+        else:
+            view_classes = []
+            for url, view_class in iter_view_classes():
+                if view_class not in view_classes:
+                    view_classes.append(view_class)
+
+        using = options['database']
+        vendor = connections[using].vendor
+        backends = []
+        for view_class in view_classes:
+            search_backend = view_class.search_backend
+            if not isinstance(search_backend, FullTextSearchBackend) or search_backend in backends:
+                continue
+            backends.append(search_backend)
+            name = '%s.%s' % (view_class.__module__, view_class.__name__)
+            if search_backend.vendor != vendor or not search_backend.is_model_supported(view_class.model):
+                self.stdout.write('Skipping %s: %s not supported' % (name, type(search_backend).__name__))
+                continue
+            if search_backend.view_class is None:
+                search_backend.register_view_class(view_class)
+            if search_backend.build_index(using, rebuild=options['rebuild']):
+                self.stdout.write(self.style.SUCCESS('Built index "%s" for %s' % (
+                    search_backend.get_index_name(view_class.model), name)))
+            else:
+                self.stdout.write('Index "%s" for %s already exists' % (
+                    search_backend.get_index_name(view_class.model), name))
+
+        if not backends:
+            self.stdout.write('No full-text search backends found.')
@@ -0,0 +1,292 @@
+import base64
+import datetime
+import json
+import math
+import sys
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Expression
+from django.db.models import F
+from django.db.models import Field
+from django.db.models import Lookup
+
+from .columns import resolve_field_path
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """
+    Same as DjangoJSONEncoder, but preserves microseconds,
+    since cursor values are used for exact comparisons
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super(CursorEncoder, self).default(o)
+
+
+def encode_cursor(order_modes, values):
+    data = json.dumps({'o': order_modes, 'v': values}, cls=CursorEncoder)
+    return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(order_modes, cursor):
+    """
+    Returns the list of values encoded in cursor, or None
+    when the cursor is invalid or refers to a different ordering
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+        if data['o'] != order_modes or len(data['v']) != len(order_modes):
+            return None
+        return data['v']
+    except (ValueError, TypeError, KeyError):
+        return None
+
+
+class Seek(Expression):
+    """
+    Right hand side of the "seek" lookup: the ordering columns following the first one,
+    the values of all the ordering columns (taken from the cursor row) and their directions
+    """
+
+    def __init__(self, columns, values, ascending):
+        super(Seek, self).__init__()
+        self.columns = [F(column) if isinstance(column, str) else column for column in columns]
+        self.values = values
+        self.ascending = ascending
+
+    def get_source_expressions(self):
+        return self.columns
+
+    def set_source_expressions(self, exprs):
+        self.columns = list(exprs)
+
+
+def supports_row_values(connection):
+    if connection.vendor == 'sqlite':
+        return connection.Database.sqlite_version_info >= (3, 15, 0)
+    return connection.vendor in ('postgresql', 'mysql')
+
+
+@Field.register_lookup
+class SeekLookup(Lookup):
+    """
+    Selects the rows following the cursor row in the given ordering; when all columns
+    share the same direction, and the database supports row values, it compiles to:
+
+        (col1, col2, pk) > (v1, v2, id)
+
+    which can be resolved with an index range scan; otherwise, to the equivalent:
+
+        col1 > v1 OR
+        (col1 = v1 AND col2 > v2) OR
+        (col1 = v1 AND col2 = v2 AND pk > id)
+
+    swapping the comparison for descending columns
+    """
+
+    lookup_name = 'dtv_seek'
+
+    def as_sql(self, compiler, connection):
+        sql, params = self.process_lhs(compiler, connection)
+        columns = [(sql, params, self.lhs.output_field)]
+        for expression in self.rhs.get_source_expressions():
+            sql, params = compiler.compile(expression)
+            columns.append((sql, params, expression.output_field))
+
+        values = [
+            field.get_db_prep_value(field.get_prep_value(value), connection, prepared=True)
+            for (sql, params, field), value in zip(columns, self.rhs.values)
+        ]
+        ascending = self.rhs.ascending
+
+        if len(set(ascending)) == 1 and supports_row_values(connection):
+            sql = '(%s) %s (%s)' % (
+                ', '.join(column[0] for column in columns),
+                '>' if ascending[0] else '<',
+                ', '.join(['%s'] * len(values)),
+            )
+            return sql, [p for column in columns for p in column[1]] + values
+
+        conditions = []
+        all_params = []
+        for i, ((sql, params, field), value) in enumerate(zip(columns, values)):
+            terms = ['%s = %%s' % column[0] for column in columns[:i]]
+            terms.append('%s %s %%s' % (sql, '>' if ascending[i] else '<'))
+            conditions.append('(%s)' % ' AND '.join(terms))
+            for column, v in zip(columns[:i], values[:i]):
+                all_params.extend(column[1])
+                all_params.append(v)
+            all_params.extend(params)
+            all_params.append(value)
+        return '(%s)' % ' OR '.join(conditions), all_params
+
+
+class KeysetPaginator(Paginator):
+    """
+    A Paginator which retrieves the next (or previous) page by "seeking" from
+    the last (or first) row of the current page, using a predicate like:
+
+        (col1, col2, pk) > (v1, v2, id)
+
+    instead of OFFSET; this remains fast when paging deep into large tables,
+    provided that an index is available for the ordering columns.
+
+    The primary key is always appended to "orders" as a tiebreaker, so that
+    the ordering is unique; it follows the direction of the last ordering column.
+
+    Without a valid cursor (first page, or when jumping to an arbitrary page),
+    or when ordering by a column which can be NULL, it behaves like a plain Paginator.
+    """
+
+    def __init__(self, object_list, per_page, orders, cursor=None, direction='next', **kwargs):
+
+        pk_name = object_list.model._meta.pk.name
+        self.keys = [
+            (order.column_link.get_field_search_path(), order.ascending, order.column_link.get_model_column())
+            for order in orders
+        ]
+        if not [key for key in self.keys if key[0] in ('pk', pk_name)]:
+            # Same direction as the last column, so that the whole ordering can be
+            # compared as a row value, and resolved with a single index scan
+            self.keys.append((pk_name, self.keys[-1][1] if self.keys else True, None))
+        self.order_modes = [(path if ascending else '-' + path) for path, ascending, column in self.keys]
+
+        super(KeysetPaginator, self).__init__(object_list.order_by(*self.order_modes), per_page, **kwargs)
+
+        # NULL values can't be compared, and their position in the ordering depends
+        # on the database: seeking is only possible on columns which are never NULL
+        self.seekable = all(self.is_seekable(object_list.model, path) for path, ascending, column in self.keys)
+
+        self.cursor = decode_cursor(self.order_modes, cursor) if cursor and self.seekable else None
+        if self.cursor is not None and None in self.cursor:
+            # Fallback to OFFSET
+            self.cursor = None
+        self.direction = direction
+        self.first_cursor = None
+        self.last_cursor = None
+
+    @staticmethod
+    def is_seekable(model, path):
+        """
+        True when path refers to a column which is never NULL, reached with
+        non-nullable, to-one relations only
+        """
+        if path == 'pk':
+            return True
+        try:
+            hops = resolve_field_path(model, path)
+        except KeyError:
+            return False
+        for field, attname, to_many in hops:
+            if to_many or field.null or not field.concrete:
+                return False
+        return True
+
+    def seek_filter(self, values, forward):
+        """
+        Returns the filter which selects the rows following (or preceding)
+        the row with the given values (see SeekLookup)
+        """
+        paths = [path for path, ascending, column in self.keys]
+        ascending = [(key[1] == forward) for key in self.keys]
+        return {paths[0] + '__dtv_seek': Seek(paths[1:], values, ascending)}
+
+    def page(self, number):
+        if self.cursor is None:
+            page = super(KeysetPaginator, self).page(number)
+        else:
+            number = self.validate_number(number)
+            forward = (self.direction != 'previous')
+            qs = self.object_list.filter(**self.seek_filter(self.cursor, forward))
+            if forward:
+                object_list = list(qs[:self.per_page])
+            else:
+                reverse_modes = [m[1:] if m.startswith('-') else '-' + m for m in self.order_modes]
+                object_list = list(qs.order_by(*reverse_modes)[:self.per_page])
+                object_list.reverse()
+            page = self._get_page(object_list, number, self)
+
+        object_list = list(page.object_list)
+        page.object_list = object_list
+        if object_list:
+            self.first_cursor = self.get_cursor(object_list[0])
+            self.last_cursor = self.get_cursor(object_list[-1])
+        return page
+
+    def get_cursor(self, obj):
+        if not self.seekable:
+            return None
+        values = []
+        for path, ascending, column in self.keys:
+            try:
+                if column is None:
+                    value = getattr(obj, path)
+                else:
+                    value = column.get_raw_value(obj)
+            except AttributeError:
+                value = None
+            if value is None or isinstance(value, (list, tuple)):
+                # Not suitable for seeking
+                return None
+            values.append(value)
+        return encode_cursor(self.order_modes, values)
+
+
+class LookaheadPaginator(Paginator):
+    """
+    A Paginator which never counts records: it rather fetches per_page + 1 rows,
+    to know whether a next page is available.
+
+    "count" is only known after page() has been called, and includes the
+    first row of the next page, if any; a negative per_page means "all rows".
+    """
+
+    def __init__(self, object_list, per_page, **kwargs):
+        super(LookaheadPaginator, self).__init__(object_list, per_page, **kwargs)
+        self.count = None
+        self.has_more = False
+
+    @property
+    def num_pages(self):
+        if self.count is None or self.per_page <= 0:
+            # Unknown until a page has been fetched
+            return sys.maxsize
+        return int(math.ceil(max(self.count, 1) / float(self.per_page)))
+
+    def page(self, number):
+        if self.per_page <= 0:
+            number = 1
+            object_list = list(self.object_list)
+            self.count = len(object_list)
+        else:
+            number = max(int(number), 1)
+            bottom = (number - 1) * self.per_page
+            object_list = list(self.object_list[bottom:bottom + self.per_page + 1])
+            self.count = bottom + len(object_list)
+            self.has_more = len(object_list) > self.per_page
+            object_list = object_list[:self.per_page]
+        return self._get_page(object_list, number, self)
+
+
+def capped_count(qs, cap):
+    """
+    Counts up to "cap" + 1 records in qs, to avoid scanning the whole table;
+    returns the count and whether the cap has been reached
+    """
+    count = qs.order_by()[:cap + 1].count()
+    if count > cap:
+        return cap, True
+    return count, False
+
+
+def page_bounds(start, per_page, count):
+    """
+    Returns the slice (bottom, top) of the page including row "start", as Paginator would;
+    positions out of range fall back to the first (or last) page
+    """
+    num_pages = max(int(math.ceil(count / float(per_page))), 1)
+    page_id = min(max(start // per_page + 1, 1), num_pages)
+    bottom = (page_id - 1) * per_page
+    return bottom, bottom + per_page
@@ -0,0 +1,193 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from .columns import Column
+from .filters import LOOKUPS
+
+
+class TableSchema(object):
+    """
+    The request-independent part of DatatablesView.initialize():
+    normalized column specs, column objects, latest_by and filter flags.
+
+    A TableSchema is compiled once and then shared by all requests;
+    never modify it in place: DatatablesView.initialize() works on copies
+    of the column specs.
+    """
+
+    def __init__(self, model, column_defs, latest_by, show_date_filters, show_column_filters):
+
+        self.model = model
+
+        # Normalize latest_by fieldname
+        if latest_by is None:
+            latest_by = getattr(model._meta, 'get_latest_by', None)
+        if isinstance(latest_by, (list, tuple)):
+            latest_by = latest_by[0] if len(latest_by) > 0 else ''
+        if latest_by:
+            if latest_by.startswith('-'):
+                latest_by = latest_by[1:]
+        self.latest_by = latest_by
+
+        # List of (column_spec, column_obj, use_autofilter) tuples,
+        # in the order required by column_defs
+        self.columns = []
+        for c in column_defs:
+            column_spec = self.build_column_spec(model, c)
+            column_obj = Column.column_factory(model, column_spec)
+            use_autofilter = self.adjust_choices(column_spec, column_obj)
+            self.columns.append((column_spec, column_obj, use_autofilter))
+
+        # Initialize "show_date_filters"
+        if show_date_filters is None:
+            show_date_filters = bool(self.latest_by)
+        self.show_date_filters = show_date_filters
+
+        # If global date filter is visible,
+        # add class 'get_latest_by' to the column used for global date filtering
+        if self.show_date_filters and self.latest_by:
+            column_spec = self.column_spec_by_name(self.latest_by)
+            if column_spec:
+                if column_spec['className']:
+                    column_spec['className'] += ' latest_by'
+                else:
+                    column_spec['className'] = 'latest_by'
+
+        # Initialize "show_column_filters"
+        if show_column_filters is None:
+            # By default we show the column filters if there is at least
+            # one searchable and visible column
+            num_searchable_columns = len([
+                cs for cs, column_obj, use_autofilter in self.columns
+                if cs.get('searchable') and cs.get('visible')
+            ])
+            show_column_filters = (num_searchable_columns > 0)
+        self.show_column_filters = show_column_filters
+
+    def build_column_spec(self, model, c):
+
+        column = {
+            'name': '',
+            'data': None,
+            'title': '',
+            'searchable': False,
+            'orderable': False,
+            'visible': True,
+            'foreign_field': None,
+            'placeholder': False,
+            'className': None,
+            'defaultContent': None,
+            'width': None,
+            'choices': None,
+            'initialSearchValue': None,
+            'autofilter': False,
+            'boolean': False,
+            'max_length': 0,
+            'autofilter_cache_timeout': None,
+            'autofilter_max_choices': None,
+            'autofilter_lazy': False,
+            'lookup': None,
+            'global_lookup': None,
+            'search_delay': None,
+            'min_chars': 0,
+        }
+
+        #valid_keys = [key for key in column.keys()][:]
+        #valid_keys = column.keys().copy()
+        valid_keys = list(column.keys())
+
+        column.update(c)
+
+        # TODO: do we really want to accept an empty column name ?
+        # Investigate !
+        if c['name']:
+
+            # Detect unexpected keys
+            for key in c.keys():
+                if not key in valid_keys:
+                    raise Exception('Unexpected key "%s" for column "%s"' % (key, c['name']))
+
+            # Validate lookups
+            for key in ('lookup', 'global_lookup'):
+                lookup = c.get(key, None)
+                if lookup is not None and not callable(lookup) and lookup not in LOOKUPS:
+                    raise Exception('Invalid %s "%s" for column "%s"' % (key, lookup, c['name']))
+
+            if 'title' in c:
+                title = c['title']
+            else:
+                try:
+                    title = model._meta.get_field(c['name']).verbose_name.title()
+                except:
+                    title = c['name']
+
+            column['name'] = c['name']
+            column['data'] = c['name']
+            #column['title'] = c.get('title') if 'title' in c else self.model._meta.get_field(c['name']).verbose_name.title()
+            column['title'] = title
+            column['searchable'] = c.get('searchable', column['visible'])
+            column['orderable'] = c.get('orderable', column['visible'])
+
+        return column
+
+    def adjust_choices(self, cs, column):
+        """
+        Adjust "choices" in column spec;
+        we do this here since the model field itself is finally available.
+
+        Returns True when choices have to be collected from db table
+        for each request ("autofilter").
+        """
+        choices = []
+
+        # (1) None (default) or False: no choices (use text input box)
+        if cs['choices'] == False:
+            # Do not use choices
+            cs['choices'] = None
+        # (2) True: use Model's field choices;
+        #     - failing that, we might use "autofilter"; that is: collect the list of distinct values from db table
+        #     - BooleanFields deserve a special treatement
+        elif cs['choices'] == True:
+
+            # For boolean fields, provide (None)/Yes/No choice sequence
+            if isinstance(column.model_field, models.BooleanField):
+                if column.model_field.null:
+                    # UNTESTED !
+                    choices = [(None, ''), ]
+                else:
+                    choices = []
+                choices += [(True, _('Yes')), (False, _('No'))]
+            elif cs['boolean']:
+                choices += [(True, _('Yes')), (False, _('No'))]
+            else:
+                # Otherwise, retrieve field's choices, if any ...
+                choices = getattr(column.model_field, 'choices', None)
+                if choices is None:
+                    choices = []
+                else:
+                    #
+                    # Here, we could abbreviate select's options as well;
+                    # however, the caller can easily apply a 'width' css attribute to the select tag, instead
+                    #
+                    # max_length = cs['max_length']
+                    # if max_length <= 0:
+                    #     choices = [(c[0], c[1]) for c in choices]
+                    # else:
+                    #     choices = [(c[0], self.clip_value(c[1], max_length, False)) for c in choices]
+                    #
+                    choices = choices[:]
+
+            # ... or collect distict values (later) if 'autofilter' has been enabled
+            cs['choices'] = choices if len(choices) > 0 else None
+            return len(choices) <= 0 and bool(cs['autofilter'])
+        # (3) Otherwise, just use the sequence of choices that has been supplied.
+
+        return False
+
+    def column_spec_by_name(self, name):
+        # Last column wins, as in DatatablesView.column_index
+        found = None
+        for column_spec, column_obj, use_autofilter in self.columns:
+            if column_spec['name'] == name:
+                found = column_spec
+        return found
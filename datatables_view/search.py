@@ -0,0 +1,411 @@
+import re
+import time
+from django.db import connections
+from django.db import router
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.db.models import AutoField, BigAutoField, BooleanField, DateField, IntegerField
+
+from .columns import Column
+from .columns import resolve_field_path
+
+
+# Terms are matched as words (or word prefixes)
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Documents are written to the index in batches
+BATCH_SIZE = 500
+
+
+class RawSubquery(RawSQL):
+    """
+    A raw SELECT, to be used as the right hand side of "__in";
+    unlike RawSQL, it's not wrapped in an additional pair of parentheses,
+    which would turn it into a scalar subquery
+    """
+
+    def as_sql(self, compiler, connection):
+        return self.sql, self.params
+
+
+class SearchBackend(object):
+    """
+    Base class for global search backends;
+    filter_queryset() restricts qs to the records matching search_value in any of
+    the given columns; by default, an "icontains" filter is built for each column,
+    and all filters are combined with OR
+    """
+
+    def filter_queryset(self, view, column_names, search_value, qs):
+        return view._filter_queryset(column_names, search_value, qs, global_search=True)
+
+
+class IContainsSearchBackend(SearchBackend):
+    """
+    The default: OR of "icontains" over all searchable columns.
+    Needs no index at all, but scans the whole table (and each join) for every search
+    """
+    pass
+
+
+class FullTextSearchBackend(SearchBackend):
+    """
+    Base class for backends which keep the searchable columns of a view in a full-text index,
+    and replace the OR of "icontains" filters with a single predicate:
+
+        pk IN (SELECT ... FROM index WHERE ... MATCH ...)
+
+    Each word in the search value must match (as a prefix) a word in any of the indexed columns,
+    which are the searchable columns returned by get_column_defs() of the view class
+    (called without a request).
+
+    The index is a separate table, created and filled by the "datatables_search_index"
+    management command (see build_index()); until then, the OR of "icontains" filters is used.
+    Then, it's kept in sync by signals whenever the model (or any model traversed by
+    "foreign_field" paths) is saved or deleted, or its many-to-many relations are changed.
+    Use a distinct backend instance for each view class.
+
+    Dates and booleans are not indexed: when searchable, they are still filtered as usual,
+    and combined with the full-text predicate. Models without an integer primary key are not supported.
+    """
+
+    vendor = None
+
+    # Seconds before checking again for an index which doesn't exist yet
+    ready_check_interval = 60
+
+    def __init__(self, index_name=None):
+        self.index_name = index_name
+        self.view_class = None
+        self.model = None
+        self.paths = None
+        self.choices = None
+        self.related = None
+        # {database alias: (ready, time of the check)}
+        self._ready = {}
+
+    def register_view_class(self, view_class):
+        """
+        Called for the view class declaring "search_backend";
+        the signals are connected right away, so that the index is kept in sync
+        by any process, including those which never run a search
+        """
+        if self.view_class is not None:
+            return
+        self.view_class = view_class
+        uid = 'datatables_view_search_%d' % id(self)
+        post_save.connect(self._on_saved, weak=False, dispatch_uid=uid + '_save')
+        post_delete.connect(self._on_deleted, weak=False, dispatch_uid=uid + '_delete')
+        m2m_changed.connect(self._on_m2m_changed, weak=False, dispatch_uid=uid + '_m2m')
+
+    def filter_queryset(self, view, column_names, search_value, qs):
+        connection = connections[qs.db]
+        terms = TOKEN_RE.findall(search_value)
+        if connection.vendor != self.vendor or not terms or not self.is_model_supported(view.model):
+            return super(FullTextSearchBackend, self).filter_queryset(view, column_names, search_value, qs)
+
+        if self.view_class is None:
+            self.register_view_class(type(view))
+        if not self.is_ready(qs.db):
+            # The index has not been built yet: never create it while serving a request
+            return super(FullTextSearchBackend, self).filter_queryset(view, column_names, search_value, qs)
+
+        sql, params = self.get_match_sql(terms)
+        search_filter = Q(pk__in=RawSubquery(sql, params))
+        other_columns = [name for name in column_names if name not in self.paths]
+        if other_columns:
+            search_filter |= view.build_search_filters(other_columns, search_value, qs, global_search=True)
+        return qs.filter(search_filter)
+
+    def is_model_supported(self, model):
+        return isinstance(model._meta.pk, (AutoField, BigAutoField, IntegerField))
+
+    def bind(self):
+        """
+        Collects the searchable columns to be indexed from the column specs
+        of the view class, and the models traversed by their paths
+        """
+        if self.model is not None:
+            return
+        model = self.view_class.model
+        view = self.view_class()
+        view.initialize(None, collect_autofilter_choices=False)
+        self.paths = {}
+        self.choices = {}
+        self.related = {}
+        self.through_models = set()
+        for column_spec in view.column_specs:
+            name = column_spec['name']
+            if not name or not column_spec['searchable'] or column_spec['placeholder']:
+                continue
+            column_obj = Column.column_factory(model, {'name': name, 'foreign_field': column_spec['foreign_field']})
+            path = column_obj.get_field_search_path()
+            try:
+                hops = resolve_field_path(model, path)
+            except KeyError:
+                continue
+            field = hops[-1][0]
+            if field.is_relation or not field.concrete or isinstance(field, (DateField, BooleanField)):
+                continue
+            self.paths[name] = path
+            if column_obj.has_choices_available:
+                self.choices[path] = column_obj._choices_lookup
+            # Models reached by the path, with the lookup from model to each of them
+            for index, (hop_field, attname, to_many) in enumerate(hops[:-1]):
+                lookup = '__'.join(path.split('__')[:index + 1])
+                self.related.setdefault(hop_field.related_model._meta.concrete_model, set()).add(lookup)
+                if hop_field.many_to_many:
+                    remote_field = hop_field if hop_field.concrete else hop_field.remote_field
+                    self.through_models.add(remote_field.remote_field.through)
+        self.model = model
+
+    def get_index_name(self, model):
+        if self.index_name:
+            return self.index_name
+        return '%s_search' % model._meta.db_table
+
+    def build_index(self, using=None, rebuild=False):
+        """
+        Creates and fills the index, when missing (or refills it, when "rebuild" is set);
+        returns True when the documents have been written.
+        Used by the "datatables_search_index" management command
+        """
+        # Collect the columns afresh
+        self.model = None
+        self.bind()
+        using = using or router.db_for_write(self.model)
+        with transaction.atomic(using=using):
+            with connections[using].cursor() as cursor:
+                if self.index_exists(cursor):
+                    if not rebuild:
+                        return False
+                else:
+                    self.create_index(cursor)
+            self.rebuild(using)
+        self._ready[using] = (True, time.monotonic())
+        return True
+
+    def rebuild(self, using=None):
+        """
+        (Re)builds the whole index; call after bulk updates, which bypass signals
+        """
+        self.bind()
+        using = using or router.db_for_write(self.model)
+        with transaction.atomic(using=using):
+            with connections[using].cursor() as cursor:
+                cursor.execute(self.get_clear_sql())
+            self.update_documents(self.model._default_manager.using(using).all(), using, replace=False)
+
+    def update_documents(self, qs, using, replace=True):
+        """
+        Writes the documents of all objects in qs, replacing the existing ones
+        """
+        documents = []
+        for pk, document in self.iter_documents(qs):
+            documents.append((pk, document))
+            if len(documents) >= BATCH_SIZE:
+                self.write_documents(documents, using, replace)
+                documents = []
+        if documents:
+            self.write_documents(documents, using, replace)
+
+    def write_documents(self, documents, using, replace):
+        with connections[using].cursor() as cursor:
+            if replace:
+                cursor.execute(self.get_delete_sql(len(documents)), [pk for pk, document in documents])
+            cursor.executemany(self.get_insert_sql(), [self.get_insert_params(pk, document) for pk, document in documents])
+
+    def iter_documents(self, qs):
+        """
+        Yields a (pk, document) tuple for each object in qs;
+        the document is the text of all indexed columns
+        """
+        paths = list(sorted(set(self.paths.values())))
+        current_pk = None
+        values = []
+        for row in qs.order_by('pk').values_list('pk', *paths).iterator():
+            if row[0] != current_pk:
+                if current_pk is not None:
+                    yield current_pk, ' '.join(values)
+                current_pk = row[0]
+                values = []
+            for path, value in zip(paths, row[1:]):
+                if value is None:
+                    continue
+                if path in self.choices:
+                    value = self.choices[path].get(value, '')
+                value = str(value)
+                if value not in values:
+                    values.append(value)
+        if current_pk is not None:
+            yield current_pk, ' '.join(values)
+
+    def delete_documents(self, pks, using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(self.get_delete_sql(len(pks)), list(pks))
+
+    def is_ready(self, using):
+        """
+        Whether the index is available; when not, changes can be ignored,
+        since the index will be filled when created.
+
+        The answer is remembered, so that writes don't cost an additional query;
+        a missing index is looked for again after "ready_check_interval" seconds
+        (or as soon as build_index() is called by the same process)
+        """
+        if self.view_class is None or connections[using].vendor != self.vendor:
+            return False
+        self.bind()
+        ready, checked = self._ready.get(using, (False, None))
+        if not ready and (checked is None or time.monotonic() - checked >= self.ready_check_interval):
+            with connections[using].cursor() as cursor:
+                ready = self.index_exists(cursor)
+            self._ready[using] = (ready, time.monotonic())
+        return ready
+
+    def _on_saved(self, sender, instance, using, **kwargs):
+        self._on_changed(sender, instance, using, deleted=False)
+
+    def _on_deleted(self, sender, instance, using, **kwargs):
+        self._on_changed(sender, instance, using, deleted=True)
+
+    def _on_changed(self, sender, instance, using, deleted):
+        if self.view_class is None:
+            return
+        self.bind()
+        model = sender._meta.concrete_model
+        if model is self.model._meta.concrete_model:
+            if not self.is_ready(using):
+                return
+            self.delete_documents([instance.pk, ], using)
+            if not deleted:
+                self.update_documents(self.model._default_manager.using(using).filter(pk=instance.pk), using, replace=False)
+        elif model in self.related:
+            if not self.is_ready(using):
+                return
+            search_filter = Q()
+            for lookup in self.related[model]:
+                search_filter |= Q(**{lookup: instance.pk})
+            self.update_documents(self.model._default_manager.using(using).filter(search_filter).distinct(), using)
+
+    def _on_m2m_changed(self, sender, instance, action, pk_set, using, **kwargs):
+        if self.view_class is None or action not in ('post_add', 'post_remove', 'post_clear'):
+            return
+        self.bind()
+        if sender not in self.through_models or not self.is_ready(using):
+            return
+        if isinstance(instance, self.model):
+            self.update_documents(self.model._default_manager.using(using).filter(pk=instance.pk), using)
+        elif pk_set:
+            self.update_documents(self.model._default_manager.using(using).filter(pk__in=pk_set), using)
+        else:
+            # Reverse "clear": we don't know which objects were involved
+            self.rebuild(using)
+
+    # Backend specific SQL
+
+    def index_exists(self, cursor):
+        raise NotImplementedError
+
+    def create_index(self, cursor):
+        raise NotImplementedError
+
+    def get_clear_sql(self):
+        raise NotImplementedError
+
+    def get_delete_sql(self, num_pks):
+        raise NotImplementedError
+
+    def get_insert_sql(self):
+        raise NotImplementedError
+
+    def get_insert_params(self, pk, document):
+        return [pk, document]
+
+    def get_match_sql(self, terms):
+        """
+        Returns the SQL (and params) selecting the primary keys of the objects matching all terms
+        """
+        raise NotImplementedError
+
+
+class SqliteFTS5SearchBackend(FullTextSearchBackend):
+    """
+    Full-text search with an SQLite FTS5 virtual table;
+    the rowid of each document is the primary key of the object
+    """
+
+    vendor = 'sqlite'
+    tokenize = 'unicode61 remove_diacritics 2'
+
+    def quoted_index_name(self):
+        return connections[router.db_for_read(self.model)].ops.quote_name(self.get_index_name(self.model))
+
+    def index_exists(self, cursor):
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [self.get_index_name(self.model)])
+        return cursor.fetchone() is not None
+
+    def create_index(self, cursor):
+        cursor.execute("CREATE VIRTUAL TABLE %s USING fts5(document, tokenize='%s')" % (
+            self.quoted_index_name(), self.tokenize))
+
+    def get_clear_sql(self):
+        return 'DELETE FROM %s' % self.quoted_index_name()
+
+    def get_delete_sql(self, num_pks):
+        return 'DELETE FROM %s WHERE rowid IN (%s)' % (self.quoted_index_name(), ', '.join(['%s'] * num_pks))
+
+    def get_insert_sql(self):
+        return 'INSERT INTO %s (rowid, document) VALUES (%%s, %%s)' % self.quoted_index_name()
+
+    def get_match_sql(self, terms):
+        # Each term is quoted, and matched as a prefix
+        query = ' '.join(['"%s"*' % term.replace('"', '""') for term in terms])
+        name = self.quoted_index_name()
+        return 'SELECT rowid FROM %s WHERE %s MATCH %%s' % (name, name), [query]
+
+
+class PostgresSearchBackend(FullTextSearchBackend):
+    """
+    Full-text search with a PostgreSQL tsvector column, indexed with GIN;
+    "config" is the text search configuration used to parse both documents and queries
+    """
+
+    vendor = 'postgresql'
+
+    def __init__(self, index_name=None, config='simple'):
+        super(PostgresSearchBackend, self).__init__(index_name)
+        self.config = config
+
+    def quoted_index_name(self):
+        return connections[router.db_for_read(self.model)].ops.quote_name(self.get_index_name(self.model))
+
+    def index_exists(self, cursor):
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [self.get_index_name(self.model)])
+        return cursor.fetchone()[0]
+
+    def create_index(self, cursor):
+        name = self.get_index_name(self.model)
+        cursor.execute('CREATE TABLE %s (id bigint PRIMARY KEY, document tsvector NOT NULL)' % self.quoted_index_name())
+        cursor.execute('CREATE INDEX %s ON %s USING GIN (document)' % (
+            connections[router.db_for_read(self.model)].ops.quote_name(name + '_document'),
+            self.quoted_index_name()))
+
+    def get_clear_sql(self):
+        return 'DELETE FROM %s' % self.quoted_index_name()
+
+    def get_delete_sql(self, num_pks):
+        return 'DELETE FROM %s WHERE id IN (%s)' % (self.quoted_index_name(), ', '.join(['%s'] * num_pks))
+
+    def get_insert_sql(self):
+        return 'INSERT INTO %s (id, document) VALUES (%%s, to_tsvector(%%s::regconfig, %%s))' % self.quoted_index_name()
+
+    def get_insert_params(self, pk, document):
+        return [pk, self.config, document]
+
+    def get_match_sql(self, terms):
+        # Terms only contain word characters; each one is matched as a prefix
+        query = ' & '.join(["'%s':*" % term for term in terms])
+        return 'SELECT id FROM %s WHERE document @@ to_tsquery(%%s::regconfig, %%s)' % self.quoted_index_name(), [self.config, query]
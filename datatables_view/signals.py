@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+
+# Sent after a request has been processed by a DatatablesView with timing enabled;
+# receivers get: view, request, response and profile (a RequestProfile)
+request_profiled = Signal()
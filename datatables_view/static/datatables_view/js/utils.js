@@ -85,7 +85,12 @@ window.DatatablesViewUtils = (function() {
         var column = table.api().column(index);
         var old_value = column.search();
         console.log('Request to search value %o in column %o (current value: %o)', value, index, old_value);
-        if (value != old_value) {
+        // Wait for at least "min_chars" characters (clearing the filter is always allowed)
+        var min_chars = data.columns[index].min_chars || 0;
+        if (value.length > 0 && value.length < min_chars) {
+            console.log('skipped (less than %o characters)', min_chars);
+        }
+        else if (value != old_value) {
             console.log('searching ...');
             column.search(value).draw();
         }
@@ -94,6 +99,22 @@ window.DatatablesViewUtils = (function() {
         }
     };
 
+    // Apply the column filter when the user stops typing for "search_delay" milliseconds;
+    // "change" events (selects, or leaving the input) are applied immediately
+    function _handle_column_filter_debounced(table, data, event) {
+        var target = $(event.target);
+        var delay = data.columns[target.data('index')].search_delay || 0;
+        clearTimeout(target.data('search_timer'));
+        if (event.type == 'keyup' && delay > 0) {
+            target.data('search_timer', setTimeout(function() {
+                _handle_column_filter(table, data, target);
+            }, delay));
+        }
+        else {
+            _handle_column_filter(table, data, target);
+        }
+    };
+
     /*
     function getCookie(cname) {
         var name = cname + "=";
@@ -114,7 +135,65 @@ window.DatatablesViewUtils = (function() {
         if (parts.length == 2) return parts.pop().split(';').shift();
     }
 
-    function _setup_column_filters(table, data) {
+    function _load_lazy_choices(url, item, term, page, callback) {
+        $.ajax({
+            type: 'GET',
+            url: url,
+            data: {
+                action: 'choices',
+                column: item.name,
+                q: term,
+                page: page
+            },
+            dataType: 'json'
+        }).done(function(data, textStatus, jqXHR) {
+            callback(data);
+        }).fail(function(jqXHR, textStatus, errorThrown) {
+            console.log('ERROR: ' + jqXHR.responseText);
+        });
+    }
+
+    function _setup_lazy_choices(column_filter_row, data, url) {
+        // Columns with too many distinct values to be listed in a select box
+        // receive their choices on demand, as the user types
+        column_filter_row.find('.lazy-choices').each(function(index, element) {
+            var target = $(element);
+            var item = data.columns[target.data('index')];
+
+            if ($.fn.select2 !== undefined) {
+                // Use a select2 widget when available ...
+                target.select2({
+                    allowClear: true,
+                    placeholder: '...',
+                    width: '100%',
+                    ajax: {
+                        delay: 250,
+                        transport: function(params, success, failure) {
+                            _load_lazy_choices(url, item, params.data.term || '', params.data.page || 1, success);
+                        }
+                    }
+                });
+            }
+            else {
+                // ... otherwise, fallback to a plain input box with autocompletion
+                var datalist = target.next('datalist');
+                var timer = null;
+                target.on('input', function(event) {
+                    clearTimeout(timer);
+                    timer = setTimeout(function() {
+                        _load_lazy_choices(url, item, target.val(), 1, function(data) {
+                            datalist.empty();
+                            $.each(data.results, function(index, choice) {
+                                datalist.append($('<option>').attr('value', choice.id).text(choice.text));
+                            });
+                        });
+                    }, 250);
+                });
+            }
+        });
+    }
+
+    function _setup_column_filters(table, data, url) {
 
         if (data.show_column_filters) {
 
@@ -123,7 +202,28 @@ window.DatatablesViewUtils = (function() {
                 if (item.visible) {
                     if (item.searchable) {
                         var html = '';
-                        if ('choices' in item && item.choices) {
+                        if (item.autofilter_lazy) {
+                            if ($.fn.select2 !== undefined) {
+                                var select = $('<select class="lazy-choices" data-index="' + index.toString() + '"><option value=""></option></select>');
+                                if (item.initialSearchValue) {
+                                    select.append($("<option>").attr('value', item.initialSearchValue).attr('selected', 'selected').text(item.initialSearchValue));
+                                }
+                                html = $('<div>').append(select).html();
+                            }
+                            else {
+                                var datalist_id = 'datalist-' + table.attr('id') + '-' + index.toString();
+                                var input = $('<input>')
+                                    .attr('type', 'text')
+                                    .attr('class', 'lazy-choices')
+                                    .attr('data-index', index)
+                                    .attr('list', datalist_id)
+                                    .attr('autocomplete', 'off')
+                                    .attr('placeholder', '...')
+                                    .attr('value', item.initialSearchValue ? item.initialSearchValue : '')
+                                html = $('<div>').append(input).append($('<datalist>').attr('id', datalist_id)).html();
+                            }
+                        }
+                        else if ('choices' in item && item.choices) {
 
                             // See: https://www.datatables.net/examples/api/multi_filter_select.html
                             var select = $('<select data-index="' + index.toString() + '"><option value=""></option></select>');
@@ -173,9 +273,9 @@ window.DatatablesViewUtils = (function() {
 
             var column_filter_row = wrapper.find('.datatable-column-filter-row')
             column_filter_row.find('input,select').off().on('keyup change', function(event) {
-                var target = $(event.target);
-                _handle_column_filter(table, data, target);
+                _handle_column_filter_debounced(table, data, event);
             });
+            _setup_lazy_choices(column_filter_row, data, url);
 
             /*
             // Here, we could explicitly invoke the handler for each column filter,
@@ -312,7 +412,7 @@ window.DatatablesViewUtils = (function() {
     function after_table_initialization(table, data, url, full_row_select) {
         console.log('*** after_table_initialization()');
         _bind_row_tools(table, url, full_row_select);
-        _setup_column_filters(table, data);
+        _setup_column_filters(table, data, url);
     }
 
 
@@ -326,6 +426,47 @@ window.DatatablesViewUtils = (function() {
         footer.html(html);
     }
 
+    function _query_signature(data) {
+        // Anything which affects the result set, apart from paging
+        return JSON.stringify({
+            order: data.order,
+            search: data.search,
+            columns: $.map(data.columns, function(column) { return column.search; }),
+            date_from: data.date_from,
+            date_to: data.date_to,
+            length: data.length
+        });
+    }
+
+    function _add_keyset_cursor(table, data) {
+        // When moving to the next or previous page, ask the server to "seek"
+        // from the last (or first) row of the current page (see "keyset_pagination")
+        var signature = _query_signature(data);
+        var keyset = table.data('keyset');
+        if (keyset && keyset.signature == signature) {
+            if (data.start == keyset.start + data.length && keyset.last) {
+                data.cursor = keyset.last;
+                data.cursor_direction = 'next';
+            }
+            else if (data.start == keyset.start - data.length && keyset.first) {
+                data.cursor = keyset.first;
+                data.cursor_direction = 'previous';
+            }
+        }
+        return signature;
+    }
+
+    function _save_keyset_cursors(table, signature, data) {
+        if (data.cursors !== undefined) {
+            table.data('keyset', {
+                signature: signature,
+                start: data.cursors.start,
+                first: data.cursors.first,
+                last: data.cursors.last
+            });
+        }
+    }
+
     function initialize_table(element, url, extra_options={}, extra_data={}) {
 
         $.ajax({
@@ -381,17 +522,52 @@ window.DatatablesViewUtils = (function() {
                       if (extra_data) {
                           Object.assign(data, extra_data);
                       }
+                      var signature = _add_keyset_cursor(table, data);
+                      var draw = data.draw;
+                      // Identifies this table instance, so that the server can drop
+                      // superseded draws (see "drop_stale_draws")
+                      if (!table.data('table_token')) {
+                          table.data('table_token', Math.random().toString(36).substring(2) + Date.now().toString(36));
+                      }
+                      data.table_token = table.data('table_token');
+                      // Abort the previous request, if still in flight: its response would be discarded anyway
+                      var pending = table.data('xhr');
+                      if (pending) {
+                          pending.abort();
+                      }
+                      var headers = {'X-CSRFToken': getCookie('csrftoken')};
+                      // Send the ETag of the last response (see "use_etags");
+                      // since POST responses are never cached by the browser, we do it by ourselves,
+                      // with a custom header ("If-None-Match" would get "412 Precondition Failed")
+                      var etag = table.data('last_etag');
+                      if (etag && table.data('last_json')) {
+                          headers['X-Datatables-If-None-Match'] = etag;
+                      }
                       console.log("data tx: %o", data);
-                      $.ajax({
+                      var xhr = $.ajax({
                           type: 'POST',
                           url: url,
                           data: data,
                           dataType: 'json',
                           cache: false,
                           crossDomain: false,
-                          headers: {'X-CSRFToken': getCookie('csrftoken')}
+                          headers: headers
                       }).done(function(data, textStatus, jqXHR) {
+                          if (data && data.staleDraw) {
+                              // A newer draw has been requested in the meantime
+                              console.log('stale draw %o dropped', draw);
+                              return;
+                          }
+                          if (data && data.notModified) {
+                              // Nothing changed: reuse the last payload
+                              data = Object.assign({}, table.data('last_json'), {draw: draw});
+                          }
+                          else {
+                              table.data('last_etag', jqXHR.getResponseHeader('ETag'));
+                          }
                           console.log('data rx: %o', data);
+                          _save_keyset_cursors(table, signature, data);
+                          table.data('last_json', data);
                           callback(data);
 
                           var footer_message = data.footer_message;
@@ -400,8 +576,28 @@ window.DatatablesViewUtils = (function() {
                           }
 
                       }).fail(function(jqXHR, textStatus, errorThrown) {
-                          console.log('ERROR: ' + jqXHR.responseText);
+                          if (textStatus != 'abort') {
+                              console.log('ERROR: ' + jqXHR.responseText);
+                          }
+                      }).always(function() {
+                          if (table.data('xhr') === xhr) {
+                              table.removeData('xhr');
+                          }
                       });
+                      table.data('xhr', xhr);
+                },
+                infoCallback: function(settings, start, end, max, total, pre) {
+                    // When records have not been counted exactly (see "exact_count" and "count_cap"),
+                    // display the total as "10,000+"
+                    var json = table.data('last_json');
+                    if (json && (json.recordsFilteredCapped || json.recordsFilteredUnknown) && total > 0) {
+                        var shown = json.recordsFilteredCapped ? total : end;
+                        return settings.oLanguage.sInfo
+                            .replace('_START_', settings.fnFormatNumber(start))
+                            .replace('_END_', settings.fnFormatNumber(end))
+                            .replace('_TOTAL_', settings.fnFormatNumber(shown) + '+');
+                    }
+                    return pre;
                 },
                 columns: data.columns,
                 searchCols: data.searchCols,
@@ -448,6 +644,7 @@ window.DatatablesViewUtils = (function() {
             }
 
             var table = element.dataTable(options);
+            table.data('url', url);
 
             _daterange_widget_initialize(table, data);
             after_table_initialization(table, data, url, options.full_row_select);
@@ -471,13 +668,32 @@ window.DatatablesViewUtils = (function() {
     }
 
 
+    // Download the rows selected by the current filters;
+    // format: 'csv', 'tsv' or 'ndjson'
+    function export_table(element, format='csv', gzip=false) {
+        var table = $(element).closest('table.dataTable');
+        var params = Object.assign({}, table.DataTable().ajax.params());
+        delete params.draw;
+        delete params.cursor;
+        delete params.cursor_direction;
+        delete params.table_token;
+        params.action = 'export';
+        params.format = format;
+        if (gzip) {
+            params.gzip = 1;
+        }
+        window.location.href = table.data('url') + '?' + $.param(params);
+    }
+
+
     return {
         init: init,
         initialize_table: initialize_table,
         after_table_initialization: after_table_initialization,
         adjust_table_columns: adjust_table_columns,
         redraw_all_tables: redraw_all_tables,
-        redraw_table: redraw_table
+        redraw_table: redraw_table,
+        export_table: export_table
     };
 
 })();
@@ -0,0 +1,93 @@
+from django.test import RequestFactory
+
+from .instrumentation import RequestProfile
+
+
+def build_datatables_request(view_class, start=0, length=10, search_value='', order=None, method='post', column_defs=None, **extra):
+    """
+    Builds an ajax request for view_class, as sent by DataTables.net,
+    listing all columns in "column_defs" (by default, those of view_class)
+    as searchable and orderable
+    """
+    data = {
+        'draw': 1,
+        'start': start,
+        'length': length,
+        'search[value]': search_value,
+    }
+    if column_defs is None:
+        column_defs = view_class.column_defs
+    for index, column_def in enumerate(column_defs):
+        name = column_def.get('name', '')
+        data.update({
+            'columns[%d][name]' % index: name,
+            'columns[%d][data]' % index: name,
+            'columns[%d][searchable]' % index: 'true',
+            'columns[%d][orderable]' % index: 'true',
+            'columns[%d][search][value]' % index: '',
+        })
+    for index, (column_index, direction) in enumerate(order or []):
+        data.update({
+            'order[%d][column]' % index: column_index,
+            'order[%d][dir]' % index: direction,
+        })
+    data.update(extra)
+    return getattr(RequestFactory(), method)('/', data, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+
+def profile_datatables_request(view_class, column_defs=None, n_plus_one_threshold=5, **kwargs):
+    """
+    Processes a data request for view_class (optionally replacing "column_defs"),
+    and returns the response and the RequestProfile with the queries executed
+    """
+    profiles = []
+
+    def get_profile(request):
+        profile = RequestProfile('Profiled' + view_class.__name__, n_plus_one_threshold=n_plus_one_threshold)
+        profiles.append(profile)
+        return profile
+
+    # Attributes are replaced per instance, so that no subclass is needed
+    initkwargs = {
+        'get_profile': get_profile,
+        'n_plus_one_threshold': n_plus_one_threshold,
+        'use_etags': False,
+        'response_cache_timeout': 0,
+    }
+    if column_defs is not None:
+        initkwargs['column_defs'] = column_defs
+
+    request = build_datatables_request(view_class, column_defs=column_defs, **kwargs)
+    response = view_class.as_view(**initkwargs)(request)
+    return response, profiles[0]
+
+
+class DatatablesQueriesMixin(object):
+    """
+    A mixin for unittest.TestCase, providing assertions about the number of queries
+    executed by a DatatablesView; for example:
+
+        class MyTestCase(DatatablesQueriesMixin, TestCase):
+
+            def test_queries(self):
+                self.assertDatatablesQueries(3, OrderDatatablesView, length=100)
+    """
+
+    def assertDatatablesQueries(self, num, view_class, column_defs=None, **kwargs):
+        response, profile = profile_datatables_request(view_class, column_defs, **kwargs)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(
+            num, profile.num_queries,
+            '%d queries executed, %d expected; by phase: %s' % (
+                profile.num_queries, num, dict(profile.count_by_phase())))
+        self.assertNoNPlusOneQueries(profile)
+        return response
+
+    def assertNoNPlusOneQueries(self, profile):
+        n_plus_one = profile.find_n_plus_one()
+        self.assertEqual(
+            [], n_plus_one,
+            'Possible N+1 queries: ' + '; '.join([
+                '"%s" repeated %d times in phase "%s"' % (shape, count, phase)
+                for phase, shape, count in n_plus_one
+            ]))
@@ -0,0 +1,177 @@
+import asyncio
+import json
+import unittest
+from unittest import TestCase
+import django
+import factory
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from datatables_view.async_views import AsyncDatatablesView
+from datatables_view.testing import build_datatables_request
+
+
+User = get_user_model()
+
+
+class UserDatatablesView(AsyncDatatablesView):
+    model = User
+    column_defs = [
+        {
+            'name': 'id',
+            'visible': False,
+        }, {
+            'name': 'username',
+        }, {
+            'name': 'last_name',
+        }
+    ]
+
+
+class CustomizedUserDatatablesView(UserDatatablesView):
+
+    async def aget_initial_queryset(self, request=None):
+        return self.model.objects.filter(is_staff=False)
+
+    async def acustomize_row(self, row, obj):
+        row['username'] = obj.username.upper()
+
+    def footer_message(self, qs, params):
+        return 'Non staff users: %d' % qs.count()
+
+
+class ScopedUserDatatablesView(UserDatatablesView):
+    """
+    Rows are scoped in aget_initial_queryset() only, by a request header
+    """
+    response_cache_timeout = 60
+    use_etags = True
+    streaming_threshold = 5
+    column_defs = [
+        {
+            'name': 'id',
+            'visible': False,
+        }, {
+            'name': 'username',
+        }, {
+            'name': 'first_name',
+            'choices': True,
+            'autofilter': True,
+            'autofilter_max_choices': 1,
+        }, {
+            'name': 'last_name',
+            'choices': True,
+            'autofilter': True,
+        }
+    ]
+
+    async def aget_initial_queryset(self, request=None):
+        return self.model.objects.filter(is_staff=request.META.get('HTTP_X_SCOPE') == 'staff')
+
+
+class UserFactory(factory.django.DjangoModelFactory):
+
+    class Meta:
+        model = User
+
+    username = factory.Sequence(lambda n: 'user_{}'.format(n))
+    password = 'password'
+
+
+@unittest.skipIf(django.VERSION < (4, 1), 'The async ORM requires Django 4.1')
+class AsyncDatatablesViewTestCase(TestCase):
+
+    def setUp(self):
+        self.users = UserFactory.create_batch(15)
+        self.users[0].is_staff = True
+        self.users[0].save()
+
+    def tearDown(self):
+        User.objects.all().delete()
+
+    def request(self, view_class, **kwargs):
+        request = build_datatables_request(view_class, **kwargs)
+        response = asyncio.run(view_class.as_view()(request))
+        return json.loads(self.read_content(response).decode('utf-8'))
+
+    def read_content(self, response):
+        if not response.streaming:
+            return response.content
+
+        async def read():
+            return b''.join([chunk async for chunk in response.streaming_content])
+
+        # Large pages are streamed from an async iterator
+        self.assertTrue(response.is_async)
+        return asyncio.run(read())
+
+    def test_page(self):
+        data = self.request(UserDatatablesView, start=10, length=10, order=[[1, 'asc']])
+        self.assertEqual(15, data['recordsTotal'])
+        self.assertEqual(15, data['recordsFiltered'])
+        self.assertEqual(5, len(data['data']))
+
+        data = self.request(UserDatatablesView, search_value=self.users[3].username)
+        self.assertEqual(1, data['recordsFiltered'])
+        self.assertEqual('row-%d' % self.users[3].id, data['data'][0]['DT_RowId'])
+
+        # Out of range: the last page is returned
+        data = self.request(UserDatatablesView, start=100, length=10)
+        self.assertEqual(5, len(data['data']))
+
+    def test_hooks(self):
+        data = self.request(CustomizedUserDatatablesView, length=100)
+        self.assertEqual(14, data['recordsTotal'])
+        self.assertEqual(self.users[1].username.upper(), data['data'][0]['username'])
+        self.assertEqual('Non staff users: 14', data['footer_message'])
+
+    def test_streaming(self):
+        data = self.request(ScopedUserDatatablesView, length=-1)
+        self.assertEqual(14, data['recordsTotal'])
+        self.assertEqual(14, len(data['data']))
+
+    def test_scope(self):
+        User.objects.filter(is_staff=True).update(first_name='secret', last_name='secret')
+        User.objects.filter(is_staff=False).update(first_name='visible', last_name='visible')
+
+        # Export
+        request = build_datatables_request(ScopedUserDatatablesView, method='get', action='export', format='csv')
+        response = asyncio.run(ScopedUserDatatablesView.as_view()(request))
+        content = self.read_content(response).decode('utf-8')
+        self.assertIn('visible', content)
+        self.assertNotIn('secret', content)
+
+        # Autofilter choices, collected by "initialize" ...
+        request = build_datatables_request(ScopedUserDatatablesView, action='initialize')
+        response = asyncio.run(ScopedUserDatatablesView.as_view()(request))
+        column_specs = {cs['name']: cs for cs in json.loads(response.content.decode('utf-8'))['columns']}
+        self.assertEqual([['visible', 'visible']], column_specs['last_name']['choices'])
+
+        # ... and served one page at a time
+        request = build_datatables_request(ScopedUserDatatablesView, method='get', action='choices', column='first_name')
+        response = asyncio.run(ScopedUserDatatablesView.as_view()(request))
+        self.assertEqual(['visible'], [item['id'] for item in json.loads(response.content.decode('utf-8'))['results']])
+
+        # Cached responses and ETags are kept apart for each scope
+        responses = []
+        for scope in ('', 'staff'):
+            request = build_datatables_request(ScopedUserDatatablesView)
+            request.META['HTTP_X_SCOPE'] = scope
+            response = asyncio.run(ScopedUserDatatablesView.as_view()(request))
+            responses.append((response['ETag'], json.loads(self.read_content(response).decode('utf-8'))))
+        self.assertNotEqual(responses[0][0], responses[1][0])
+        self.assertEqual(14, responses[0][1]['recordsTotal'])
+        self.assertEqual(1, responses[1][1]['recordsTotal'])
+        self.assertEqual('secret', responses[1][1]['data'][0]['last_name'])
+
+    def test_details(self):
+        request = build_datatables_request(UserDatatablesView, method='get', action='details', id=self.users[2].id)
+        response = asyncio.run(UserDatatablesView.as_view()(request))
+        self.assertIn(self.users[2].username, json.loads(response.content.decode('utf-8'))['html'])
+
+
+@unittest.skipIf(django.VERSION >= (4, 1), 'The async ORM is available')
+class UnsupportedAsyncDatatablesViewTestCase(TestCase):
+
+    def test_as_view(self):
+        with self.assertRaises(ImproperlyConfigured):
+            UserDatatablesView.as_view()
@@ -1,3 +1,4 @@
+import json
 #from django.test import TestCase
 from django.db import models
 from unittest import TestCase
@@ -5,6 +6,7 @@ import factory
 import factory.random
 from django.contrib.auth import get_user_model
 from django.core.paginator import Paginator
+from django.test import RequestFactory
 from datatables_view import *
 
 
@@ -71,6 +73,42 @@ class UserDatatablesWithEmptyColumnNameView(DatatablesView):
     ]
 
 
+class UserDatatablesCachedView(DatatablesView):
+    model = User
+    column_defs = [
+        {
+            'name': 'id',
+            'visible': False,
+        }, {
+            'name': 'first_name',
+            'choices': True,
+            'autofilter': True,
+            'autofilter_cache_timeout': 60,
+        }
+    ]
+
+
+class ActiveUserDatatablesCachedView(UserDatatablesCachedView):
+
+    def get_initial_queryset(self, request=None):
+        return self.model.objects.filter(is_active=True)
+
+
+class UserDatatablesLazyView(DatatablesView):
+    model = User
+    column_defs = [
+        {
+            'name': 'id',
+            'visible': False,
+        }, {
+            'name': 'first_name',
+            'choices': True,
+            'autofilter': True,
+            'autofilter_max_choices': 10,
+        }
+    ]
+
+
 class UserFactory(factory.django.DjangoModelFactory):
 
     class Meta:
@@ -126,3 +164,67 @@ class AutoFilterTestCase(TestCase):
         request = None
         view = UserDatatablesWithEmptyColumnNameView()
         view.initialize(request)
+
+    def test_autofilter_skipped(self):
+
+        request = None
+        view = UserDatatablesView()
+        view.initialize(request, collect_autofilter_choices=False)
+        self.assertIsNone(view.column_spec_by_name('first_name')['choices'])
+
+    def test_autofilter_cache(self):
+
+        request = None
+        view = UserDatatablesCachedView()
+        view.initialize(request)
+        choices = view.column_spec_by_name('first_name')['choices']
+        self.assertEqual(
+            User.objects.values('first_name').distinct().count(),
+            len(choices)
+        )
+
+        # Cached choices expire as soon as the model is changed
+        UserFactory(first_name='Zzzzz', is_active=False)
+        view = UserDatatablesCachedView()
+        view.initialize(request)
+        self.assertEqual(('Zzzzz', 'Zzzzz'), view.column_spec_by_name('first_name')['choices'][-1])
+
+        # ... and are kept apart for each queryset scope
+        view = ActiveUserDatatablesCachedView()
+        view.initialize(request)
+        self.assertNotIn(('Zzzzz', 'Zzzzz'), view.column_spec_by_name('first_name')['choices'])
+
+    def test_autofilter_lazy(self):
+
+        request = None
+        view = UserDatatablesLazyView()
+        view.initialize(request)
+        column_spec = view.column_spec_by_name('first_name')
+        self.assertIsNone(column_spec['choices'])
+        self.assertTrue(column_spec['autofilter_lazy'])
+
+        # Choices are then served one page at a time
+        request = RequestFactory().get('/', {
+            'action': 'choices',
+            'column': 'first_name',
+            'q': 'a',
+            'limit': 3,
+        }, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        response = UserDatatablesLazyView.as_view()(request)
+        data = json.loads(response.content.decode('utf-8'))
+
+        names = list(User.objects
+            .filter(first_name__istartswith='a')
+            .values_list('first_name', flat=True)
+            .distinct()
+            .order_by('first_name')
+        )
+        self.assertEqual(names[:3], [item['id'] for item in data['results']])
+        self.assertEqual(len(names) > 3, data['pagination']['more'])
+
+        request = RequestFactory().get('/', {
+            'action': 'choices',
+            'column': 'id',
+        }, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        response = UserDatatablesLazyView.as_view()(request)
+        self.assertEqual(400, response.status_code)
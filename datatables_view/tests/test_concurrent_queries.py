@@ -0,0 +1,83 @@
+import json
+import threading
+from unittest import TestCase
+import factory
+from django.contrib.auth import get_user_model
+from django.db import connection
+from datatables_view import *
+from datatables_view.concurrency import supports_concurrent_queries
+from datatables_view.pagination import page_bounds
+from datatables_view.testing import build_datatables_request
+
+
+User = get_user_model()
+
+
+class UserDatatablesView(DatatablesView):
+    model = User
+    concurrent_queries = True
+    column_defs = [
+        {
+            'name': 'id',
+            'visible': False,
+        }, {
+            'name': 'username',
+        }, {
+            'name': 'last_name',
+        }
+    ]
+
+    def count_records(self, request, initial_qs, qs):
+        self.count_thread = threading.current_thread()
+        return super(UserDatatablesView, self).count_records(request, initial_qs, qs)
+
+
+class UserFactory(factory.django.DjangoModelFactory):
+
+    class Meta:
+        model = User
+
+    username = factory.Sequence(lambda n: 'user_{}'.format(n))
+    password = 'password'
+
+
+class ConcurrentQueriesTestCase(TestCase):
+
+    def setUp(self):
+        self.users = UserFactory.create_batch(15)
+
+    def tearDown(self):
+        User.objects.all().delete()
+
+    def request(self, **kwargs):
+        views = []
+
+        class TracedUserDatatablesView(UserDatatablesView):
+            def setup(self, request, *args, **kwargs):
+                views.append(self)
+                super(TracedUserDatatablesView, self).setup(request, *args, **kwargs)
+
+        request = build_datatables_request(TracedUserDatatablesView, **kwargs)
+        response = TracedUserDatatablesView.as_view()(request)
+        return json.loads(response.content.decode('utf-8')), views[0]
+
+    def test_page_bounds(self):
+        self.assertEqual((10, 20), page_bounds(10, 10, 15))
+        self.assertEqual((10, 20), page_bounds(15, 10, 15))
+        # Out of range: last page
+        self.assertEqual((10, 20), page_bounds(100, 10, 15))
+        self.assertEqual((0, 10), page_bounds(0, 10, 0))
+
+    def test_response(self):
+        data, view = self.request(start=10, length=10, order=[[1, 'asc']])
+        self.assertEqual(15, data['recordsTotal'])
+        self.assertEqual(15, data['recordsFiltered'])
+        self.assertEqual(5, len(data['data']))
+
+        data, view = self.request(start=100, length=10, search_value=self.users[3].username)
+        self.assertEqual(1, data['recordsFiltered'])
+        self.assertEqual('row-%d' % self.users[3].id, data['data'][0]['DT_RowId'])
+
+        # Records are counted by a worker thread, unless the database is in memory
+        concurrent = supports_concurrent_queries(connection.alias)
+        self.assertEqual(concurrent, view.count_thread is not threading.current_thread())
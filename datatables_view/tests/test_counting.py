@@ -0,0 +1,140 @@
+import json
+from unittest import TestCase
+import factory
+import factory.random
+from django.contrib.auth import get_user_model
+from django.db import connection
+from datatables_view import *
+from datatables_view.counting import CountEstimator
+from datatables_view.counting import SqliteStatEstimator
+from datatables_view.testing import build_datatables_request
+
+
+User = get_user_model()
+
+
+class FixedCountEstimator(CountEstimator):
+
+    def estimate(self, qs):
+        return 1000000
+
+
+class UserDatatablesView(DatatablesView):
+    model = User
+    count_cache_timeout = 60
+    column_defs = [
+        {
+            'name': 'id',
+            'visible': False,
+        }, {
+            'name': 'username',
+        }
+    ]
+
+
+class UserDatatablesEstimatedView(UserDatatablesView):
+    count_estimator = FixedCountEstimator()
+    estimate_count_threshold = 50
+
+
+class UserDatatablesCappedView(UserDatatablesView):
+    exact_count = False
+    count_cap = 20
+
+
+class UserDatatablesLookaheadView(UserDatatablesView):
+    exact_count = False
+
+
+class UserFactory(factory.django.DjangoModelFactory):
+
+    class Meta:
+        model = User
+
+    username = factory.Sequence(lambda n: 'username_{}'.format(n))
+    password = 'password'
+
+
+class CountingTestCase(TestCase):
+
+    def setUp(self):
+        factory.random.reseed_random('test_counting')
+        UserFactory.create_batch(30)
+
+    def tearDown(self):
+        User.objects.all().delete()
+
+    def get_response_dict(self, view_class, search_value='', start=0, length=10):
+        request = build_datatables_request(view_class, start=start, length=length, search_value=search_value)
+        response = view_class.as_view()(request)
+        return json.loads(response.content.decode('utf-8'))
+
+    def test_total_and_filtered_counts(self):
+
+        response_dict = self.get_response_dict(UserDatatablesView)
+        self.assertEqual(30, response_dict['recordsTotal'])
+        self.assertEqual(30, response_dict['recordsFiltered'])
+
+        response_dict = self.get_response_dict(UserDatatablesView, 'username_1')
+        self.assertEqual(30, response_dict['recordsTotal'])
+        self.assertEqual(
+            User.objects.filter(username__icontains='username_1').count(),
+            response_dict['recordsFiltered']
+        )
+
+        # The cached total expires as soon as the model is changed
+        UserFactory()
+        response_dict = self.get_response_dict(UserDatatablesView, 'username_1')
+        self.assertEqual(31, response_dict['recordsTotal'])
+
+    def test_estimated_counts(self):
+
+        response_dict = self.get_response_dict(UserDatatablesEstimatedView, 'username_1')
+        self.assertEqual(1000000, response_dict['recordsTotal'])
+        self.assertEqual(1000000, response_dict['recordsFiltered'])
+        self.assertTrue(response_dict['recordsEstimated'])
+
+    def test_sqlite_stat_estimator(self):
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        estimator = SqliteStatEstimator()
+        self.assertEqual(30, estimator.estimate(User.objects.all()))
+        self.assertIsNone(estimator.estimate(User.objects.filter(username='username_1')))
+
+    def test_capped_count(self):
+
+        response_dict = self.get_response_dict(UserDatatablesCappedView)
+        self.assertEqual(20, response_dict['recordsFiltered'])
+        self.assertTrue(response_dict['recordsFilteredCapped'])
+        self.assertEqual(10, len(response_dict['data']))
+        self.assertNotIn('dataTruncated', response_dict)
+
+        # "All" returns "count_cap" rows at most, and says so
+        response_dict = self.get_response_dict(UserDatatablesCappedView, length=-1)
+        self.assertEqual(20, len(response_dict['data']))
+        self.assertTrue(response_dict['dataTruncated'])
+
+        response_dict = self.get_response_dict(UserDatatablesCappedView, 'username_1')
+        self.assertEqual(
+            User.objects.filter(username__icontains='username_1').count(),
+            response_dict['recordsFiltered']
+        )
+        self.assertNotIn('recordsFilteredCapped', response_dict)
+        response_dict = self.get_response_dict(UserDatatablesCappedView, 'username_1', length=-1)
+        self.assertNotIn('dataTruncated', response_dict)
+
+    def test_lookahead(self):
+
+        response_dict = self.get_response_dict(UserDatatablesLookaheadView, start=10)
+        self.assertEqual(21, response_dict['recordsFiltered'])
+        self.assertTrue(response_dict['recordsFilteredUnknown'])
+        self.assertEqual(10, len(response_dict['data']))
+
+        response_dict = self.get_response_dict(UserDatatablesLookaheadView, start=20)
+        self.assertEqual(30, response_dict['recordsFiltered'])
+        self.assertNotIn('recordsFilteredUnknown', response_dict)
+
+        response_dict = self.get_response_dict(UserDatatablesLookaheadView, length=-1)
+        self.assertEqual(30, response_dict['recordsFiltered'])
+        self.assertEqual(30, len(response_dict['data']))
@@ -1,7 +1,11 @@
 #from django.test import TestCase
+import datetime
+from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils import timezone
 import unittest
 from datatables_view import *
+from datatables_view.utils import parse_date
 
 
 class TestModelWithoutLatestBy(models.Model):
@@ -70,3 +74,61 @@ class DateFiltersTestCase(unittest.TestCase):
         view = DatatablesForceFilterView()
         view.initialize(request)
         self.assertTrue(view.show_date_filters)
+
+
+User = get_user_model()
+
+
+class UserDatatablesView(DatatablesView):
+    model = User
+    latest_by = 'date_joined'
+    column_defs = [
+        {
+            'name': 'id',
+            'visible': False,
+        }, {
+            'name': 'username',
+        }, {
+            'name': 'date_joined',
+        }
+    ]
+
+
+class DateRangeTestCase(unittest.TestCase):
+
+    def setUp(self):
+        # In Europe/Rome: 2020-03-01 00:30, 2020-03-01 23:30 and 2020-03-02 00:30
+        utc = datetime.timezone.utc
+        self.early = User.objects.create(username='early', date_joined=datetime.datetime(2020, 2, 29, 23, 30, tzinfo=utc))
+        self.late = User.objects.create(username='late', date_joined=datetime.datetime(2020, 3, 1, 22, 30, tzinfo=utc))
+        self.next = User.objects.create(username='next', date_joined=datetime.datetime(2020, 3, 1, 23, 30, tzinfo=utc))
+
+    def tearDown(self):
+        User.objects.all().delete()
+
+    def filter_users(self, date_from=None, date_to=None, search_value=''):
+        view = UserDatatablesView()
+        view.initialize(None)
+        qs = view.filter_queryset_by_date_range(date_from, date_to, User.objects.all())
+        if search_value:
+            qs = view.filter_queryset_by_column('date_joined', search_value, qs)
+        self.assertNotIn('django_datetime_cast_date', str(qs.query))
+        return sorted(qs.values_list('username', flat=True))
+
+    def test_date_range(self):
+        with timezone.override('Europe/Rome'):
+            self.assertEqual(['early', 'late'], self.filter_users('2020-03-01', '2020-03-01'))
+            self.assertEqual(['early', 'late'], self.filter_users(search_value='2020-03-01'))
+            self.assertEqual(['next'], self.filter_users('2020-03-02'))
+            self.assertEqual(['early', 'late'], self.filter_users(date_to='2020-03-01'))
+        with timezone.override('UTC'):
+            self.assertEqual(['late', 'next'], self.filter_users('2020-03-01', '2020-03-01'))
+            self.assertEqual(['late', 'next'], self.filter_users(search_value='03/01/2020'))
+
+    def test_parse_date(self):
+        self.assertEqual(datetime.date(2020, 3, 1), parse_date('2020-03-01'))
+        self.assertEqual(datetime.date(2020, 3, 1), parse_date('3/1/20'))
+        self.assertEqual(datetime.date(2006, 10, 25), parse_date('Oct 25 2006'))
+        for value in ('acme', '2020-02-30', ''):
+            with self.assertRaises(ValueError):
+                parse_date(value)
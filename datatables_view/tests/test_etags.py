@@ -0,0 +1,121 @@
+import json
+from unittest import TestCase
+import factory
+import factory.random
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from datatables_view import *
+from datatables_view.testing import build_datatables_request
+
+
+User = get_user_model()
+
+
+class UserDatatablesView(DatatablesView):
+    model = User
+    use_etags = True
+    column_defs = [
+        {
+            'name': 'id',
+            'visible': False,
+        }, {
+            'name': 'username',
+        }, {
+            'name': 'last_name',
+            'choices': True,
+            'autofilter': True,
+        }
+    ]
+
+
+class UserFactory(factory.django.DjangoModelFactory):
+
+    class Meta:
+        model = User
+
+    username = factory.Sequence(lambda n: 'username_{}'.format(n))
+    password = 'password'
+    last_name = factory.Faker('last_name')
+
+
+def conditional_request(draw, etag=None, method='post', header='HTTP_X_DATATABLES_IF_NONE_MATCH'):
+    request = build_datatables_request(UserDatatablesView, method=method, order=[[1, 'asc']], draw=draw)
+    if etag:
+        request.META[header] = etag
+    return request
+
+
+def initialize_request(etag=None):
+    headers = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+    if etag:
+        headers['HTTP_IF_NONE_MATCH'] = etag
+    return RequestFactory().get('/', {'action': 'initialize'}, **headers)
+
+
+class ETagTestCase(TestCase):
+
+    def setUp(self):
+        factory.random.reseed_random('test_etags')
+        UserFactory.create_batch(20)
+
+    def tearDown(self):
+        User.objects.all().delete()
+
+    def test_data_etag(self):
+
+        view = UserDatatablesView.as_view()
+        response = view(conditional_request(1))
+        self.assertEqual(200, response.status_code)
+        etag = response['ETag']
+
+        # Same query, different draw: not modified, and no queries at all
+        with CaptureQueriesContext(connection) as context:
+            response = view(conditional_request(2, etag))
+        self.assertEqual(200, response.status_code)
+        self.assertEqual({'draw': 2, 'notModified': True}, json.loads(response.content.decode('utf-8')))
+        self.assertEqual(etag, response['ETag'])
+        self.assertEqual(0, len(context.captured_queries))
+
+        # Standard conditional requests: "304" for GET only, "412" for POST (RFC 9110)
+        response = view(conditional_request(2, etag, method='get', header='HTTP_IF_NONE_MATCH'))
+        self.assertEqual(304, response.status_code)
+        response = view(conditional_request(2, etag, header='HTTP_IF_NONE_MATCH'))
+        self.assertEqual(412, response.status_code)
+
+        # Same data, different column specs
+        column_defs = [dict(column_def, max_length=5) for column_def in UserDatatablesView.column_defs]
+        response = UserDatatablesView.as_view(column_defs=column_defs)(conditional_request(2, etag))
+        self.assertEqual(200, response.status_code)
+        self.assertIn('data', json.loads(response.content.decode('utf-8')))
+        self.assertNotEqual(etag, response['ETag'])
+
+        # Data changed
+        user = User.objects.all().first()
+        user.last_name = 'Changed'
+        user.save()
+        response = view(conditional_request(3, etag))
+        self.assertEqual(200, response.status_code)
+        self.assertNotEqual(etag, response['ETag'])
+        self.assertEqual(3, json.loads(response.content.decode('utf-8'))['draw'])
+
+    def test_initialize_etag(self):
+
+        view = UserDatatablesView.as_view()
+        response = view(initialize_request())
+        self.assertEqual(200, response.status_code)
+        etag = response['ETag']
+
+        # Autofilter choices are not collected again
+        with CaptureQueriesContext(connection) as context:
+            response = view(initialize_request(etag))
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(0, len(context.captured_queries))
+
+        # A new value for the autofilter column
+        UserFactory(last_name='Newcomer')
+        response = view(initialize_request(etag))
+        self.assertEqual(200, response.status_code)
+        columns = json.loads(response.content.decode('utf-8'))['columns']
+        self.assertIn(['Newcomer', 'Newcomer'], columns[2]['choices'])
@@ -0,0 +1,109 @@
+import csv
+import gzip
+import io
+import json
+from unittest import TestCase
+import factory
+import factory.random
+from django.contrib.auth import get_user_model
+from datatables_view import *
+from datatables_view.export import escape_formula
+from datatables_view.testing import build_datatables_request
+
+
+User = get_user_model()
+
+
+class UserDatatablesView(DatatablesView):
+    model = User
+    column_defs = [
+        {
+            'name': 'id',
+            'visible': False,
+        }, {
+            'name': 'username',
+        }, {
+            'name': 'last_name',
+            'max_length': 5,
+        }
+    ]
+
+
+class UserFactory(factory.django.DjangoModelFactory):
+
+    class Meta:
+        model = User
+
+    username = factory.Sequence(lambda n: 'username_{}'.format(n))
+    password = 'password'
+    last_name = factory.Faker('last_name')
+
+
+def export_request(export_format, search_value='', **extra):
+    return build_datatables_request(
+        UserDatatablesView, method='get', search_value=search_value, order=[[1, 'asc']],
+        action='export', format=export_format, **extra)
+
+
+class ExportTestCase(TestCase):
+
+    def setUp(self):
+        factory.random.reseed_random('test_export')
+        UserFactory.create_batch(25)
+
+    def tearDown(self):
+        User.objects.all().delete()
+
+    def export(self, *args, **kwargs):
+        response = UserDatatablesView.as_view()(export_request(*args, **kwargs))
+        self.assertEqual(200, response.status_code)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv(self):
+        response, content = self.export('csv', 'username_1')
+        self.assertEqual('text/csv', response['Content-Type'])
+        self.assertIn('filename="user.csv"', response['Content-Disposition'])
+        rows = list(csv.reader(io.StringIO(content.decode('utf-8'))))
+
+        # Hidden columns are excluded; values are not clipped
+        expected = User.objects.filter(username__icontains='username_1').order_by('username')
+        self.assertEqual(['Username', 'Last Name'], rows[0])
+        self.assertEqual([[u.username, u.last_name] for u in expected], rows[1:])
+
+    def test_tsv(self):
+        response, content = self.export('tsv')
+        rows = content.decode('utf-8').splitlines()
+        self.assertEqual(26, len(rows))
+        self.assertEqual(2, len(rows[1].split('\t')))
+
+    def test_ndjson_gzip(self):
+        response, content = self.export('ndjson', gzip='1')
+        self.assertEqual('application/gzip', response['Content-Type'])
+        self.assertIn('filename="user.ndjson.gz"', response['Content-Disposition'])
+        rows = [json.loads(line) for line in gzip.decompress(content).decode('utf-8').splitlines()]
+        self.assertEqual(25, len(rows))
+        self.assertEqual(['last_name', 'username'], sorted(rows[0].keys()))
+
+    def test_formula_escaping(self):
+        user = User.objects.order_by('username').first()
+        user.last_name = '=HYPERLINK("http://example.com")'
+        user.save()
+        User.objects.filter(pk=User.objects.order_by('username')[1].pk).update(last_name='-2+3')
+        response, content = self.export('csv')
+        rows = list(csv.reader(io.StringIO(content.decode('utf-8'))))
+        self.assertEqual('\'=HYPERLINK("http://example.com")', rows[1][1])
+        self.assertEqual("'-2+3", rows[2][1])
+
+        self.assertEqual('', escape_formula(None))
+        self.assertEqual('-1', escape_formula(-1))
+        self.assertEqual('-1', escape_formula('-1'))
+        self.assertEqual('-1,234.50', escape_formula('-1,234.50'))
+        self.assertEqual('-1.5e3', escape_formula('-1.5e3'))
+        self.assertEqual("'-1+1", escape_formula('-1+1'))
+        self.assertEqual("'-", escape_formula('-'))
+        self.assertEqual("'@SUM(A1:A2)", escape_formula('@SUM(A1:A2)'))
+        self.assertEqual('a=b', escape_formula('a=b'))
+
+    def test_unknown_format(self):
+        response = UserDatatablesView.as_view()(export_request('xls'))
+        self.assertEqual(400, response.status_code)
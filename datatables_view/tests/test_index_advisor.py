@@ -0,0 +1,108 @@
+from io import StringIO
+from unittest import TestCase
+from django.urls import re_path as url
+from django.contrib.auth import get_user_model
+from django.apps import apps as app_registry
+from django.contrib.auth.models import Permission
+from django.core.management import call_command
+from django.test.utils import override_settings
+from datatables_view import *
+from datatables_view.indexes import IndexAdvisor
+from datatables_view.indexes import is_project_app
+from datatables_view.indexes import iter_view_classes
+
+
+User = get_user_model()
+
+
+class UserDatatablesView(DatatablesView):
+    model = User
+    latest_by = 'date_joined'
+    initial_order = [[2, 'asc']]
+    column_defs = [
+        {
+            'name': 'id',
+            'visible': False,
+        }, {
+            'name': 'username',
+        }, {
+            'name': 'last_name',
+            'lookup': 'istartswith',
+        }, {
+            'name': 'first_name',
+        }, {
+            'name': 'is_staff',
+        }, {
+            'name': 'date_joined',
+        }
+    ]
+
+
+class PermissionDatatablesView(DatatablesView):
+    model = Permission
+    column_defs = [
+        {
+            'name': 'id',
+            'visible': False,
+        }, {
+            'name': 'codename',
+        }, {
+            'name': 'model',
+            'foreign_field': 'content_type__model',
+        }
+    ]
+
+
+urlpatterns = [
+    url(r'^users/$', UserDatatablesView.as_view()),
+    url(r'^permissions/$', PermissionDatatablesView.as_view()),
+]
+
+
+class IndexAdvisorTestCase(TestCase):
+
+    def test_discovery(self):
+        with override_settings(ROOT_URLCONF=__name__):
+            view_classes = [view_class for url, view_class in iter_view_classes()]
+        self.assertEqual([UserDatatablesView, PermissionDatatablesView], view_classes)
+
+    def test_recommendations(self):
+        advisor = IndexAdvisor()
+        advisor.analyze(UserDatatablesView)
+        recommendations = {key[1]: recommendation for key, recommendation in advisor.recommendations.items()}
+
+        # "username" is unique, booleans are never recommended
+        self.assertEqual(['last_name', 'first_name', 'date_joined'], list(recommendations.keys()))
+        view_name = '%s.UserDatatablesView' % __name__
+        self.assertEqual(['initial order', 'filter by "istartswith"'], recommendations['last_name'].reasons[view_name])
+        self.assertEqual(['order', 'filter by date', 'date range ("latest_by")'], recommendations['date_joined'].reasons[view_name])
+        self.assertIn((view_name, 'first_name'), [(view, column) for view, column, message in advisor.notes])
+
+        # Related models are checked as well; neither field leads
+        # the unique constraints ("content_type", "codename") and ("app_label", "model")
+        advisor = IndexAdvisor()
+        advisor.analyze(PermissionDatatablesView)
+        self.assertEqual(
+            [('auth.Permission', 'codename'), ('contenttypes.ContentType', 'model')],
+            list(advisor.recommendations.keys()))
+        self.assertEqual(
+            ['order "content_type__model"'],
+            advisor.recommendations[('contenttypes.ContentType', 'model')].reasons['%s.PermissionDatatablesView' % __name__])
+
+    def test_command(self):
+        stdout = StringIO()
+        with override_settings(ROOT_URLCONF=__name__):
+            call_command('datatables_index_advisor', '--explain', stdout=stdout)
+        output = stdout.getvalue()
+        self.assertIn('auth.User.last_name: models.Index', output)
+        self.assertIn('order by last_name', output)
+
+        # No migrations are written for installed packages, just the SQL for RunSQL
+        self.assertNotIn('Meta.indexes', output)
+        self.assertIn('RunSQL', output)
+        self.assertIn('CREATE INDEX', output)
+        self.assertIn('"auth_user" ("last_name")', output)
+
+    def test_project_app(self):
+        self.assertFalse(is_project_app(app_registry.get_app_config('auth')))
+        self.assertTrue(is_project_app(app_registry.get_app_config('datatables_view')))
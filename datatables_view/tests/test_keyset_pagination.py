@@ -0,0 +1,141 @@
+import json
+from unittest import TestCase
+import factory
+import factory.random
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datatables_view import *
+from datatables_view.pagination import encode_cursor
+from datatables_view.pagination import supports_row_values
+from datatables_view.testing import build_datatables_request
+
+
+User = get_user_model()
+
+
+class UserDatatablesView(DatatablesView):
+    model = User
+    keyset_pagination = True
+    column_defs = [
+        {
+            'name': 'id',
+            'visible': False,
+        }, {
+            'name': 'username',
+        }, {
+            'name': 'last_name',
+        }, {
+            'name': 'last_login',
+        }
+    ]
+
+
+class UserFactory(factory.django.DjangoModelFactory):
+
+    class Meta:
+        model = User
+
+    username = factory.Sequence(lambda n: 'username_{}'.format(n))
+    password = 'password'
+    first_name = factory.Faker('first_name')
+    last_name = factory.Faker('last_name')
+
+
+class KeysetPaginationTestCase(TestCase):
+
+    def setUp(self):
+        factory.random.reseed_random('test_keyset_pagination')
+        UserFactory.create_batch(45)
+
+    def tearDown(self):
+        User.objects.all().delete()
+
+    def get_response_dict(self, start, length, order_column, order_dir, **extra):
+        request = build_datatables_request(UserDatatablesView, start=start, length=length, order=[[order_column, order_dir]], **extra)
+        response = UserDatatablesView.as_view()(request)
+        return json.loads(response.content.decode('utf-8'))
+
+    def walk_forward(self, *args, **extra):
+        ids = []
+        cursors = None
+        for start in range(0, 45, 10):
+            if cursors and cursors['last']:
+                extra.update({'cursor': cursors['last'], 'cursor_direction': 'next'})
+            response_dict = self.get_response_dict(start, 10, *args, **extra)
+            ids += [row['id'] for row in response_dict['data']]
+            cursors = response_dict['cursors']
+        return ids
+
+    def test_seek_matches_offset(self):
+
+        # last_name is not unique, so the pk tiebreaker is required
+        for order_dir in ['asc', 'desc']:
+            expected_ids = list(User.objects
+                .order_by(*[('' if order_dir == 'asc' else '-') + name for name in ['last_name', 'id']])
+                .values_list('id', flat=True)
+            )
+
+            # Walk forward, seeking from the last row of each page
+            ids = []
+            cursors = None
+            for start in range(0, 45, 10):
+                extra = {'cursor': cursors['last'], 'cursor_direction': 'next'} if cursors else {}
+                response_dict = self.get_response_dict(start, 10, 2, order_dir, **extra)
+                self.assertEqual(45, response_dict['recordsFiltered'])
+                ids += [row['id'] for row in response_dict['data']]
+                cursors = response_dict['cursors']
+                self.assertEqual(start, cursors['start'])
+            self.assertEqual(expected_ids, ids)
+
+            # Then seek backward, from the first row of the last page
+            response_dict = self.get_response_dict(30, 10, 2, order_dir, cursor=cursors['first'], cursor_direction='previous')
+            self.assertEqual(expected_ids[30:40], [row['id'] for row in response_dict['data']])
+
+    def test_cursor_for_different_order_is_ignored(self):
+
+        response_dict = self.get_response_dict(0, 10, 2, 'asc')
+        cursor = response_dict['cursors']['last']
+
+        response_dict = self.get_response_dict(10, 10, 1, 'asc', cursor=cursor)
+        expected_ids = list(User.objects.order_by('username', 'id').values_list('id', flat=True)[10:20])
+        self.assertEqual(expected_ids, [row['id'] for row in response_dict['data']])
+
+    def test_row_values(self):
+        response_dict = self.get_response_dict(0, 10, 2, 'desc')
+        with CaptureQueriesContext(connection) as context:
+            self.get_response_dict(10, 10, 2, 'desc', cursor=response_dict['cursors']['last'])
+        sql = context.captured_queries[-1]['sql']
+        if supports_row_values(connection):
+            self.assertIn('("auth_user"."last_name", "auth_user"."id") < (', sql)
+        else:
+            self.assertIn(' OR ', sql)
+
+    def test_mixed_directions(self):
+        expected_ids = list(User.objects.order_by('last_name', '-username').values_list('id', flat=True))
+        ids = self.walk_forward(2, 'asc', **{'order[1][column]': 1, 'order[1][dir]': 'desc'})
+        self.assertEqual(expected_ids, ids)
+
+    def test_nullable_column(self):
+        # Seeking from a non-NULL row would skip the NULL ones: OFFSET is used instead
+        users = list(User.objects.order_by('id'))
+        for i, user in enumerate(users[:-3]):
+            user.last_login = timezone.now() - timezone.timedelta(days=i)
+            user.save()
+
+        expected_ids = list(User.objects.order_by('-last_login', '-id').values_list('id', flat=True))
+        response_dict = self.get_response_dict(0, 10, 3, 'desc')
+        self.assertEqual({'start': 0, 'first': None, 'last': None}, response_dict['cursors'])
+        self.assertEqual(expected_ids, self.walk_forward(3, 'desc'))
+
+        # A cursor forged for the same ordering is ignored as well
+        cursor = encode_cursor(['-last_login', 'id'], [users[9].last_login, users[9].id])
+        response_dict = self.get_response_dict(10, 10, 3, 'desc', cursor=cursor)
+        self.assertEqual(expected_ids[10:20], [row['id'] for row in response_dict['data']])
+
+    def test_requires_count(self):
+        view_class = type('UncountedUserDatatablesView', (UserDatatablesView, ), {'exact_count': False})
+        with self.assertRaises(ImproperlyConfigured):
+            view_class.as_view()(build_datatables_request(view_class, order=[[2, 'asc']]))
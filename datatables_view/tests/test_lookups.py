@@ -0,0 +1,100 @@
+import json
+from unittest import TestCase
+import factory
+import factory.random
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from datatables_view import *
+from datatables_view.testing import build_datatables_request
+
+
+User = get_user_model()
+
+
+def exact_or_empty(path, search_value):
+    if search_value == '-':
+        return Q(**{path: ''})
+    return Q(**{path + '__iexact': search_value})
+
+
+class UserDatatablesView(DatatablesView):
+    model = User
+    column_defs = [
+        {
+            'name': 'id',
+            'visible': False,
+        }, {
+            'name': 'username',
+            'lookup': 'istartswith',
+            'global_lookup': 'icontains',
+        }, {
+            'name': 'first_name',
+            'lookup': exact_or_empty,
+        }, {
+            'name': 'last_name',
+            'lookup': 'exact',
+            'global_lookup': 'iexact',
+        }
+    ]
+
+
+class UserFactory(factory.django.DjangoModelFactory):
+
+    class Meta:
+        model = User
+
+    username = factory.Sequence(lambda n: 'user_{}'.format(n))
+    password = 'password'
+
+
+def filter_users(search_value='', **columns):
+    extra = {}
+    for index, column_def in enumerate(UserDatatablesView.column_defs):
+        if column_def['name'] in columns:
+            extra['columns[%d][search][value]' % index] = columns[column_def['name']]
+    request = build_datatables_request(UserDatatablesView, length=100, search_value=search_value, **extra)
+    response = UserDatatablesView.as_view()(request)
+    return sorted([row['username'] for row in json.loads(response.content.decode('utf-8'))['data']])
+
+
+class LookupsTestCase(TestCase):
+
+    def setUp(self):
+        factory.random.reseed_random('test_lookups')
+        UserFactory(username='alice', first_name='Alice', last_name='Smith')
+        UserFactory(username='malice', first_name='', last_name='Smithson')
+        UserFactory(username='bob', first_name='Bob', last_name='smith')
+
+    def tearDown(self):
+        User.objects.all().delete()
+
+    def test_column_lookups(self):
+        # istartswith
+        self.assertEqual(['alice'], filter_users(username='ALI'))
+        # exact
+        self.assertEqual(['alice'], filter_users(last_name='Smith'))
+        # callable
+        self.assertEqual(['bob'], filter_users(first_name='BOB'))
+        self.assertEqual(['malice'], filter_users(first_name='-'))
+
+    def test_global_lookups(self):
+        # icontains on username, iexact on last_name
+        self.assertEqual(['alice', 'malice'], filter_users('ali'))
+        self.assertEqual(['alice', 'bob'], filter_users('SMITH'))
+
+    def test_invalid_lookup(self):
+
+        class InvalidLookupDatatablesView(DatatablesView):
+            model = User
+            column_defs = [{'name': 'username', 'lookup': 'regex'}, ]
+
+        with self.assertRaises(Exception):
+            InvalidLookupDatatablesView().initialize(None)
+
+    def test_initialize(self):
+        request = build_datatables_request(UserDatatablesView, action='initialize')
+        response = UserDatatablesView.as_view()(request)
+        columns = json.loads(response.content.decode('utf-8'))['columns']
+        self.assertEqual('istartswith', columns[1]['lookup'])
+        # Callables are not sent to the client
+        self.assertNotIn('lookup', columns[2])
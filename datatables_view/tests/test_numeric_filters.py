@@ -0,0 +1,157 @@
+import json
+from decimal import Decimal
+from unittest import TestCase
+import factory
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.db.models import Q
+from datatables_view import *
+from datatables_view.filters import build_column_filter
+from datatables_view.filters import clamp_numeric_filter
+from datatables_view.filters import get_integer_range
+from datatables_view.filters import parse_numeric_filter
+from datatables_view.testing import build_datatables_request
+
+
+User = get_user_model()
+
+
+class NumericTestModel(models.Model):
+
+    quantity = models.IntegerField()
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    weight = models.FloatField()
+    code = models.IntegerField()
+
+    class Meta:
+        app_label = 'myappname'
+
+
+class TestDatatablesView(DatatablesView):
+    model = NumericTestModel
+    column_defs = [
+        {
+            'name': 'id',
+            'visible': False,
+        }, {
+            'name': 'quantity',
+        }, {
+            'name': 'price',
+        }, {
+            'name': 'weight',
+        }, {
+            'name': 'code',
+            'lookup': 'startswith',
+        }
+    ]
+
+
+class UserDatatablesView(DatatablesView):
+    model = User
+    column_defs = [
+        {
+            'name': 'id',
+        }, {
+            'name': 'username',
+        }
+    ]
+
+
+class UserFactory(factory.django.DjangoModelFactory):
+
+    class Meta:
+        model = User
+
+    username = factory.Sequence(lambda n: 'user_{}'.format(n))
+    password = 'password'
+
+
+class NumericFiltersTestCase(TestCase):
+
+    def build_filter(self, column_name, search_value):
+        view = TestDatatablesView()
+        view.initialize(None)
+        return build_column_filter(
+            column_name, view.column_obj(column_name), view.column_spec_by_name(column_name), search_value)
+
+    def test_parse_numeric_filter(self):
+        self.assertEqual({'exact': Decimal('10')}, parse_numeric_filter('10'))
+        self.assertEqual({'gt': Decimal('100')}, parse_numeric_filter('>100'))
+        self.assertEqual({'lte': Decimal('5')}, parse_numeric_filter('<= 5'))
+        self.assertEqual({'range': (Decimal('-1.5'), Decimal('2.5'))}, parse_numeric_filter('-1.5..2.5'))
+        self.assertIsNone(parse_numeric_filter('acme'))
+        self.assertIsNone(parse_numeric_filter('10..'))
+
+        # Integer bounds are rounded, fractional values never match
+        self.assertEqual({'lt': Decimal('6')}, parse_numeric_filter('<5.5', integer=True))
+        self.assertEqual({'range': (Decimal('-1'), Decimal('2'))}, parse_numeric_filter('-1.5..2.5', integer=True))
+        self.assertIsNone(parse_numeric_filter('5.5', integer=True))
+
+    def test_build_column_filter(self):
+        self.assertEqual(Q(quantity__gte=10), self.build_filter('quantity', '>=10'))
+        self.assertEqual(Q(price__range=(Decimal('10'), Decimal('20.5'))), self.build_filter('price', '10..20.5'))
+        self.assertEqual(Q(weight__exact=1.5), self.build_filter('weight', '1.5'))
+        self.assertIsNone(self.build_filter('quantity', 'acme'))
+        self.assertIsNone(self.build_filter('id', '1.5'))
+        # An explicit lookup is used as is
+        self.assertEqual(Q(code__startswith='12'), self.build_filter('code', '12'))
+
+    def test_clamp_numeric_filter(self):
+        self.assertEqual({'exact': 5}, clamp_numeric_filter({'exact': 5}, 0, 10))
+        self.assertIsNone(clamp_numeric_filter({'exact': 11}, 0, 10))
+        self.assertEqual({'gte': 0}, clamp_numeric_filter({'gt': -5}, 0, 10))
+        self.assertIsNone(clamp_numeric_filter({'gt': 10}, 0, 10))
+        self.assertEqual({'gte': 10}, clamp_numeric_filter({'gte': 10}, 0, 10))
+        self.assertEqual({'lte': 10}, clamp_numeric_filter({'lt': 50}, 0, 10))
+        self.assertIsNone(clamp_numeric_filter({'lt': 0}, 0, 10))
+        self.assertEqual({'range': (0, 7)}, clamp_numeric_filter({'range': (-5, 7)}, 0, 10))
+        self.assertIsNone(clamp_numeric_filter({'range': (11, 20)}, 0, 10))
+
+    def test_out_of_range(self):
+        view = TestDatatablesView()
+        view.initialize(None)
+        low, high = get_integer_range(view.column_obj('quantity').model_field)
+        self.assertIsNone(self.build_filter('quantity', '99999999999999999999'))
+        self.assertIsNone(self.build_filter('quantity', '>99999999999999999999'))
+        self.assertEqual(Q(quantity__lte=high), self.build_filter('quantity', '<99999999999999999999'))
+        self.assertEqual(Q(quantity__range=(1, high)), self.build_filter('quantity', '1..99999999999999999999'))
+        self.assertEqual(Q(quantity__gte=low), self.build_filter('quantity', '>=-99999999999999999999'))
+        # Decimal and float fields are not clamped
+        self.assertEqual(Q(weight__exact=1e20), self.build_filter('weight', '100000000000000000000'))
+
+
+class NumericQueryTestCase(TestCase):
+
+    def setUp(self):
+        self.users = UserFactory.create_batch(5)
+
+    def tearDown(self):
+        User.objects.all().delete()
+
+    def search(self, search_value='', id=''):
+        request = build_datatables_request(
+            UserDatatablesView, length=100, search_value=search_value, **{'columns[0][search][value]': id})
+        response = UserDatatablesView.as_view()(request)
+        return sorted([row['id'] for row in json.loads(response.content.decode('utf-8'))['data']])
+
+    def test_column_filter(self):
+        ids = [user.id for user in self.users]
+        self.assertEqual(ids[1:4], self.search(id='%d..%d' % (ids[1], ids[3])))
+        self.assertEqual(ids[3:], self.search(id='>%d' % ids[2]))
+        # Text can't match numeric columns: the column filter is ignored
+        self.assertEqual(ids, self.search(id='acme'))
+
+    def test_global_search(self):
+        user = self.users[2]
+        # the "id" column is skipped, the username is matched
+        self.assertEqual([user.id], self.search(user.username))
+        self.assertEqual([user.id], self.search(str(user.id)))
+
+    def test_out_of_range(self):
+        ids = [user.id for user in self.users]
+        self.assertEqual([], self.search('99999999999999999999'))
+        self.assertEqual([], self.search('>99999999999999999999'))
+        self.assertEqual(ids, self.search('1..99999999999999999999'))
+        self.assertEqual(ids, self.search(id='<99999999999999999999'))
+        # Like text, a value which can't match is ignored by the column filter
+        self.assertEqual(ids, self.search(id='99999999999999999999'))
@@ -0,0 +1,132 @@
+import json
+from unittest import TestCase
+import factory
+import factory.random
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models import Prefetch
+from django.test.utils import CaptureQueriesContext
+from datatables_view import *
+from datatables_view.testing import build_datatables_request
+
+
+User = get_user_model()
+
+
+class UserDatatablesView(DatatablesView):
+    model = User
+    column_defs = [
+        {
+            'name': 'id',
+            'visible': False,
+        }, {
+            'name': 'username',
+        }, {
+            'name': 'groups',
+            'foreign_field': 'groups__name',
+        }
+    ]
+
+
+class ContentTypeDatatablesView(DatatablesView):
+    model = ContentType
+    column_defs = [
+        {
+            'name': 'id',
+            'visible': False,
+        }, {
+            'name': 'model',
+        }, {
+            'name': 'codenames',
+            'foreign_field': 'permission__codename',
+        }
+    ]
+
+
+class PermissionDatatablesView(DatatablesView):
+    model = Permission
+    column_defs = [
+        {
+            'name': 'id',
+            'visible': False,
+        }, {
+            'name': 'codename',
+        }, {
+            'name': 'app_label',
+            'foreign_field': 'content_type__app_label',
+        }, {
+            'name': 'groups',
+            'foreign_field': 'group__name',
+        }
+    ]
+
+
+class UserFactory(factory.django.DjangoModelFactory):
+
+    class Meta:
+        model = User
+
+    username = factory.Sequence(lambda n: 'username_{}'.format(n))
+    password = 'password'
+
+
+class PrefetchTestCase(TestCase):
+
+    def setUp(self):
+        factory.random.reseed_random('test_prefetch')
+        self.groups = [Group.objects.create(name='group_%d' % i) for i in range(3)]
+        for index, user in enumerate(UserFactory.create_batch(20)):
+            user.groups.set(self.groups[:index % 4])
+
+    def tearDown(self):
+        User.objects.all().delete()
+        Group.objects.all().delete()
+
+    def get_view(self, view_class):
+        view = view_class()
+        view.initialize(None)
+        return view
+
+    def test_optimize_queryset(self):
+        qs = self.get_view(PermissionDatatablesView).optimize_queryset(Permission.objects.all())
+        lookups = qs._prefetch_related_lookups
+        self.assertEqual(1, len(lookups))
+        self.assertIsInstance(lookups[0], Prefetch)
+        self.assertEqual('group_set', lookups[0].prefetch_to)
+        self.assertEqual(['content_type'], list(qs.query.select_related.keys()))
+
+        # Reverse FK: the FK is loaded along with the leaf field
+        qs = self.get_view(ContentTypeDatatablesView).optimize_queryset(ContentType.objects.all())
+        prefetch = qs._prefetch_related_lookups[0]
+        self.assertEqual('permission_set', prefetch.prefetch_to)
+        self.assertEqual({'codename', 'content_type'}, prefetch.queryset.query.deferred_loading[0])
+
+    def test_no_queries_per_row(self):
+        for length in (5, 20):
+            with CaptureQueriesContext(connection) as context:
+                response = UserDatatablesView.as_view()(build_datatables_request(UserDatatablesView, length=length, order=[[1, 'asc']]))
+            # count, page, groups
+            self.assertEqual(3, len(context.captured_queries))
+
+        rows = json.loads(response.content.decode('utf-8'))['data']
+        for row in rows:
+            user = User.objects.get(id=row['id'])
+            self.assertEqual(sorted([g.name for g in user.groups.all()]), sorted(row['groups']))
+
+    def test_reverse_relations(self):
+        response = ContentTypeDatatablesView.as_view()(build_datatables_request(ContentTypeDatatablesView, order=[[1, 'asc']]))
+        rows = json.loads(response.content.decode('utf-8'))['data']
+        group = [row for row in rows if row['model'] == 'group'][0]
+        self.assertEqual(['add_group', 'change_group', 'delete_group', 'view_group'], sorted(group['codenames']))
+
+    def test_streaming(self):
+        view = self.get_view(UserDatatablesView)
+        qs = view.optimize_queryset(User.objects.order_by('id'))
+        with CaptureQueriesContext(connection) as context:
+            rows = list(view.iter_results(None, qs, chunk_size=8))
+        # a single query for users, then groups are prefetched for each chunk of 8 users
+        self.assertEqual(1 + 3, len(context.captured_queries))
+        self.assertEqual(20, len(rows))
@@ -0,0 +1,85 @@
+from unittest import TestCase
+import factory
+import factory.random
+from django.contrib.auth import get_user_model
+from datatables_view import *
+from datatables_view.instrumentation import RequestProfile
+from datatables_view.instrumentation import sql_shape
+from datatables_view.testing import DatatablesQueriesMixin
+from datatables_view.testing import build_datatables_request
+
+
+User = get_user_model()
+
+
+class UserDatatablesView(DatatablesView):
+    model = User
+    column_defs = [
+        {
+            'name': 'id',
+            'visible': False,
+        }, {
+            'name': 'username',
+        }, {
+            'name': 'groups',
+            'foreign_field': 'groups__name',
+        }
+    ]
+
+
+class NPlusOneUserDatatablesView(UserDatatablesView):
+
+    def customize_row(self, row, obj):
+        row['num_permissions'] = obj.user_permissions.count()
+
+
+class BudgetUserDatatablesView(UserDatatablesView):
+    max_queries = 2
+
+    def get_profile(self, request):
+        return RequestProfile('budget', max_queries=self.max_queries, raise_exceptions=True)
+
+
+class UserFactory(factory.django.DjangoModelFactory):
+
+    class Meta:
+        model = User
+
+    username = factory.Sequence(lambda n: 'username_{}'.format(n))
+    password = 'password'
+
+
+class QueryBudgetTestCase(DatatablesQueriesMixin, TestCase):
+
+    def setUp(self):
+        factory.random.reseed_random('test_query_budget')
+        UserFactory.create_batch(10)
+
+    def tearDown(self):
+        User.objects.all().delete()
+
+    def test_sql_shape(self):
+        self.assertEqual(
+            sql_shape('SELECT * FROM "auth_user" WHERE "id" IN (%s, %s, %s) LIMIT 10'),
+            sql_shape('SELECT * FROM "auth_user" WHERE "id" IN (%s, %s) LIMIT 20'),
+        )
+
+    def test_query_count(self):
+        # count, page, prefetched groups
+        self.assertDatatablesQueries(3, UserDatatablesView, order=[(1, 'asc')])
+        # no groups
+        self.assertDatatablesQueries(2, UserDatatablesView, column_defs=UserDatatablesView.column_defs[:2])
+
+    def test_n_plus_one(self):
+        with self.assertRaisesRegex(AssertionError, 'Possible N\\+1 queries'):
+            self.assertDatatablesQueries(13, NPlusOneUserDatatablesView, order=[(1, 'asc')])
+
+        with self.assertLogs('datatables_view', 'WARNING') as logs:
+            NPlusOneUserDatatablesView.as_view(n_plus_one_threshold=5)(
+                build_datatables_request(NPlusOneUserDatatablesView))
+        self.assertIn('possible N+1 queries in phase "render" (10 times)', logs.output[0])
+
+    def test_budget(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            BudgetUserDatatablesView.as_view()(build_datatables_request(BudgetUserDatatablesView))
+        BudgetUserDatatablesView.as_view(max_queries=3)(build_datatables_request(BudgetUserDatatablesView))
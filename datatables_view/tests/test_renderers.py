@@ -0,0 +1,77 @@
+import datetime
+from unittest import TestCase
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.utils import timezone
+from datatables_view import *
+from datatables_view.utils import format_datetime
+
+
+User = get_user_model()
+
+
+class UserDatatablesView(DatatablesView):
+    model = User
+    column_defs = [
+        {
+            'name': 'id',
+            'visible': False,
+        }, {
+            'name': 'username',
+            'max_length': 4,
+        }, {
+            'name': 'is_staff',
+        }, {
+            'name': 'date_joined',
+        }, {
+            'name': 'last_login',
+        }
+    ]
+
+
+class CustomizedUserDatatablesView(UserDatatablesView):
+
+    def customize_row(self, row, obj):
+        row['username'] = 'Mr. ' + row['username']
+
+
+class RenderersTestCase(TestCase):
+
+    def test_formatters(self):
+        now = timezone.now()
+        samples = [
+            ('username', ['john', '', None]),
+            ('is_staff', [True, False, None]),
+            ('date_joined', [now, now.replace(microsecond=0), None]),
+            ('last_login', [None]),
+            ('id', [1, None]),
+        ]
+        for name, values in samples:
+            column = Column.column_factory(User, {'name': name})
+            format_value = column.compile_formatter()
+            for value in values:
+                self.assertEqual(column.render_column_value(None, value), format_value(value))
+
+        column = Column.column_factory(User, {'name': 'date_joined'})
+        format_value = column.compile_formatter()
+        self.assertEqual(format_datetime(datetime.date(2020, 1, 31), False), format_value(datetime.date(2020, 1, 31)))
+
+        column = Column.column_factory(Permission, {'name': 'app_label', 'foreign_field': 'content_type__app_label'})
+        permission = Permission.objects.select_related('content_type').first()
+        self.assertEqual(column.render_column(permission), column.compile_renderer()(permission))
+
+    def test_clipping(self):
+        user = User(id=1, username='johnny', date_joined=timezone.now())
+
+        view = UserDatatablesView()
+        view.initialize(None)
+        row = list(view.iter_results(None, [user, ]))[0]
+        self.assertEqual('<span title="johnny">john&hellip;</span>', row['username'])
+        self.assertEqual('No', row['is_staff'])
+        self.assertEqual('row-1', row['DT_RowId'])
+
+        # Values are clipped after customize_row()
+        view = CustomizedUserDatatablesView()
+        view.initialize(None)
+        row = list(view.iter_results(None, [user, ]))[0]
+        self.assertEqual('<span title="Mr. johnny">Mr. &hellip;</span>', row['username'])
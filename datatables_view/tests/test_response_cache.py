@@ -0,0 +1,132 @@
+import json
+from unittest import TestCase
+import factory
+import factory.random
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.contrib.sites.models import Site
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from datatables_view import *
+from datatables_view.cache import _generation_key
+from datatables_view.cache import get_cache
+from datatables_view.cache import get_model_generation
+from datatables_view.testing import build_datatables_request
+
+
+User = get_user_model()
+
+
+class UserDatatablesView(DatatablesView):
+    model = User
+    response_cache_timeout = 60
+    column_defs = [
+        {
+            'name': 'id',
+            'visible': False,
+        }, {
+            'name': 'username',
+        }, {
+            'name': 'last_name',
+        }
+    ]
+
+
+class GroupUserDatatablesView(UserDatatablesView):
+
+    def get_column_defs(self, request):
+        # Columns provided at run-time: their models can't be known in advance
+        return self.column_defs + [{
+            'name': 'group',
+            'foreign_field': 'groups__name',
+        }]
+
+
+class UserFactory(factory.django.DjangoModelFactory):
+
+    class Meta:
+        model = User
+
+    username = factory.Sequence(lambda n: 'username_{}'.format(n))
+    password = 'password'
+    last_name = factory.Faker('last_name')
+
+
+class ResponseCacheTestCase(TestCase):
+
+    def setUp(self):
+        factory.random.reseed_random('test_response_cache')
+        UserFactory.create_batch(20)
+
+    def tearDown(self):
+        User.objects.all().delete()
+
+    def get_response_dict(self, draw, search_value='', **extra):
+        request = build_datatables_request(UserDatatablesView, search_value=search_value, order=[[1, 'asc']], draw=draw, **extra)
+        response = UserDatatablesView.as_view()(request)
+        return json.loads(response.content.decode('utf-8'))
+
+    def test_cached_response(self):
+
+        response_dict = self.get_response_dict(1, 'user')
+        self.assertEqual(1, response_dict['draw'])
+
+        # Same query, different draw: the database is not involved at all
+        with CaptureQueriesContext(connection) as context:
+            cached_response_dict = self.get_response_dict(2, 'user')
+        self.assertEqual(0, len(context.captured_queries))
+        self.assertEqual(2, cached_response_dict['draw'])
+        self.assertEqual(response_dict['data'], cached_response_dict['data'])
+
+        # Different queries are cached separately
+        self.assertEqual(0, self.get_response_dict(3, 'nobody')['recordsFiltered'])
+        with CaptureQueriesContext(connection) as context:
+            self.get_response_dict(4, 'user', extra_filter='bar')
+        self.assertGreater(len(context.captured_queries), 0)
+
+        # Cached responses expire as soon as the model is changed
+        user = User.objects.get(id=response_dict['data'][0]['id'])
+        user.last_name = 'Changed'
+        user.save()
+        response_dict = self.get_response_dict(5, 'user')
+        self.assertEqual('Changed', response_dict['data'][0]['last_name'])
+
+    def test_related_model_changed(self):
+        group = Group.objects.create(name='Staff')
+        group.user_set.add(*User.objects.all())
+        request_data = {'columns[3][name]': 'group', 'columns[3][data]': 'group', 'columns[3][searchable]': 'true'}
+
+        def get_groups(draw):
+            response = GroupUserDatatablesView.as_view()(build_datatables_request(
+                GroupUserDatatablesView, order=[[1, 'asc']], draw=draw, **request_data))
+            return {tuple(row['group']) for row in json.loads(response.content.decode('utf-8'))['data']}
+
+        try:
+            self.assertEqual({('Staff', )}, get_groups(1))
+            with CaptureQueriesContext(connection) as context:
+                get_groups(2)
+            self.assertEqual(0, len(context.captured_queries))
+
+            group.name = 'Admins'
+            group.save()
+            self.assertEqual({('Admins', )}, get_groups(3))
+        finally:
+            group.delete()
+
+    def test_tracked_models(self):
+        self.assertEqual([User], UserDatatablesView.get_cached_models())
+        self.assertEqual([], type('UncachedUserDatatablesView', (UserDatatablesView, ), {'response_cache_timeout': 0}).get_cached_models())
+
+        # Generations are bumped for the models in use ...
+        generation = get_model_generation(User)
+        User.objects.first().save()
+        self.assertNotEqual(generation, get_model_generation(User))
+
+        # ... while changes to other models don't even access the cache
+        key = _generation_key(Site)
+        get_cache().set(key, 1, None)
+        try:
+            Site.objects.get_current().save()
+            self.assertEqual(1, get_cache().get(key))
+        finally:
+            get_cache().delete(key)
@@ -0,0 +1,212 @@
+import json
+from unittest import TestCase
+import factory
+import factory.random
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from io import StringIO
+from datatables_view import *
+from datatables_view.search import IContainsSearchBackend
+from datatables_view.search import PostgresSearchBackend
+from datatables_view.search import SqliteFTS5SearchBackend
+from datatables_view.testing import build_datatables_request
+
+
+User = get_user_model()
+
+
+class UserDatatablesView(DatatablesView):
+    model = User
+    column_defs = [
+        {
+            'name': 'id',
+            'visible': False,
+        }, {
+            'name': 'username',
+        }, {
+            'name': 'first_name',
+        }, {
+            'name': 'groups',
+            'foreign_field': 'groups__name',
+        }, {
+            'name': 'date_joined',
+        }
+    ]
+
+
+class FullTextUserDatatablesView(UserDatatablesView):
+    search_backend = SqliteFTS5SearchBackend(index_name='test_search_user')
+
+
+class PendingFullTextUserDatatablesView(UserDatatablesView):
+    search_backend = SqliteFTS5SearchBackend(index_name='test_search_user_pending')
+
+
+class UnbuiltFullTextUserDatatablesView(UserDatatablesView):
+    search_backend = SqliteFTS5SearchBackend(index_name='test_search_user_unbuilt')
+
+
+class PostgresUserDatatablesView(UserDatatablesView):
+    search_backend = PostgresSearchBackend(index_name='test_search_user', config='english')
+
+    def get_column_defs(self, request):
+        # Columns provided at run-time are indexed as well
+        return self.column_defs + [{'name': 'last_name'}]
+
+
+class RecordingCursor(object):
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+
+
+class UserFactory(factory.django.DjangoModelFactory):
+
+    class Meta:
+        model = User
+
+    username = factory.Sequence(lambda n: 'username_{}'.format(n))
+    first_name = factory.Iterator(['Alice', 'Bob', 'Carol'])
+    password = 'password'
+
+
+def search(view_class, search_value):
+    request = build_datatables_request(view_class, length=100, search_value=search_value)
+    response = view_class.as_view()(request)
+    return sorted([row['username'] for row in json.loads(response.content.decode('utf-8'))['data']])
+
+
+class SearchBackendTestCase(TestCase):
+
+    def setUp(self):
+        factory.random.reseed_random('test_search')
+        self.group = Group.objects.create(name='Editors')
+        self.users = UserFactory.create_batch(9)
+        self.users[0].groups.add(self.group)
+        FullTextUserDatatablesView.search_backend.build_index(connection.alias, rebuild=True)
+
+    def tearDown(self):
+        User.objects.all().delete()
+        Group.objects.all().delete()
+
+    def test_default_backend(self):
+        self.assertIsNone(UserDatatablesView.search_backend)
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(3, len(search(UserDatatablesView, 'bob')))
+        self.assertIn('LIKE', ' '.join([q['sql'] for q in context.captured_queries]))
+        self.assertIsInstance(IContainsSearchBackend(), IContainsSearchBackend)
+
+    def test_full_text_search(self):
+        for search_value in ('bob', 'Ali', 'editors', 'username_1'):
+            self.assertEqual(
+                search(UserDatatablesView, search_value),
+                search(FullTextUserDatatablesView, search_value),
+            )
+        with CaptureQueriesContext(connection) as context:
+            search(FullTextUserDatatablesView, 'bob')
+        sql = ' '.join([q['sql'] for q in context.captured_queries])
+        self.assertIn('MATCH', sql)
+        self.assertNotIn('LIKE', sql)
+
+        # All words must match
+        self.assertEqual([self.users[0].username], search(FullTextUserDatatablesView, 'alice edit'))
+
+    def test_sync(self):
+        user = self.users[1]
+        user.first_name = 'Zoe'
+        user.save()
+        self.assertEqual([user.username], search(FullTextUserDatatablesView, 'zoe'))
+
+        user.groups.add(self.group)
+        self.assertIn(user.username, search(FullTextUserDatatablesView, 'editors'))
+
+        self.group.name = 'Reviewers'
+        self.group.save()
+        self.assertEqual([], search(FullTextUserDatatablesView, 'editors'))
+        self.assertEqual(2, len(search(FullTextUserDatatablesView, 'reviewers')))
+
+        user.delete()
+        self.assertEqual([], search(FullTextUserDatatablesView, 'zoe'))
+
+    def test_fallback(self):
+        # No words to match: the OR of "icontains" is used instead
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(0, len(search(FullTextUserDatatablesView, '%')))
+        self.assertIn('LIKE', ' '.join([q['sql'] for q in context.captured_queries]))
+
+    def test_build_index(self):
+        # No index yet: the OR of "icontains" is used, and no table is created
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(3, len(search(PendingFullTextUserDatatablesView, 'bob')))
+        sql = ' '.join([q['sql'] for q in context.captured_queries])
+        self.assertIn('LIKE', sql)
+        self.assertNotIn('CREATE', sql)
+
+        view_path = 'datatables_view.tests.test_search.PendingFullTextUserDatatablesView'
+        stdout = StringIO()
+        call_command('datatables_search_index', views=[view_path], stdout=stdout)
+        self.assertIn('Built index "test_search_user_pending"', stdout.getvalue())
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(3, len(search(PendingFullTextUserDatatablesView, 'bob')))
+        self.assertIn('MATCH', ' '.join([q['sql'] for q in context.captured_queries]))
+
+        # Existing indexes are only refilled on demand
+        stdout = StringIO()
+        call_command('datatables_search_index', views=[view_path], stdout=stdout)
+        self.assertIn('already exists', stdout.getvalue())
+        User.objects.filter(id=self.users[1].id).update(first_name='Zoe')
+        self.assertEqual([], search(PendingFullTextUserDatatablesView, 'zoe'))
+        call_command('datatables_search_index', views=[view_path], rebuild=True, stdout=StringIO())
+        self.assertEqual([self.users[1].username], search(PendingFullTextUserDatatablesView, 'zoe'))
+
+    def test_ready_check(self):
+        backend = UnbuiltFullTextUserDatatablesView.search_backend
+        backend.register_view_class(UnbuiltFullTextUserDatatablesView)
+        if not backend.is_model_supported(User) or connection.vendor != backend.vendor:
+            return
+
+        # A missing index is looked for once, not on every write
+        with CaptureQueriesContext(connection) as context:
+            for user in self.users:
+                user.save()
+        self.assertLessEqual(len([q for q in context.captured_queries if 'sqlite_master' in q['sql']]), 1)
+
+        backend.build_index(connection.alias)
+        self.users[1].first_name = 'Zoe'
+        self.users[1].save()
+        self.assertEqual([self.users[1].username], search(UnbuiltFullTextUserDatatablesView, 'zoe'))
+
+    def test_postgres_backend(self):
+        backend = PostgresUserDatatablesView.search_backend
+        backend.bind()
+        self.assertEqual(
+            {'username': 'username', 'first_name': 'first_name', 'groups': 'groups__name', 'last_name': 'last_name'},
+            backend.paths)
+
+        cursor = RecordingCursor()
+        backend.create_index(cursor)
+        self.assertEqual('CREATE TABLE "test_search_user" (id bigint PRIMARY KEY, document tsvector NOT NULL)', cursor.statements[0])
+        self.assertEqual('CREATE INDEX "test_search_user_document" ON "test_search_user" USING GIN (document)', cursor.statements[1])
+
+        self.assertEqual(
+            'INSERT INTO "test_search_user" (id, document) VALUES (%s, to_tsvector(%s::regconfig, %s))',
+            backend.get_insert_sql())
+        self.assertEqual([1, 'english', 'Alice Editors'], backend.get_insert_params(1, 'Alice Editors'))
+
+        sql, params = backend.get_match_sql(['ali', 'edit'])
+        self.assertEqual('SELECT id FROM "test_search_user" WHERE document @@ to_tsquery(%s::regconfig, %s)', sql)
+        self.assertEqual(['english', "'ali':* & 'edit':*"], params)
+
+        # Documents are the same for any backend
+        pk, document = next(backend.iter_documents(User.objects.filter(id=self.users[0].id)))
+        self.assertEqual(['Alice', 'Editors', self.users[0].username], document.split())
+
+        # Other databases fallback to "icontains"
+        if connection.vendor != 'postgresql':
+            self.assertEqual(search(UserDatatablesView, 'bob'), search(PostgresUserDatatablesView, 'bob'))
@@ -0,0 +1,99 @@
+import unittest
+from django.db import models
+from django.db.models import Q
+from datatables_view import *
+from datatables_view.filters import SearchPlan
+
+
+class PlanTestModel(models.Model):
+
+    STATUS_CHOICES = (('a', 'Active'), ('d', 'Discontinued'), )
+
+    code = models.CharField(max_length=5)
+    name = models.CharField(max_length=100)
+    status = models.CharField(max_length=1, choices=STATUS_CHOICES)
+    quantity = models.IntegerField()
+    created = models.DateTimeField()
+
+    class Meta:
+        app_label = 'myappname'
+
+
+class PlanDatatablesView(DatatablesView):
+    model = PlanTestModel
+    column_defs = [
+        {
+            'name': 'id',
+            'visible': False,
+        }, {
+            'name': 'code',
+        }, {
+            'name': 'name',
+        }, {
+            'name': 'status',
+        }, {
+            'name': 'quantity',
+        }, {
+            'name': 'created',
+        }
+    ]
+
+
+class SearchPlanTestCase(unittest.TestCase):
+
+    def plan(self, search_value):
+        view = PlanDatatablesView()
+        view.initialize(None)
+        columns = [
+            (cs['name'], view.column_obj(cs['name']), cs)
+            for cs in view.column_specs if cs['searchable']
+        ]
+        return SearchPlan(columns, search_value, global_search=True)
+
+    def test_text(self):
+        plan = self.plan('acme')
+        self.assertEqual(['code', 'name'], [column_name for column_name, column_filter in plan.filters])
+        self.assertEqual({
+            'status': 'no matching choices',
+            'quantity': 'not a number',
+            'created': 'not a date',
+        }, dict(plan.skipped))
+        self.assertEqual(Q(code__icontains='acme') | Q(name__icontains='acme'), plan.predicate)
+
+    def test_choices(self):
+        plan = self.plan('act')
+        self.assertIn(('status', Q(status__in=['a'])), plan.filters)
+
+    def test_number(self):
+        plan = self.plan('12')
+        self.assertEqual(['code', 'name', 'quantity'], [column_name for column_name, column_filter in plan.filters])
+
+    def test_out_of_range(self):
+        plan = self.plan('99999999999999999999')
+        self.assertIn(('quantity', 'out of range'), plan.skipped)
+        self.assertEqual(['name'], [column_name for column_name, column_filter in plan.filters])
+
+    def test_date(self):
+        plan = self.plan('2020-03-01')
+        self.assertEqual(['name', 'created'], [column_name for column_name, column_filter in plan.filters])
+        self.assertIn(('code', 'longer than 5'), plan.skipped)
+        self.assertIn('date', plan.describe().splitlines()[0])
+
+    def test_no_match(self):
+        self.assertEqual(Q(), self.plan('%s' % ('x' * 101)).predicate)
+
+    def test_unmatched_filters(self):
+        view = PlanDatatablesView()
+        view.initialize(None)
+        qs = PlanTestModel.objects.all()
+
+        # Global search: no searchable column can match
+        self.assertTrue(view.filter_queryset_all_columns('x' * 101, qs).query.is_empty())
+        # ... or no searchable columns at all
+        self.assertFalse(view._filter_queryset([], 'acme', qs, global_search=True).query.is_empty())
+
+        # Column filters which can't be applied (i.e. while typing a date) are ignored
+        for search_value in ('2020-0', 'abc'):
+            filtered_qs = view.filter_queryset_by_column('created', search_value, qs)
+            self.assertFalse(filtered_qs.query.is_empty())
+            self.assertFalse(filtered_qs.query.has_filters())
@@ -0,0 +1,96 @@
+import json
+from unittest import TestCase
+import factory
+from django.contrib.auth import get_user_model
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from datatables_view import *
+from datatables_view.testing import build_datatables_request
+
+
+User = get_user_model()
+
+
+class UserDatatablesView(DatatablesView):
+    model = User
+    drop_stale_draws = True
+    search_delay = 500
+    column_defs = [
+        {
+            'name': 'id',
+        }, {
+            'name': 'username',
+            'min_chars': 3,
+        }, {
+            'name': 'last_name',
+            'search_delay': 0,
+        }
+    ]
+
+
+class InterruptedUserDatatablesView(UserDatatablesView):
+
+    def prepare_queryset(self, params, qs):
+        # Simulate a newer draw arriving while this one is being processed
+        newer_request = build_datatables_request(type(self), draw=params['draw'] + 1, table_token='abc')
+        newer_request.REQUEST = newer_request.POST
+        self.is_stale_draw(newer_request, params['draw'] + 1, register=True)
+        return super(InterruptedUserDatatablesView, self).prepare_queryset(params, qs)
+
+
+class UserFactory(factory.django.DjangoModelFactory):
+
+    class Meta:
+        model = User
+
+    username = factory.Sequence(lambda n: 'user_{}'.format(n))
+    password = 'password'
+
+
+class StaleDrawsTestCase(TestCase):
+
+    def setUp(self):
+        self.users = UserFactory.create_batch(3)
+
+    def tearDown(self):
+        User.objects.all().delete()
+
+    def request(self, view_class, draw, table_token):
+        request = build_datatables_request(view_class, draw=draw, table_token=table_token)
+        with CaptureQueriesContext(connection) as context:
+            response = view_class.as_view()(request)
+        return json.loads(response.content.decode('utf-8')), len(context.captured_queries)
+
+    def test_out_of_order(self):
+        data, num_queries = self.request(UserDatatablesView, 2, 'token-1')
+        self.assertEqual(3, len(data['data']))
+
+        # Draw 1 arrives late: no query is executed
+        data, num_queries = self.request(UserDatatablesView, 1, 'token-1')
+        self.assertEqual({'draw': 1, 'staleDraw': True}, data)
+        self.assertEqual(0, num_queries)
+
+        # Other tables are not affected
+        data, num_queries = self.request(UserDatatablesView, 1, 'token-2')
+        self.assertEqual(3, len(data['data']))
+        data, num_queries = self.request(UserDatatablesView, 1, '')
+        self.assertEqual(3, len(data['data']))
+
+    def test_newer_draw_before_count(self):
+        data, num_queries = self.request(InterruptedUserDatatablesView, 1, 'abc')
+        self.assertEqual({'draw': 1, 'staleDraw': True}, data)
+        self.assertEqual(0, num_queries)
+
+    def test_disabled(self):
+        view_class = type('NoDropUserDatatablesView', (InterruptedUserDatatablesView, ), {'drop_stale_draws': False})
+        data, num_queries = self.request(view_class, 1, 'xyz')
+        self.assertEqual(3, len(data['data']))
+
+    def test_client_column_specs(self):
+        view = UserDatatablesView()
+        view.initialize(None)
+        column_specs = {cs['name']: cs for cs in view.get_client_column_specs()}
+        self.assertEqual(500, column_specs['id']['search_delay'])
+        self.assertEqual(0, column_specs['last_name']['search_delay'])
+        self.assertEqual(3, column_specs['username']['min_chars'])
+        self.assertEqual(0, column_specs['id']['min_chars'])
@@ -0,0 +1,85 @@
+import json
+from unittest import TestCase
+import factory
+import factory.random
+from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse
+from datatables_view import *
+from datatables_view.testing import build_datatables_request
+
+
+User = get_user_model()
+
+
+class UserDatatablesView(DatatablesView):
+    model = User
+    column_defs = [
+        {
+            'name': 'id',
+            'visible': False,
+        }, {
+            'name': 'username',
+        }, {
+            'name': 'last_name',
+            'max_length': 5,
+        }
+    ]
+
+
+class StreamingUserDatatablesView(UserDatatablesView):
+    streaming_threshold = 10
+    streaming_chunk_size = 3
+
+
+class LookaheadStreamingUserDatatablesView(StreamingUserDatatablesView):
+    exact_count = False
+
+
+class UserFactory(factory.django.DjangoModelFactory):
+
+    class Meta:
+        model = User
+
+    username = factory.Sequence(lambda n: 'username_{}'.format(n))
+    password = 'password'
+    last_name = factory.Faker('last_name')
+
+
+def get_response_dict(view_class, start, length, search_value=''):
+    request = build_datatables_request(view_class, start=start, length=length, search_value=search_value, order=[[1, 'asc']])
+    response = view_class.as_view()(request)
+    if isinstance(response, StreamingHttpResponse):
+        content = b''.join(response.streaming_content)
+    else:
+        content = response.content
+    return json.loads(content.decode('utf-8'))
+
+
+class StreamingTestCase(TestCase):
+
+    def setUp(self):
+        factory.random.reseed_random('test_streaming')
+        UserFactory.create_batch(25)
+
+    def tearDown(self):
+        User.objects.all().delete()
+
+    def test_streaming_response(self):
+        response = StreamingUserDatatablesView.as_view()(build_datatables_request(StreamingUserDatatablesView, length=-1, order=[[1, 'asc']]))
+        self.assertIsInstance(response, StreamingHttpResponse)
+        response = StreamingUserDatatablesView.as_view()(build_datatables_request(StreamingUserDatatablesView, length=5, order=[[1, 'asc']]))
+        self.assertNotIsInstance(response, StreamingHttpResponse)
+
+    def test_same_content(self):
+        for start, length, search_value in [(0, -1, ''), (10, 10, ''), (20, 10, ''), (100, 10, ''), (0, -1, 'username_1')]:
+            expected = get_response_dict(UserDatatablesView, start, length, search_value)
+            streamed = get_response_dict(StreamingUserDatatablesView, start, length, search_value)
+            self.assertEqual(expected, streamed)
+
+    def test_lookahead(self):
+        for start, length in [(0, -1), (0, 10), (20, 10)]:
+            expected = get_response_dict(UserDatatablesView, start, length)
+            streamed = get_response_dict(LookaheadStreamingUserDatatablesView, start, length)
+            self.assertEqual(expected['data'], streamed['data'])
+        self.assertTrue(get_response_dict(LookaheadStreamingUserDatatablesView, 0, 10)['recordsFilteredUnknown'])
+        self.assertEqual(25, get_response_dict(LookaheadStreamingUserDatatablesView, 0, -1)['recordsFiltered'])
@@ -0,0 +1,117 @@
+from unittest import TestCase
+from django.contrib.auth import get_user_model
+from datatables_view import *
+
+
+User = get_user_model()
+
+
+class UserDatatablesView(DatatablesView):
+    model = User
+    column_defs = [
+        DatatablesView.render_row_tools_column_def(),
+        {
+            'name': 'id',
+            'visible': False,
+        }, {
+            'name': 'username',
+            'initialSearchValue': lambda: 'john',
+        }, {
+            'name': 'is_active',
+            'choices': True,
+        }
+    ]
+
+
+class UserDatatablesWithRequestView(UserDatatablesView):
+
+    def get_column_defs(self, request):
+        return self.column_defs[:-1]
+
+
+class UserDatatablesWithSchemaKeyView(UserDatatablesWithRequestView):
+
+    def get_table_schema_key(self, request):
+        return 'short'
+
+
+class UserDatatablesWithVariantView(UserDatatablesView):
+
+    def get_column_defs(self, request):
+        if request == 'staff':
+            return self.column_defs
+        return self.column_defs[:-1]
+
+    def get_table_schema_variant(self, request):
+        return request == 'staff'
+
+
+class TableSchemaTestCase(TestCase):
+
+    def test_schema_is_cached(self):
+
+        request = None
+
+        view = UserDatatablesView()
+        view.initialize(request)
+        schema = view.get_table_schema(request)
+        self.assertIsInstance(schema, TableSchema)
+
+        other_view = UserDatatablesView()
+        other_view.initialize(request)
+        self.assertIs(schema, other_view.get_table_schema(request))
+
+        # Column objects are shared, column specs are not
+        self.assertIs(view.column_obj('username'), other_view.column_obj('username'))
+        self.assertIsNot(view.column_spec_by_name('username'), other_view.column_spec_by_name('username'))
+
+        # Callable "initialSearchValue" is resolved for each request
+        self.assertEqual('john', view.column_spec_by_name('username')['initialSearchValue'])
+        self.assertTrue(callable(schema.column_spec_by_name('username')['initialSearchValue']))
+
+        # Static choices are computed while compiling the schema
+        self.assertEqual(2, len(view.column_spec_by_name('is_active')['choices']))
+
+    def test_schema_variants(self):
+
+        request = None
+
+        view = UserDatatablesWithRequestView()
+        view.initialize(request)
+        self.assertIsNone(view.get_table_schema_key(request))
+        self.assertIsNot(view.get_table_schema(request), view.get_table_schema(request))
+        self.assertIsNone(view.column_spec_by_name('is_active'))
+
+        view = UserDatatablesWithSchemaKeyView()
+        view.initialize(request)
+        self.assertIs(view.get_table_schema(request), view.get_table_schema(request))
+        self.assertIsNot(
+            view.get_table_schema(request),
+            UserDatatablesView().get_table_schema(request)
+        )
+
+    def test_schema_variant_hook(self):
+        view = UserDatatablesWithVariantView()
+        staff_schema = view.get_table_schema('staff')
+        self.assertIs(staff_schema, view.get_table_schema('staff'))
+        self.assertIsNotNone(staff_schema.column_spec_by_name('is_active'))
+
+        other_schema = view.get_table_schema('other')
+        self.assertIs(other_schema, view.get_table_schema(None))
+        self.assertIsNone(other_schema.column_spec_by_name('is_active'))
+
+    def test_schema_key_is_stable(self):
+        # column_defs supplied per instance (i.e. via as_view()) are keyed by contents, not identity
+        column_defs = [{'name': 'id'}, {'name': 'username'}]
+        schema = UserDatatablesView(column_defs=list(column_defs)).get_table_schema(None)
+        self.assertIs(schema, UserDatatablesView(column_defs=[dict(c) for c in column_defs]).get_table_schema(None))
+        other_schema = UserDatatablesView(column_defs=column_defs[:1]).get_table_schema(None)
+        self.assertEqual(['id'], [column_spec['name'] for column_spec, column, use_autofilter in other_schema.columns])
+
+    def test_latest_by_class_name(self):
+        view = UserDatatablesView(
+            column_defs=[{'name': 'id'}, {'name': 'date_joined', 'className': 'text-right'}],
+            latest_by='date_joined',
+        )
+        view.initialize(None)
+        self.assertEqual('text-right latest_by', view.column_spec_by_name('date_joined')['className'])
@@ -0,0 +1,135 @@
+import threading
+from unittest import TestCase
+import factory
+import factory.random
+from django.contrib.auth import get_user_model
+from django.db import connection
+from datatables_view import *
+from datatables_view.concurrency import on_own_connection
+from datatables_view.instrumentation import RequestProfile
+from datatables_view.signals import request_profiled
+from datatables_view.testing import build_datatables_request
+from datatables_view.testing import profile_datatables_request
+
+
+User = get_user_model()
+
+
+class UserDatatablesView(DatatablesView):
+    model = User
+    enable_timing = True
+    column_defs = [
+        {
+            'name': 'id',
+            'visible': False,
+        }, {
+            'name': 'username',
+        }, {
+            'name': 'last_name',
+        }
+    ]
+
+
+class StreamingUserDatatablesView(UserDatatablesView):
+    streaming_threshold = 5
+
+
+class UserFactory(factory.django.DjangoModelFactory):
+
+    class Meta:
+        model = User
+
+    username = factory.Sequence(lambda n: 'username_{}'.format(n))
+    password = 'password'
+    last_name = factory.Faker('last_name')
+
+
+class TimingTestCase(TestCase):
+
+    def setUp(self):
+        factory.random.reseed_random('test_timing')
+        UserFactory.create_batch(10)
+
+    def tearDown(self):
+        User.objects.all().delete()
+
+    def test_server_timing(self):
+        profiles = []
+
+        def receiver(sender, view, request, response, profile, **kwargs):
+            profiles.append(profile)
+
+        request_profiled.connect(receiver, sender=UserDatatablesView)
+        try:
+            with self.assertLogs('datatables_view', 'INFO') as logs:
+                response = UserDatatablesView.as_view()(
+                    build_datatables_request(UserDatatablesView, search_value='user', order=[(1, 'asc')]))
+        finally:
+            request_profiled.disconnect(receiver, sender=UserDatatablesView)
+
+        metrics = [metric.split(';')[0] for metric in response['Server-Timing'].split(', ')]
+        self.assertEqual(
+            ['initialize', 'parse', 'cache', 'filter', 'count', 'fetch', 'render', 'footer', 'encode', 'total'],
+            metrics)
+        self.assertIn('count;dur=', response['Server-Timing'])
+        self.assertIn('desc="2 queries (sql ', response['Server-Timing'])
+
+        self.assertEqual(1, len(profiles))
+        # total, filtered, page
+        self.assertEqual(3, profiles[0].num_queries)
+        self.assertIn('LIKE', profiles[0].query_shape)
+        self.assertEqual(profiles[0].query_shape, logs.records[0].query_shape)
+        self.assertEqual('UserDatatablesView', logs.records[0].datatables_view)
+
+    def test_disabled(self):
+        response = DatatablesView.as_view(model=User, column_defs=UserDatatablesView.column_defs)(
+            build_datatables_request(UserDatatablesView))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def profile(self, view_class, **kwargs):
+        profiles = []
+
+        def receiver(sender, view, request, response, profile, **kwargs):
+            profiles.append(profile)
+
+        request_profiled.connect(receiver, sender=view_class)
+        try:
+            with self.assertLogs('datatables_view', 'INFO'):
+                response = view_class.as_view()(build_datatables_request(view_class, **kwargs))
+        finally:
+            request_profiled.disconnect(receiver, sender=view_class)
+        return response, profiles[0]
+
+    def test_fetch_phase(self):
+        # The page is retrieved in "fetch", and rendered in "render"
+        response, profile = self.profile(UserDatatablesView, order=[(1, 'asc')])
+        self.assertEqual({'count': 1, 'fetch': 1}, dict(profile.count_by_phase()))
+
+    def test_streaming(self):
+        response, profile = self.profile(StreamingUserDatatablesView, order=[(1, 'asc')])
+        self.assertEqual({'count': 1}, dict(profile.count_by_phase()))
+        content = b''.join(response.streaming_content)
+        self.assertIn(b'"recordsTotal": 10', content)
+        self.assertEqual({'count': 1, 'stream': 1}, dict(profile.count_by_phase()))
+
+    def test_own_connection_phase(self):
+        def select():
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+
+        profile = RequestProfile('test', timing=True)
+        with profile:
+            with profile.phase('fetch'):
+                thread = threading.Thread(target=on_own_connection(select, connection.alias, profile, 'count'))
+                thread.start()
+                thread.join()
+        self.assertEqual([('count', 'SELECT 1')], profile.queries)
+        self.assertIn('count', profile.timings)
+
+    def test_profile_datatables_request(self):
+        num_subclasses = len(UserDatatablesView.__subclasses__())
+        for i in range(2):
+            response, profile = profile_datatables_request(UserDatatablesView, column_defs=UserDatatablesView.column_defs[1:])
+            self.assertEqual(200, response.status_code)
+        self.assertEqual(num_subclasses, len(UserDatatablesView.__subclasses__()))
+        self.assertEqual({'count': 1, 'fetch': 1}, dict(profile.count_by_phase()))
@@ -0,0 +1,67 @@
+from unittest import TestCase
+from django.contrib.auth.models import Permission
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from datatables_view import *
+from datatables_view.testing import build_datatables_request
+
+
+class PermissionDatatablesView(DatatablesView):
+    model = Permission
+    column_defs = [
+        {
+            'name': 'id',
+            'visible': False,
+        }, {
+            'name': 'codename',
+            'max_length': 8,
+        }, {
+            'name': 'app_label',
+            'foreign_field': 'content_type__app_label',
+        }
+    ]
+
+
+class InstancePermissionDatatablesView(PermissionDatatablesView):
+    use_values_list = False
+
+
+class CustomizedPermissionDatatablesView(PermissionDatatablesView):
+
+    def customize_row(self, row, obj):
+        row['codename'] = obj.codename.upper()
+
+
+class ValuesListTestCase(TestCase):
+
+    def get_view(self, view_class):
+        view = view_class()
+        view.initialize(build_datatables_request(view_class, order=[[1, 'asc']]))
+        return view
+
+    def test_values_list_paths(self):
+        view = self.get_view(PermissionDatatablesView)
+        self.assertEqual(['id', 'codename', 'content_type__app_label', 'id'], view.get_values_list_paths(None))
+
+        # Not available for customized rows ...
+        self.assertIsNone(self.get_view(CustomizedPermissionDatatablesView).get_values_list_paths(None))
+        self.assertIsNone(self.get_view(InstancePermissionDatatablesView).get_values_list_paths(None))
+
+        # ... nor for to-many relations
+        column = Column.column_factory(Permission, {'name': 'group', 'foreign_field': 'group__name'})
+        self.assertIsNone(column.get_values_path(Permission))
+        column = Column.column_factory(Permission, {'name': 'content_type'})
+        self.assertIsNone(column.get_values_path(Permission))
+
+    def test_same_rows(self):
+        view = self.get_view(PermissionDatatablesView)
+        qs = view.get_initial_queryset().order_by('codename')
+        with CaptureQueriesContext(connection) as context:
+            rows = view.prepare_results(None, qs)
+        self.assertEqual(1, len(context.captured_queries))
+        self.assertGreater(len(rows), 0)
+        self.assertEqual(self.get_view(InstancePermissionDatatablesView).prepare_results(None, qs), rows)
+
+    def test_customized_rows(self):
+        response = CustomizedPermissionDatatablesView.as_view()(build_datatables_request(CustomizedPermissionDatatablesView, order=[[1, 'asc']]))
+        self.assertIn(b'ADD_GROUP', response.content)
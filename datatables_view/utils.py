@@ -1,10 +1,14 @@
 import pprint
 import datetime
+import re
+import django
+from functools import lru_cache
+from itertools import islice
 from django.utils import timezone
 from django.conf import settings
 from django.utils import formats
-
-import pytz
+from django.db.models import prefetch_related_objects
+from django.utils import dateformat
 
 try:
     import sqlparse
@@ -15,6 +19,10 @@ except ImportError:
             return text
 
 
+# Dates always contain digits
+DIGIT_RE = re.compile(r'\d')
+
+
 def trace(message, prompt=''):
     print('\n\x1b[1;36;40m', end='')
     if prompt:
@@ -37,6 +45,24 @@ def prettyprint_queryset(qs):
     print('\x1b[0m\n')
 
 
+def iterate_queryset(qs, chunk_size):
+    """
+    Same as qs.iterator(chunk_size=chunk_size), but prefetch_related() lookups
+    (otherwise ignored by iterator()) are applied to each chunk in turn
+    """
+    lookups = qs._prefetch_related_lookups
+    if not lookups:
+        yield from qs.iterator(chunk_size=chunk_size)
+        return
+    iterator = qs.prefetch_related(None).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        prefetch_related_objects(chunk, *lookups)
+        yield from chunk
+
+
 def format_datetime(dt, include_time=True):
     """
     Here we adopt the following rule:
@@ -50,8 +76,7 @@ def format_datetime(dt, include_time=True):
         try:
             dt = timezone.localtime(dt)
         except:
-            local_tz = pytz.timezone(getattr(settings, 'TIME_ZONE', 'UTC'))
-            dt = local_tz.localize(dt)
+            dt = timezone.make_aware(dt, timezone.get_default_timezone())
     else:
         assert isinstance(dt, datetime.date)
         include_time = False
@@ -63,15 +88,116 @@ def format_datetime(dt, include_time=True):
     return text
 
 
-def parse_date(formatted_date):
-    parsed_date = None
-    for date_format in formats.get_format('DATE_INPUT_FORMATS'):
+def compile_format_datetime(include_time=True):
+    """
+    Same as format_datetime(), but returns a function;
+    the active timezone and date format are resolved once, rather than for each value
+    """
+    use_l10n = getattr(settings, 'USE_L10N', False)
+    date_format = formats.get_format('SHORT_DATE_FORMAT', use_l10n=use_l10n)
+    current_timezone = timezone.get_current_timezone()
+    local_tz = timezone.get_default_timezone()
+
+    def format_value(dt):
+        if dt is None:
+            return ''
+        if isinstance(dt, datetime.datetime):
+            try:
+                dt = timezone.localtime(dt, current_timezone)
+            except:
+                dt = timezone.make_aware(dt, local_tz)
+            text = dateformat.format(dt, date_format)
+            if include_time:
+                text += dt.strftime(' %H:%M:%S')
+            return text
+        return dateformat.format(dt, date_format)
+
+    return format_value
+
+
+# strptime() directives translated by compile_date_parser()
+DATE_DIRECTIVES = {
+    '%Y': r'(?P<Y>\d{4})',
+    '%y': r'(?P<y>\d{2})',
+    '%m': r'(?P<m>\d{1,2})',
+    '%d': r'(?P<d>\d{1,2})',
+}
+
+
+@lru_cache(maxsize=None)
+def compile_date_parser(input_formats):
+    """
+    Translates each of the given strptime() formats into a regular expression;
+    formats with any directive other than %Y, %y, %m and %d are kept as they are,
+    and parsed with strptime()
+    """
+    parsers = []
+    for date_format in input_formats:
+        pattern = ''
+        for token in re.split(r'(%.)', date_format):
+            if token in DATE_DIRECTIVES:
+                pattern += DATE_DIRECTIVES[token]
+            elif token.startswith('%') and len(token) == 2:
+                pattern = None
+                break
+            else:
+                pattern += re.escape(token)
+        parsers.append((re.compile(pattern + '$') if pattern is not None else None, date_format))
+    return tuple(parsers)
+
+
+@lru_cache(maxsize=1024)
+def _parse_date(formatted_date, input_formats):
+    for regex, date_format in compile_date_parser(input_formats):
         try:
-            parsed_date = datetime.datetime.strptime(formatted_date, date_format)
+            if regex is None:
+                return datetime.datetime.strptime(formatted_date, date_format).date()
+            match = regex.match(formatted_date)
+            if match is None:
+                continue
+            values = match.groupdict()
+            if 'Y' in values:
+                year = int(values['Y'])
+            else:
+                # Same as strptime(): 69-99 -> 1969-1999, 00-68 -> 2000-2068
+                year = int(values['y'])
+                year += 1900 if year >= 69 else 2000
+            return datetime.date(year, int(values['m']), int(values['d']))
         except ValueError:
             continue
-        else:
-            break
-    if not parsed_date:
+    return None
+
+
+def parse_date(formatted_date):
+    """
+    Parses formatted_date according to the DATE_INPUT_FORMATS of the active language;
+    raises ValueError when no format matches
+    """
+    parsed_date = None
+    if formatted_date and DIGIT_RE.search(formatted_date):
+        parsed_date = _parse_date(formatted_date, tuple(formats.get_format('DATE_INPUT_FORMATS')))
+    if parsed_date is None:
         raise ValueError
-    return parsed_date.date()
+    return parsed_date
+
+
+def start_of_day(day):
+    """
+    The first instant of the given date, as an aware datetime
+    in the active timezone (or naive, when USE_TZ = False)
+    """
+    value = datetime.datetime.combine(day, datetime.time.min)
+    if settings.USE_TZ:
+        if django.VERSION < (4, 0):
+            value = timezone.make_aware(value, timezone.get_current_timezone(), is_dst=False)
+        else:
+            # zoneinfo resolves ambiguous and missing times by itself ("is_dst" has been removed)
+            value = timezone.make_aware(value, timezone.get_current_timezone())
+    return value
+
+
+def is_ajax(request):
+    """
+    Replaces request.is_ajax(), which has been removed in Django 4.0
+    """
+    return request.META.get('HTTP_X_REQUESTED_WITH') == 'XMLHttpRequest'
@@ -4,12 +4,16 @@ from __future__ import absolute_import, unicode_literals
 
 import datetime
 import json
+import sys
 from django.views.generic import View
-from django.http.response import HttpResponse, HttpResponseBadRequest
+from django.http.response import HttpResponse, HttpResponseBadRequest, HttpResponseNotModified
+from django.http.response import StreamingHttpResponse
 from django.core.paginator import Paginator
+from django.core.exceptions import ImproperlyConfigured
 from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.db.models import Q
+from django.db.models import Prefetch
 from django.shortcuts import render
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
@@ -19,23 +23,81 @@ from django.utils.safestring import mark_safe
 from django.template.loader import render_to_string
 from django.template import TemplateDoesNotExist
 from django.template import loader, Context
-from django.utils.translation import ugettext_lazy as _
+from django.utils.translation import gettext_lazy as _
+from django.utils import translation
+from django.utils import timezone
+from django.utils.http import parse_etags
+from django.utils.http import quote_etag
 
 from .columns import Column
 from .columns import ForeignColumn
 from .columns import ColumnLink
 from .columns import PlaceholderColumnLink
 from .columns import Order
+from .columns import model_fields_lut
+from .columns import resolve_field_path
+from .schema import TableSchema
+from .pagination import KeysetPaginator
+from .pagination import LookaheadPaginator
+from .pagination import capped_count
+from .pagination import page_bounds
+from .counting import RecordsCount
+from .counting import cached_count
+from .counting import count_fingerprint
 from .exceptions import ColumnOrderError
 from .utils import prettyprint_queryset
 from .utils import trace
 from .utils import format_datetime
+from .utils import iterate_queryset
+from .utils import is_ajax
 from .filters import build_column_filter
+from .filters import build_date_range_filter
+from .filters import SearchPlan
+from .export import EXPORT_FORMATS
+from .export import iter_export_content
+from .export import gzip_content
+from .search import IContainsSearchBackend
+from .instrumentation import NullProfile
+from .instrumentation import RequestProfile
+from .cache import cached_queryset_values
+from .cache import build_cache_key
+from .cache import get_cache
+from .cache import get_model_generation
+from .cache import list_related_models
+from .cache import queryset_fingerprint
+from .concurrency import get_executor
+from .concurrency import on_own_connection
+from .concurrency import supports_concurrent_queries
 from .app_settings import MAX_COLUMNS
 from .app_settings import ENABLE_QUERYSET_TRACING
 from .app_settings import ENABLE_QUERYDICT_TRACING
 from .app_settings import TEST_FILTERS
 from .app_settings import DISABLE_QUERYSET_OPTIMIZATION
+from .app_settings import AUTOFILTER_CACHE_TIMEOUT
+from .app_settings import AUTOFILTER_MAX_CHOICES
+from .app_settings import AUTOFILTER_PAGE_SIZE
+from .app_settings import COUNT_CACHE_TIMEOUT
+from .app_settings import ESTIMATE_COUNT_THRESHOLD
+from .app_settings import STREAMING_THRESHOLD
+from .app_settings import STREAMING_CHUNK_SIZE
+from .app_settings import MAX_QUERIES
+from .app_settings import N_PLUS_ONE_THRESHOLD
+from .app_settings import RAISE_QUERY_BUDGET_EXCEEDED
+from .app_settings import ENABLE_TIMING
+from .app_settings import SEARCH_DELAY
+from .app_settings import DROP_STALE_DRAWS
+from .app_settings import CONCURRENT_QUERIES
+
+
+# Used when the view doesn't specify a "search_backend"
+DEFAULT_SEARCH_BACKEND = IContainsSearchBackend()
+
+# How long the latest draw of each table is remembered (see "drop_stale_draws")
+DRAW_CACHE_TIMEOUT = 3600
+
+
+def is_overridden(view, name):
+    return getattr(type(view), name) is not getattr(DatatablesView, name)
 
 
 class DatatablesView(View):
@@ -61,185 +123,150 @@ class DatatablesView(View):
     show_column_filters = None
 
     disable_queryset_optimization = False
+    profile = NullProfile()
+    keyset_pagination = False
+    count_cache_timeout = None
+    count_estimator = None
+    estimate_count_threshold = None
+    exact_count = True
+    count_cap = None
+    response_cache_timeout = 0
+    use_etags = False
+    streaming_threshold = None
+    streaming_chunk_size = None
+    max_queries = None
+    n_plus_one_threshold = None
+    enable_timing = None
+    use_values_list = True
+    search_backend = None
+    search_delay = None
+    drop_stale_draws = None
+    concurrent_queries = None
+
+    # Request parameters handled by read_parameters(), or otherwise irrelevant for data extraction
+    QUERY_PARAMETERS = ('draw', 'start', 'length', 'date_from', 'date_to', 'cursor', 'cursor_direction', 'action', 'table_token', '_')
+
+    def __init_subclass__(cls, **kwargs):
+        super(DatatablesView, cls).__init_subclass__(**kwargs)
+        # Let full-text search backends keep their index in sync
+        search_backend = cls.__dict__.get('search_backend', None)
+        if search_backend is not None and hasattr(search_backend, 'register_view_class'):
+            search_backend.register_view_class(cls)
+
+    def initialize(self, request, collect_autofilter_choices=True):
+
+        # Retrieve the compiled (and possibly cached) table schema
+        schema = self.get_table_schema(request)
+        self.latest_by = schema.latest_by
+        self.show_date_filters = schema.show_date_filters
+        self.show_column_filters = schema.show_column_filters
+
+        # For each table column, we copy the "column spec" dictionary from the schema,
+        # since it may be customized for the current request;
+        # both "column spec" dictionary and the column object are saved in "column_index"
+        # to speed up later lookups;
+        # Finally, we collect "autofilter" choices, if required
+        # (these are only needed by the client, to build the column filters;
+        # see update_autofilter_choices())
 
-    def initialize(self, request):
-
-        # Retrieve and normalize latest_by fieldname
-        latest_by = self.get_latest_by(request)
-        if latest_by is None:
-            latest_by = getattr(self.model._meta, 'get_latest_by', None)
-        if isinstance(latest_by, (list, tuple)):
-            latest_by = latest_by[0] if len(latest_by) > 0 else ''
-        if latest_by:
-            if latest_by.startswith('-'):
-                latest_by = latest_by[1:]
-        self.latest_by = latest_by
-
-        # Grab column defs and initialize self.column_specs
-        column_defs_ex = self.get_column_defs(request)
         self.column_specs = []
-        for c in column_defs_ex:
-
-            column = {
-                'name': '',
-                'data': None,
-                'title': '',
-                'searchable': False,
-                'orderable': False,
-                'visible': True,
-                'foreign_field': None,
-                'placeholder': False,
-                'className': None,
-                'defaultContent': None,
-                'width': None,
-                'choices': None,
-                'initialSearchValue': None,
-                'autofilter': False,
-                'boolean': False,
-                'max_length': 0,
-            }
-
-            #valid_keys = [key for key in column.keys()][:]
-            #valid_keys = column.keys().copy()
-            valid_keys = list(column.keys())
+        self.column_index = {}
+        for column_spec, column, use_autofilter in schema.columns:
 
-            column.update(c)
+            cs = dict(column_spec)
 
             # We now accept a collable as "initialSearchValue"
-            if callable(column['initialSearchValue']):
-                column['initialSearchValue'] = column['initialSearchValue']()
+            if callable(cs['initialSearchValue']):
+                cs['initialSearchValue'] = cs['initialSearchValue']()
 
-            # TODO: do we really want to accept an empty column name ?
-            # Investigate !
-            if c['name']:
+            self.column_specs.append(cs)
+            self.column_index[cs['name']] = {
+                'spec': cs,
+                'column': column,
+                'use_autofilter': use_autofilter,
+            }
 
-                # Detect unexpected keys
-                for key in c.keys():
-                    if not key in valid_keys:
-                        raise Exception('Unexpected key "%s" for column "%s"' % (key, c['name']))
+        if collect_autofilter_choices:
+            self.update_autofilter_choices(request)
 
-                if 'title' in c:
-                    title = c['title']
-                else:
-                    try:
-                        title = self.model._meta.get_field(c['name']).verbose_name.title()
-                    except:
-                        title = c['name']
-
-                column['name'] = c['name']
-                column['data'] = c['name']
-                #column['title'] = c.get('title') if 'title' in c else self.model._meta.get_field(c['name']).verbose_name.title()
-                column['title'] = title
-                column['searchable'] = c.get('searchable', column['visible'])
-                column['orderable'] = c.get('orderable', column['visible'])
-
-            self.column_specs.append(column)
-
-        # # build LUT for column objects
-        # #
-        # #    self.column_objs_lut = {
-        # #        'id': <datatables_view.columns.Column object at 0x109d82850>,
-        # #        'code': <datatables_view.columns.Column object at 0x109d82f10>,
-        # #        ...
-        # #
-        # self.column_objs_lut = Column.collect_model_columns(
-        #     self.model,
-        #     self.column_specs
-        # )
-
-        # For each table column, we build either a Columns or ForeignColumns as required;
-        # both "column spec" dictionary and the column object are saved in "column_index"
-        # to speed up later lookups;
-        # Finally, we elaborate "choices" list
+        if ENABLE_QUERYDICT_TRACING:
+            trace(self.column_specs, prompt='column_specs')
 
-        self.column_index = {}
+    def update_autofilter_choices(self, request):
         for cs in self.column_specs:
+            item = self.column_index[cs['name']]
+            if item['spec'] is cs and item['use_autofilter']:
+                choices = self.list_autofilter_choices(request, cs, item['column'].model_field, cs['initialSearchValue'])
+                cs['choices'] = choices if len(choices) > 0 else None
 
-            key = cs['name']
-            column = Column.column_factory(self.model, cs)
-            choices = []
+    def get_table_schema(self, request):
+        """
+        Returns the TableSchema for this view;
 
-            #
-            # Adjust choices
-            # we do this here since the model field itself is finally available
-            #
-
-            # (1) None (default) or False: no choices (use text input box)
-            if cs['choices'] == False:
-                # Do not use choices
-                cs['choices'] = None
-            # (2) True: use Model's field choices;
-            #     - failing that, we might use "autofilter"; that is: collect the list of distinct values from db table
-            #     - BooleanFields deserve a special treatement
-            elif cs['choices'] == True:
-
-                # For boolean fields, provide (None)/Yes/No choice sequence
-                if isinstance(column.model_field, models.BooleanField):
-                    if column.model_field.null:
-                        # UNTESTED !
-                        choices = [(None, ''), ]
-                    else:
-                        choices = []
-                    choices += [(True, _('Yes')), (False, _('No'))]
-                elif cs['boolean']:
-                    choices += [(True, _('Yes')), (False, _('No'))]
-                else:
-                    # Otherwise, retrieve field's choices, if any ...
-                    choices = getattr(column.model_field, 'choices', None)
-                    if choices is None:
-                        choices = []
-                    else:
-                        #
-                        # Here, we could abbreviate select's options as well;
-                        # however, the caller can easily apply a 'width' css attribute to the select tag, instead
-                        #
-                        # max_length = cs['max_length']
-                        # if max_length <= 0:
-                        #     choices = [(c[0], c[1]) for c in choices]
-                        # else:
-                        #     choices = [(c[0], self.clip_value(c[1], max_length, False)) for c in choices]
-                        #
-                        choices = choices[:]
-
-                # ... or collect distict values if 'autofilter' has been enabled
-                if len(choices) <= 0 and cs['autofilter']:
-                    choices = self.list_autofilter_choices(request, cs, column.model_field, cs['initialSearchValue'])
-                cs['choices'] = choices if len(choices) > 0 else None
-            # (3) Otherwise, just use the sequence of choices that has been supplied.
+        the schema is compiled on first usage, then cached in the view class
+        and reused by subsequent requests, unless get_table_schema_key()
+        returns None.
+        """
+        key = self.get_table_schema_key(request)
+        if key is None:
+            return self.compile_table_schema(request)
+
+        view_class = type(self)
+        if '_table_schemas' not in view_class.__dict__:
+            view_class._table_schemas = {}
+        schemas = view_class._table_schemas
+
+        key = (self.model, key)
+        schema = schemas.get(key)
+        if schema is None:
+            schema = self.compile_table_schema(request)
+            schemas[key] = schema
+        return schema
+
+    def get_table_schema_key(self, request):
+        """
+        Override to customize based of request.
 
+        Provides the key used to cache the compiled table schema, or None to disable caching;
+        by default, the key is made of the contents of column_defs (and of latest_by, etc.),
+        and of the variant returned by get_table_schema_variant(request).
 
-            self.column_index[key] = {
-                'spec': cs,
-                'column': column,
-            }
+        When any of get_column_defs(), get_latest_by(), get_show_date_filters()
+        or get_show_column_filters() is overridden, caching is disabled,
+        unless get_table_schema_variant() is overridden as well.
+        """
+        if not is_overridden(self, 'get_table_schema_variant'):
+            for name in ('get_column_defs', 'get_latest_by', 'get_show_date_filters', 'get_show_column_filters'):
+                if is_overridden(self, name):
+                    return None
+        return (
+            self.get_table_schema_variant(request),
+            # The contents, not the identity, of column_defs: a list built at run-time
+            # could otherwise be mistaken for another one after being garbage collected
+            repr(self.column_defs),
+            self.latest_by,
+            self.show_date_filters,
+            self.show_column_filters,
+        )
 
-        # Initialize "show_date_filters"
-        show_date_filters = self.get_show_date_filters(request)
-        if show_date_filters is None:
-            show_date_filters = bool(self.latest_by)
-        self.show_date_filters = show_date_filters
-
-        # If global date filter is visible,
-        # add class 'get_latest_by' to the column used for global date filtering
-        if self.show_date_filters and self.latest_by:
-            column_def = self.column_spec_by_name(self.latest_by)
-            if column_def:
-                if column_def['className']:
-                    column_def['className'] += 'latest_by'
-                else:
-                    column_def['className'] = 'latest_by'
+    def get_table_schema_variant(self, request):
+        """
+        Override to customize based of request.
 
-        # Initialize "show_column_filters"
-        show_column_filters = self.get_show_column_filters(request)
-        if show_column_filters is None:
-            # By default we show the column filters if there is at least
-            # one searchable and visible column
-            num_searchable_columns = len([c for c in self.column_specs if c.get('searchable') and c.get('visible')])
-            show_column_filters = (num_searchable_columns > 0)
-        self.show_column_filters = show_column_filters
+        Identifies the variant of column_defs (latest_by, etc.) provided for request
+        by get_column_defs(), get_latest_by(), get_show_date_filters() or get_show_column_filters();
+        the schema is compiled once for each variant
+        """
+        return None
 
-        if ENABLE_QUERYDICT_TRACING:
-            trace(self.column_specs, prompt='column_specs')
+    def compile_table_schema(self, request):
+        return TableSchema(
+            self.model,
+            self.get_column_defs(request),
+            self.get_latest_by(request),
+            self.get_show_date_filters(request),
+            self.get_show_column_filters(request),
+        )
 
     def get_column_defs(self, request):
         """
@@ -298,6 +325,21 @@ class DatatablesView(View):
         """
         return self.show_column_filters
 
+    def get_client_column_specs(self):
+        """
+        The column specs sent to the client for "action=initialize";
+        server-side only values, like custom (callable) lookups, are left out;
+        columns without a "search_delay" inherit the view's one
+        """
+        search_delay = self.search_delay if self.search_delay is not None else SEARCH_DELAY
+        column_specs = []
+        for cs in self.column_specs:
+            cs = {key: value for key, value in cs.items() if not callable(value)}
+            if cs['search_delay'] is None:
+                cs['search_delay'] = search_delay
+            column_specs.append(cs)
+        return column_specs
+
     def column_obj(self, name):
         """
         Lookup columnObj for the column_spec identified by 'name'
@@ -337,9 +379,25 @@ class DatatablesView(View):
         if not getattr(request, 'REQUEST', None):
             request.REQUEST = request.GET if request.method=='GET' else request.POST
 
-        self.initialize(request)
-        if request.is_ajax():
-            action = request.REQUEST.get('action', '')
+        # Watch queries and time each phase (see get_profile())
+        self.profile = self.get_profile(request)
+        with self.profile:
+            response = self.dispatch_action(request, request.REQUEST.get('action', ''), *args, **kwargs)
+            if response.streaming:
+                # Rows are retrieved while the response is being sent
+                response.streaming_content = self.profile.stream(response.streaming_content)
+        self.profile.report(self, request, response)
+        return response
+
+    def dispatch_action(self, request, action, *args, **kwargs):
+
+        with self.profile.phase('initialize'):
+            self.initialize(request, collect_autofilter_choices=False)
+        if action == 'export':
+            # A file download (javascript sets window.location), not an ajax call:
+            # no "X-Requested-With" header is sent, hence is_ajax() is not required
+            return self.export(request)
+        if is_ajax(request):
             if action == 'initialize':
 
                 # Sanity check for initial order
@@ -353,6 +411,15 @@ class DatatablesView(View):
                     elif not self.column_specs[col]['orderable']:
                         raise Exception('Column %d is not orderable' % col)
 
+                # Skip "autofilter" queries altogether when the client is up-to-date
+                etag = self.get_initialize_etag(request, initial_order) if self.use_etags else None
+                if etag is not None:
+                    response = self.get_not_modified_response(request, etag)
+                    if response is not None:
+                        return response
+
+                self.update_autofilter_choices(request)
+
                 # Initial values for column filters, when supplied
                 # See: https://datatables.net/reference/option/searchCols
                 searchCols = [
@@ -360,14 +427,29 @@ class DatatablesView(View):
                     for cs in self.column_specs
                 ]
 
-                return JsonResponse({
-                    'columns': self.column_specs,
+                response = JsonResponse({
+                    'columns': self.get_client_column_specs(),
                     'searchCols': searchCols,
                     'order': initial_order,
                     'length_menu': self.get_length_menu(request),
                     'show_date_filters': self.show_date_filters,
                     'show_column_filters': self.show_column_filters,
                 })
+                if etag is not None:
+                    self.set_etag(response, etag)
+                return response
+            elif action == 'choices':
+                try:
+                    column_name = request.REQUEST['column']
+                    prefix = request.REQUEST.get('q', '')
+                    limit = int(request.REQUEST.get('limit', AUTOFILTER_PAGE_SIZE))
+                    limit = max(min(limit, AUTOFILTER_PAGE_SIZE), 1)
+                    page = int(request.REQUEST.get('page', 1))
+                    offset = int(request.REQUEST.get('offset', (page - 1) * limit))
+                    return JsonResponse(self.list_autofilter_choices_page(
+                        request, column_name, prefix, max(offset, 0), limit))
+                except (KeyError, ValueError):
+                    return HttpResponseBadRequest()
             elif action == 'details':
                 #row_id = request.REQUEST.get('id')
                 row_id = request.REQUEST.get(self.table_row_id_fieldname)
@@ -382,6 +464,85 @@ class DatatablesView(View):
             #response = HttpResponse(self.render_table(request))
         return response
 
+    def export(self, request):
+        """
+        Streams all the rows selected by the current filters (column filters, global search
+        and date range) as either CSV, TSV or NDJSON, optionally gzipped;
+        expects the same parameters as get(), plus "format" and "gzip"
+        """
+        export_format = request.REQUEST.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return HttpResponseBadRequest()
+
+        # Paging is irrelevant here
+        query_dict = request.REQUEST.copy()
+        query_dict['draw'] = query_dict.get('draw', '0')
+        query_dict['start'] = '0'
+        query_dict['length'] = '-1'
+        try:
+            params = self.read_parameters(query_dict)
+        except ValueError:
+            return HttpResponseBadRequest()
+
+        qs = self.get_initial_queryset(request)
+        if not DISABLE_QUERYSET_OPTIMIZATION and not self.disable_queryset_optimization:
+            qs = self.optimize_queryset(qs)
+        qs = self.prepare_queryset(params, qs)
+
+        # Use a server-side cursor (where available) and never hold the full resultset in memory
+        column_specs = self.get_export_column_specs(request)
+        rows = self.iter_export_rows(
+            request,
+            iterate_queryset(qs, self.get_streaming_chunk_size()),
+            [cs['name'] for cs in column_specs],
+        )
+        content = iter_export_content(
+            export_format,
+            [cs['title'] for cs in column_specs],
+            [cs['name'] for cs in column_specs],
+            rows,
+        )
+
+        content_type, extension = EXPORT_FORMATS[export_format]
+        filename = '%s.%s' % (self.get_export_filename(request), extension)
+        if request.REQUEST.get('gzip', '') not in ('', '0', 'false'):
+            content = gzip_content(content)
+            content_type = 'application/gzip'
+            filename += '.gz'
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = 'attachment; filename="%s"' % filename
+        return response
+
+    def get_export_column_specs(self, request):
+        """
+        Override to customize based of request.
+
+        Lists the specs of the columns to be exported; by default, all visible columns
+        """
+        return [cs for cs in self.column_specs if cs['name'] and cs['visible']]
+
+    def get_export_filename(self, request):
+        """
+        Override to customize based of request
+        """
+        return self.model._meta.model_name
+
+    def iter_export_rows(self, request, qs, columns):
+        """
+        Same as iter_results(), but values are not clipped
+        """
+        renderers = [
+            (fieldname, render)
+            for fieldname, render in self.compile_row_renderers(request, clip=False)[0]
+            if fieldname in columns
+        ]
+        customize_row = self.customize_row
+        for cur_object in qs:
+            retdict = {fieldname: render(cur_object) for fieldname, render in renderers}
+            customize_row(retdict, cur_object)
+            yield retdict
+
     def get_model_admin(self):
         from django.contrib import admin
         if self.model in admin.site._registry:
@@ -389,8 +550,10 @@ class DatatablesView(View):
         return None
 
     def render_row_details(self, id, request=None):
-
         obj = self.model.objects.get(id=id)
+        return self.render_object_details(obj, request)
+
+    def render_object_details(self, obj, request=None):
 
         # Search a custom template for rendering, if available
         try:
@@ -471,12 +634,14 @@ class DatatablesView(View):
 
         t0 = datetime.datetime.now()
 
-        if not request.is_ajax():
+        if not is_ajax(request):
             return HttpResponseBadRequest()
 
+        profile = self.profile
         try:
             query_dict = request.REQUEST
-            params = self.read_parameters(query_dict)
+            with profile.phase('parse'):
+                params = self.read_parameters(query_dict)
         except ValueError:
             return HttpResponseBadRequest()
 
@@ -484,35 +649,553 @@ class DatatablesView(View):
             trace(query_dict, prompt='query_dict')
             trace(params, prompt='params')
 
+        # Remember the latest draw of the table, and give up on older ones
+        drop_stale_draws = self.get_drop_stale_draws()
+        if drop_stale_draws and self.is_stale_draw(request, params['draw'], register=True):
+            return self.stale_draw_response(params['draw'])
+
+        # Nothing to do when the client already holds an up-to-date response,
+        # or when the response is available in cache
+        with profile.phase('cache'):
+            response, etag, cache_key = self.get_cached_response(request, params)
+        if response is not None:
+            return response
+
         # Prepare the queryset and apply the search and order filters
-        qs = self.get_initial_queryset(request)
+        with profile.phase('filter'):
+            initial_qs = self.get_initial_queryset(request)
+            qs = self.get_filtered_queryset(params, initial_qs)
+
+        # A newer draw may have arrived in the meantime: skip the expensive part
+        if drop_stale_draws and self.is_stale_draw(request, params['draw']):
+            return self.stale_draw_response(params['draw'])
+
+        if self.use_concurrent_queries(qs, params):
+            # Count records while retrieving the page
+            with profile.phase('fetch'):
+                response_dict = self.get_concurrent_response_dict(request, initial_qs, qs, params)
+        else:
+            # Count records (unless "exact_count" has been disabled)
+            with profile.phase('count'):
+                records_count = self.count_records(request, initial_qs, qs) if self.exact_count else None
+
+            # Render and send large pages incrementally
+            if self.use_streaming(params):
+                response = StreamingHttpResponse(
+                    self.stream_response_content(request, qs, params, records_count),
+                    content_type="application/json")
+                if etag is not None:
+                    self.set_etag(response, etag)
+                return response
+
+            # Slice result
+            response_dict = self.get_paginated_response_dict(request, qs, params, records_count)
+        with profile.phase('footer'):
+            response_dict['footer_message'] = self.footer_message(qs, params)
+
+        # Prepare response
+        response = self.build_response(params, response_dict, etag, cache_key)
+
+        # Trace elapsed time
+        if ENABLE_QUERYSET_TRACING:
+            td = datetime.datetime.now() - t0
+            ms = (td.seconds * 1000) + (td.microseconds / 1000.0)
+            trace('%d [ms]' % ms, prompt="Table rendering time")
+
+        return response
+
+    def get_paginated_response_dict(self, request, qs, params, records_count):
+        """
+        Retrieves and renders the requested page; records_count is None
+        when "exact_count" has been disabled
+        """
+        paginator = self.get_paginator(qs, params, records_count)
+        if records_count is not None:
+            paginator.count = records_count.filtered
+            response_dict = self.get_response_dict(request, paginator, params['draw'], params['start'],
+                                                   records_total=records_count.total)
+            if records_count.estimated:
+                response_dict['recordsEstimated'] = True
+        elif self.count_cap:
+            with self.profile.phase('count'):
+                records_filtered, capped = capped_count(qs, self.count_cap)
+            paginator.count = records_filtered
+            response_dict = self.get_response_dict(request, paginator, params['draw'], params['start'])
+            if capped:
+                response_dict['recordsFilteredCapped'] = True
+                if params['length'] == -1:
+                    # "All" is limited to "count_cap" rows as well
+                    response_dict['dataTruncated'] = True
+        else:
+            response_dict = self.get_response_dict(request, paginator, params['draw'], params['start'])
+            if paginator.has_more:
+                response_dict['recordsFilteredUnknown'] = True
+        return response_dict
+
+    def use_concurrent_queries(self, qs, params):
+        """
+        Records are counted on a separate connection, while the page is retrieved,
+        when "concurrent_queries" (or DATATABLES_VIEW_CONCURRENT_QUERIES) is set and the database
+        allows it; keyset pagination, streaming and inexact counts are never concurrent
+        """
+        concurrent_queries = self.concurrent_queries if self.concurrent_queries is not None else CONCURRENT_QUERIES
+        return (
+            concurrent_queries and
+            self.exact_count and
+            params['length'] > 0 and
+            not self.keyset_pagination and
+            not self.use_streaming(params) and
+            supports_concurrent_queries(qs.db)
+        )
+
+    def get_concurrent_response_dict(self, request, initial_qs, qs, params):
+        """
+        Counts the records in a worker thread (on its own connection) while retrieving
+        the page requested by the client; when "start" turns out to be out of range,
+        the last page is retrieved once the count is known
+        """
+        per_page = params['length']
+        bottom, top = page_bounds(params['start'], per_page, sys.maxsize)
+        count_future = get_executor().submit(
+            on_own_connection(self.count_records, qs.db, self.profile, 'count'), request, initial_qs, qs)
+        data = self.prepare_results(request, qs[bottom:top])
+        records_count = count_future.result()
+        if page_bounds(params['start'], per_page, records_count.filtered)[0] != bottom:
+            bottom, top = page_bounds(params['start'], per_page, records_count.filtered)
+            data = self.prepare_results(request, qs[bottom:top])
+        return self.build_page_response_dict(params, records_count, data)
+
+    def build_page_response_dict(self, params, records_count, data):
+        """
+        Same as get_response_dict(), for a page already rendered
+        """
+        response_dict = {
+            "draw": params['draw'],
+            "recordsTotal": records_count.total,
+            "recordsFiltered": records_count.filtered,
+            "data": data,
+        }
+        if records_count.estimated:
+            response_dict['recordsEstimated'] = True
+        return response_dict
+
+    def get_drop_stale_draws(self):
+        if self.drop_stale_draws is None:
+            return DROP_STALE_DRAWS
+        return self.drop_stale_draws
+
+    def get_cached_response(self, request, params):
+        """
+        Returns (response, etag, cache_key), where response is either "not modified"
+        when the client already holds an up-to-date response ("use_etags"; see get_not_modified_response()),
+        the cached response ("response_cache_timeout"), or None
+        """
+        etag = None
+        cache_key = None
+        if not self.use_etags and not self.response_cache_timeout:
+            return None, etag, cache_key
+
+        query_signature = self.get_query_signature(request, params)
+        data_version = self.get_data_version()
+        if self.use_etags:
+            etag = build_cache_key('etag', query_signature, data_version)
+            response = self.get_not_modified_response(request, etag, params['draw'])
+            if response is not None:
+                return response, etag, cache_key
+
+        if self.response_cache_timeout:
+            cache_key = build_cache_key('response', query_signature, data_version)
+            content = get_cache().get(cache_key)
+            if content is not None:
+                response = HttpResponse(
+                    self.render_response_content(content, params['draw']),
+                    content_type="application/json")
+                if etag is not None:
+                    self.set_etag(response, etag)
+                return response, etag, cache_key
+
+        return None, etag, cache_key
+
+    def get_filtered_queryset(self, params, initial_qs):
+        """
+        Optimizes initial_qs, and applies the search and order filters
+        """
+        qs = initial_qs
         if not DISABLE_QUERYSET_OPTIMIZATION and not self.disable_queryset_optimization:
             qs = self.optimize_queryset(qs)
         qs = self.prepare_queryset(params, qs)
+        self.profile.set_queryset(qs)
         if ENABLE_QUERYSET_TRACING:
             prettyprint_queryset(qs)
+        return qs
 
-        # Slice result
-        paginator = Paginator(qs, params['length'] if params['length'] != -1 else qs.count())
-        response_dict = self.get_response_dict(request, paginator, params['draw'], params['start'])
-        response_dict['footer_message'] = self.footer_message(qs, params)
-
-        # Prepare response
+    def build_response(self, params, response_dict, etag=None, cache_key=None):
+        """
+        Encodes response_dict, and saves the result in cache when cache_key is given
+        """
+        with self.profile.phase('encode'):
+            content = self.encode_response_dict(response_dict)
+        if cache_key is not None:
+            get_cache().set(cache_key, content, self.response_cache_timeout)
         response = HttpResponse(
-            json.dumps(
-                response_dict,
-                cls=DjangoJSONEncoder
-            ),
+            self.render_response_content(content, params['draw']),
             content_type="application/json")
+        if etag is not None:
+            self.set_etag(response, etag)
+        return response
 
-        # Trace elapsed time
-        if ENABLE_QUERYSET_TRACING:
-            td = datetime.datetime.now() - t0
-            ms = (td.seconds * 1000) + (td.microseconds / 1000.0)
-            trace('%d [ms]' % ms, prompt="Table rendering time")
+    def get_profile(self, request):
+        """
+        Override to customize based of request.
+
+        Provides the RequestProfile used to watch the queries executed and time each phase,
+        or a NullProfile when neither a query budget ("max_queries"), N+1 detection
+        ("n_plus_one_threshold") nor timing ("enable_timing") are active
+        """
+        max_queries = self.max_queries if self.max_queries is not None else MAX_QUERIES
+        n_plus_one_threshold = self.n_plus_one_threshold if self.n_plus_one_threshold is not None else N_PLUS_ONE_THRESHOLD
+        enable_timing = self.enable_timing if self.enable_timing is not None else ENABLE_TIMING
+        if max_queries is None and not n_plus_one_threshold and not enable_timing:
+            return NullProfile()
+        return RequestProfile(
+            type(self).__name__,
+            max_queries=max_queries,
+            n_plus_one_threshold=n_plus_one_threshold,
+            raise_exceptions=RAISE_QUERY_BUDGET_EXCEEDED,
+            timing=enable_timing,
+        )
+
+    def encode_response_dict(self, response_dict):
+        """
+        Encodes response_dict as JSON, leaving out "draw",
+        so that the result can be reused for subsequent requests
+        """
+        response_dict = dict(response_dict)
+        response_dict.pop('draw', None)
+        return json.dumps(response_dict, cls=DjangoJSONEncoder)
+
+    def render_response_content(self, content, draw_idx):
+        return '{"draw": %d, %s' % (draw_idx, content[1:])
 
+    def get_cache_scope(self, request):
+        """
+        Override to customize based of request.
+
+        Identifies the data visible to the current request, and is used to keep
+        cached responses apart; by default, the SQL of get_initial_queryset(request) is used.
+
+        Override when the rendering depends on the request in any other way
+        (for example, when customize_row() checks the user permissions).
+        """
+        return queryset_fingerprint(self.get_initial_queryset(request))
+
+    def get_query_signature(self, request, params):
+        """
+        Identifies the data requested by the client, regardless of "draw"
+        """
+        query_dict = request.REQUEST
+        extra_parameters = sorted([
+            (key, query_dict.getlist(key))
+            for key in query_dict.keys()
+            if key not in self.QUERY_PARAMETERS and not key.startswith(('columns[', 'order[', 'search['))
+        ])
+        return build_cache_key(
+            'query',
+            self.get_cache_scope(request),
+            self.get_schema_signature(),
+            translation.get_language(),
+            timezone.get_current_timezone_name(),
+            params['start'],
+            params['length'],
+            params['date_from'],
+            params['date_to'],
+            params['cursor'],
+            params['cursor_direction'],
+            params.get('search_value'),
+            [(c.name, c.searchable, c.orderable, c.search_value) for c in params['column_links']],
+            [repr(order) for order in params['orders']],
+            extra_parameters,
+        )
+
+    def get_schema_signature(self):
+        """
+        Identifies the column specs of the current request, so that responses rendered
+        with a different schema (i.e. after changing column_defs) are never reused;
+        unlike get_table_schema_key(), it's the same for all processes
+        """
+        return json.dumps([
+            {key: value for key, value in cs.items() if key != 'initialSearchValue'}
+            for cs in self.get_client_column_specs()
+        ] + [self.latest_by], cls=DjangoJSONEncoder, sort_keys=True)
+
+    @classmethod
+    def get_cached_models(cls):
+        """
+        Lists the models whose changes expire data cached by this view (see "Response caching"):
+        the model and any model reached by "foreign_field" paths, when any cache or ETags are enabled.
+
+        Changes to other models are ignored, unless used by a view in the same process;
+        override when get_column_defs(request) reaches other models
+        """
+        count_cache_timeout = COUNT_CACHE_TIMEOUT if cls.count_cache_timeout is None else cls.count_cache_timeout
+        autofilter_cache_timeouts = [
+            AUTOFILTER_CACHE_TIMEOUT if column_def.get('autofilter_cache_timeout') is None else column_def['autofilter_cache_timeout']
+            for column_def in cls.column_defs if column_def.get('autofilter')
+        ]
+        if cls.model is None:
+            return []
+        if not (cls.response_cache_timeout or cls.use_etags or count_cache_timeout or any(autofilter_cache_timeouts)):
+            return []
+        return list_related_models(cls.model, cls.column_defs)
+
+    def get_data_version(self):
+        """
+        Changes whenever an instance of the model, or of any model
+        reached by "foreign_field" paths, is saved or deleted
+        """
+        return ','.join([
+            str(get_model_generation(model))
+            for model in list_related_models(self.model, self.column_specs)
+        ])
+
+    def use_streaming(self, params):
+        """
+        Large pages (and "All") are streamed when "streaming_threshold"
+        (or DATATABLES_VIEW_STREAMING_THRESHOLD) is > 0
+        """
+        threshold = self.streaming_threshold
+        if threshold is None:
+            threshold = STREAMING_THRESHOLD
+        return threshold > 0 and (params['length'] == -1 or params['length'] >= threshold)
+
+    def get_draw_cache_key(self, request):
+        """
+        Override to customize based of request.
+
+        Identifies the table instance which sent the request, by the "table_token"
+        generated by the client, and the session; returns None when no token is supplied
+        """
+        table_token = request.REQUEST.get('table_token', '')
+        if not table_token:
+            return None
+        session = getattr(request, 'session', None)
+        session_key = session.session_key if session is not None else None
+        return build_cache_key('draw', type(self).__name__, session_key, table_token)
+
+    def is_stale_draw(self, request, draw, register=False):
+        """
+        Tells whether a newer draw has already been requested for the same table;
+        with register=True, draw is recorded as the latest one.
+
+        This is a best effort: concurrent requests might both go through
+        """
+        key = self.get_draw_cache_key(request)
+        if key is None:
+            return False
+        cache = get_cache()
+        latest = cache.get(key)
+        if latest is not None and latest > draw:
+            return True
+        if register and latest != draw:
+            cache.set(key, draw, DRAW_CACHE_TIMEOUT)
+        return False
+
+    def stale_draw_response(self, draw):
+        """
+        Sent in place of the data for a superseded draw; the client discards it
+        """
+        return JsonResponse({'draw': draw, 'staleDraw': True})
+
+    def get_streaming_chunk_size(self):
+        if self.streaming_chunk_size is None:
+            return STREAMING_CHUNK_SIZE
+        return self.streaming_chunk_size
+
+    def stream_response_content(self, request, qs, params, records_count):
+        """
+        Produces the same JSON as get(), a few rows at a time:
+        "data" comes first, followed by the record counts; model instances are retrieved
+        with qs.iterator(), so that memory usage doesn't depend on the number of rows.
+
+        Pages are always sliced with OFFSET (keyset pagination is not used here).
+        """
+        start = params['start']
+        length = params['length']
+        tail = {}
+
+        if records_count is not None:
+            records_total = records_count.total
+            records_filtered = records_count.filtered
+            if records_count.estimated:
+                tail['recordsEstimated'] = True
+        elif self.count_cap:
+            records_filtered, capped = capped_count(qs, self.count_cap)
+            records_total = records_filtered
+            if capped:
+                tail['recordsFilteredCapped'] = True
+                if length == -1:
+                    tail['dataTruncated'] = True
+        else:
+            # Counted while streaming
+            records_total = records_filtered = None
+
+        if length == -1:
+            start = 0
+            page_qs = qs if records_filtered is None else qs[:records_filtered]
+        else:
+            if records_filtered is not None and start >= records_filtered:
+                # Same as get_response_dict(): move to the last page
+                start = max((records_filtered - 1) // length, 0) * length
+            # Fetch one more row to know whether more rows are available
+            page_qs = qs[start:start + length + (1 if records_filtered is None else 0)]
+
+        chunk_size = self.get_streaming_chunk_size()
+        yield '{"draw": %d, "data": [' % params['draw']
+        num_rows = 0
+        chunk = []
+        for row in self.iter_results(request, page_qs, chunk_size=chunk_size):
+            if length != -1 and num_rows >= length:
+                tail['recordsFilteredUnknown'] = True
+                break
+            chunk.append(json.dumps(row, cls=DjangoJSONEncoder))
+            num_rows += 1
+            if len(chunk) >= chunk_size:
+                yield ('' if num_rows <= chunk_size else ', ') + ', '.join(chunk)
+                chunk = []
+        if chunk:
+            yield ('' if num_rows <= len(chunk) else ', ') + ', '.join(chunk)
+
+        if records_filtered is None:
+            records_total = records_filtered = start + num_rows + (1 if tail.get('recordsFilteredUnknown') else 0)
+        tail.update({
+            'recordsTotal': records_total,
+            'recordsFiltered': records_filtered,
+            'footer_message': self.footer_message(qs, params),
+        })
+        yield '], ' + json.dumps(tail, cls=DjangoJSONEncoder)[1:]
+
+    def get_initialize_etag(self, request, initial_order):
+        """
+        Identifies the response to "action=initialize": the column specs (autofilter
+        choices excluded), the table settings and, when autofilter choices are
+        collected, the data they are collected from
+        """
+        parts = [
+            json.dumps(self.get_client_column_specs(), cls=DjangoJSONEncoder, sort_keys=True),
+            json.dumps(initial_order),
+            json.dumps(self.get_length_menu(request)),
+            self.show_date_filters,
+            self.show_column_filters,
+            translation.get_language(),
+        ]
+        if [item for item in self.column_index.values() if item['use_autofilter']]:
+            parts += [self.get_cache_scope(request), self.get_data_version()]
+        return build_cache_key('initialize', *parts)
+
+    def get_not_modified_response(self, request, etag, draw=None):
+        """
+        Returns the response for a client which already holds the current version (etag), or None.
+
+        As per RFC 9110, a matching "If-None-Match" header gets "304 Not Modified" for GET and HEAD,
+        and "412 Precondition Failed" for any other method. Since data requests are sent with POST,
+        the javascript code rather sends the ETag in the "X-Datatables-If-None-Match" header,
+        and receives {"draw": ..., "notModified": true} when nothing changed
+        """
+        if request.method in ('GET', 'HEAD'):
+            if self.etag_matches(request, etag):
+                return self.set_etag(HttpResponseNotModified(), etag)
+            return None
+        if self.etag_matches(request, etag, header='HTTP_X_DATATABLES_IF_NONE_MATCH'):
+            return self.set_etag(JsonResponse({'draw': draw, 'notModified': True}), etag)
+        if self.etag_matches(request, etag):
+            return HttpResponse(status=412)
+        return None
+
+    def etag_matches(self, request, etag, header='HTTP_IF_NONE_MATCH'):
+        """
+        Checks etag against the "If-None-Match" request header (or the given one)
+        """
+        if_none_match = request.META.get(header)
+        if not if_none_match:
+            return False
+        etags = parse_etags(if_none_match)
+        return '*' in etags or quote_etag(etag) in etags
+
+    def set_etag(self, response, etag):
+        response['ETag'] = quote_etag(etag)
+        # Always revalidate
+        response['Cache-Control'] = 'private, no-cache'
         return response
 
+    def count_records(self, request, initial_qs, qs):
+        """
+        Counts the records before ("recordsTotal") and after filtering ("recordsFiltered").
+
+        The total is cached when "count_cache_timeout" is set; when a "count_estimator"
+        is available, estimates are used instead of exact counts for tables larger
+        than "estimate_count_threshold".
+        """
+        records_total, estimated = self.count_records_total(request, initial_qs)
+        if count_fingerprint(initial_qs) == count_fingerprint(qs):
+            # No filters have been applied
+            return RecordsCount(records_total, records_total, estimated)
+
+        records_filtered = None
+        if self.count_estimator is not None and records_total > self.get_estimate_count_threshold():
+            records_filtered = self.count_estimator.estimate(qs)
+        if records_filtered is None:
+            records_filtered = qs.count()
+        else:
+            estimated = True
+        return RecordsCount(records_total, records_filtered, estimated)
+
+    def count_records_total(self, request, qs):
+        """
+        Returns the number of records in the initial queryset,
+        and whether it's an estimate
+        """
+        if self.count_estimator is not None:
+            records_total = self.count_estimator.estimate(qs)
+            if records_total is not None and records_total > self.get_estimate_count_threshold():
+                return records_total, True
+
+        timeout = self.count_cache_timeout
+        if timeout is None:
+            timeout = COUNT_CACHE_TIMEOUT
+        if timeout:
+            return cached_count(qs, timeout), False
+        return qs.count(), False
+
+    def get_estimate_count_threshold(self):
+        if self.estimate_count_threshold is None:
+            return ESTIMATE_COUNT_THRESHOLD
+        return self.estimate_count_threshold
+
+    def get_paginator(self, qs, params, records_count=None):
+        if self.keyset_pagination and not self.exact_count and not self.count_cap:
+            raise ImproperlyConfigured('keyset_pagination requires either "exact_count" or "count_cap"')
+
+        if records_count is None and not self.count_cap:
+            # Records won't be counted at all
+            return LookaheadPaginator(qs, params['length'])
+
+        if params['length'] != -1:
+            per_page = params['length']
+        elif records_count is not None:
+            per_page = max(records_count.filtered, 1)
+        else:
+            per_page = self.count_cap
+
+        if self.keyset_pagination and params['length'] != -1:
+            return KeysetPaginator(
+                qs,
+                per_page,
+                params['orders'],
+                cursor=params['cursor'],
+                direction=params['cursor_direction'],
+            )
+        return Paginator(qs, per_page)
+
     def read_parameters(self, query_dict):
         """
         Converts and cleans up the GET parameters.
@@ -520,6 +1203,8 @@ class DatatablesView(View):
         params = {field: int(query_dict[field]) for field in ['draw', 'start', 'length']}
         params['date_from'] = query_dict.get('date_from', None)
         params['date_to'] = query_dict.get('date_to', None)
+        params['cursor'] = query_dict.get('cursor', None)
+        params['cursor_direction'] = query_dict.get('cursor_direction', 'next')
 
         column_index = 0
         has_finished = False
@@ -630,42 +1315,177 @@ class DatatablesView(View):
             retdict[name] = self.clip_value(str(retdict[name]), max_length, True)
 
     def prepare_results(self, request, qs):
-        json_data = []
-        columns = [c['name'] for c in self.column_specs]
+        return list(self.iter_results(request, qs))
+
+    def fetch_results(self, request, qs):
+        """
+        Evaluates qs (i.e. the page sliced by a Paginator), retrieving values_list() rows
+        whenever possible; returns the rows and the values_list() paths (None for model instances).
+
+        When prepare_results() is overridden, qs is left for it to evaluate
+        """
+        if not isinstance(qs, models.QuerySet) or is_overridden(self, 'prepare_results'):
+            return qs, None
+        paths = self.get_values_list_paths(request)
+        if paths is not None:
+            return list(qs.values_list(*paths)), paths
+        return list(qs), None
+
+    def render_results(self, request, rows, paths):
+        """
+        Renders the rows returned by fetch_results()
+        """
+        if paths is not None:
+            return list(self.iter_values_list_results(request, rows, paths))
+        return self.prepare_results(request, rows)
+
+    def get_values_list_paths(self, request):
+        """
+        Lists the paths to be retrieved with values_list() to render the rows without
+        instantiating model objects; returns None when this is not possible:
+
+        - "use_values_list" has been disabled
+        - customize_row(), render_column() or get_table_row_id() have been overridden
+        - any column is not a concrete field, or is reached by a to-many relation
+        """
+        if not self.use_values_list:
+            return None
+        for name in ('customize_row', 'render_column', 'get_table_row_id'):
+            if is_overridden(self, name):
+                return None
+
+        paths = []
+        for cs in self.column_specs:
+            if cs['name']:
+                path = self.column_obj(cs['name']).get_values_path(self.model)
+                if path is None:
+                    return None
+                paths.append(path)
+        if self.table_row_id_fieldname:
+            field = model_fields_lut(self.model).get(self.table_row_id_fieldname)
+            if field is None or not field.concrete:
+                return None
+            paths.append(self.table_row_id_fieldname)
+        return paths
+
+    def iter_results(self, request, qs, chunk_size=None):
+        """
+        Renders each object as a dictionary, one object at a time;
+        querysets are retrieved with values_list() whenever possible
+        """
+        if isinstance(qs, models.QuerySet):
+            paths = self.get_values_list_paths(request)
+            if paths is not None:
+                qs = qs.values_list(*paths)
+                if chunk_size:
+                    qs = qs.iterator(chunk_size=chunk_size)
+                yield from self.iter_values_list_results(request, qs, paths)
+                return
+            if chunk_size:
+                qs = iterate_queryset(qs, chunk_size)
+
+        renderers, clipped = self.compile_row_renderers(request)
+        customize_row = self.customize_row
+        clip_results = self.clip_results
+        get_table_row_id = self.get_table_row_id
         for cur_object in qs:
-            retdict = {
-                #fieldname: '<div class="field-%s">%s</div>' % (fieldname, self.render_column(cur_object, fieldname))
-                fieldname: self.render_column(cur_object, fieldname)
-                for fieldname in columns
-                if fieldname
-            }
+            retdict = {fieldname: render(cur_object) for fieldname, render in renderers}
 
-            self.customize_row(retdict, cur_object)
-            self.clip_results(retdict)
+            customize_row(retdict, cur_object)
+            if not clipped:
+                clip_results(retdict)
 
-            row_id = self.get_table_row_id(request, cur_object)
+            row_id = get_table_row_id(request, cur_object)
             if row_id:
                 # "Automatic addition of row ID attributes"
                 # https://datatables.net/examples/server_side/ids.html
                 retdict['DT_RowId'] = row_id
 
-            json_data.append(retdict)
-        return json_data
+            yield retdict
 
-    def get_response_dict(self, request, paginator, draw_idx, start_pos):
+    def iter_values_list_results(self, request, rows, paths):
+        """
+        Same as iter_results(), but renders tuples as retrieved with values_list(paths)
+        """
+        renderers, clipped = self.compile_row_renderers(request, values_list=True)
+        columns = tuple([(fieldname, render, index) for index, (fieldname, render) in enumerate(renderers)])
+        clip_results = self.clip_results
+        row_id_index = len(paths) - 1 if self.table_row_id_fieldname else None
+        row_id_prefix = self.table_row_id_prefix
+        for row in rows:
+            retdict = {fieldname: render(row[index]) for fieldname, render, index in columns}
+            if not clipped:
+                clip_results(retdict)
+            if row_id_index is not None:
+                retdict['DT_RowId'] = row_id_prefix + str(row[row_id_index])
+            yield retdict
+
+    def compile_row_renderers(self, request, values_list=False, clip=True):
+        """
+        Compiles the named columns into a tuple of (name, render) pairs, once per request;
+        render() receives either a model instance or, when values_list is True,
+        the raw value retrieved with values_list().
+
+        Returns the renderers, and whether they already clip the values to "max_length";
+        this is not possible when customize_row() or clip_results() have been overridden,
+        since clipping must follow customize_row().
+        """
+        clipped = clip and not is_overridden(self, 'customize_row') and not is_overridden(self, 'clip_results')
+        custom_render_column = is_overridden(self, 'render_column')
+
+        def clip_renderer(render, max_length):
+            clip_value = self.clip_value
+            return lambda value: clip_value(str(render(value)), max_length, True)
+
+        def custom_renderer(fieldname):
+            render_column = self.render_column
+            return lambda obj: render_column(obj, fieldname)
+
+        renderers = []
+        for cs in self.column_specs:
+            fieldname = cs['name']
+            if not fieldname:
+                continue
+            column = self.column_obj(fieldname)
+            if values_list:
+                render = column.compile_formatter()
+            elif custom_render_column:
+                render = custom_renderer(fieldname)
+            else:
+                render = column.compile_renderer()
+            if clipped and cs['max_length'] > 0:
+                render = clip_renderer(render, cs['max_length'])
+            renderers.append((fieldname, render))
+        return tuple(renderers), clipped
+
+    def get_response_dict(self, request, paginator, draw_idx, start_pos, records_total=None):
         page_id = (start_pos // paginator.per_page) + 1
         if page_id > paginator.num_pages:
             page_id = paginator.num_pages
         elif page_id < 1:
             page_id = 1
 
-        objects = self.prepare_results(request, paginator.page(page_id))
+        with self.profile.phase('fetch'):
+            rows, paths = self.fetch_results(request, paginator.page(page_id).object_list)
+        with self.profile.phase('render'):
+            objects = self.render_results(request, rows, paths)
 
-        return {"draw": draw_idx,
-                "recordsTotal": paginator.count,
-                "recordsFiltered": paginator.count,
-                "data": objects,
-                }
+        response_dict = {
+            "draw": draw_idx,
+            "recordsTotal": paginator.count if records_total is None else records_total,
+            "recordsFiltered": paginator.count,
+            "data": objects,
+        }
+
+        if isinstance(paginator, KeysetPaginator):
+            # Cursors to seek the previous or next page in subsequent requests
+            response_dict['cursors'] = {
+                'start': (page_id - 1) * paginator.per_page,
+                'first': paginator.first_cursor,
+                'last': paginator.last_cursor,
+            }
+
+        return response_dict
 
     def get_table_row_id(self, request, obj):
         """
@@ -693,6 +1513,8 @@ class DatatablesView(View):
         # use sets to remove duplicates
         only = set()
         select_related = set()
+        # to-many lookup -> (related model, only, select_related), or None when not restricted
+        prefetch = {}
 
         # collect values for qs optimizations
         fields = [f.name for f in self.model._meta.get_fields()]
@@ -709,11 +1531,61 @@ class DatatablesView(View):
                 #   | 'lotto__articolo__codice'   | 'lotto__articolo__codice'     | 'lotto__articolo'                 |
                 #   +-----------------------------+-------------------------------+-----------------------------------+
                 #
+                # When the path crosses a to-many relation (reverse FK or M2M), select_related()
+                # stops there, and the remaining path is retrieved with a Prefetch() instead:
+                #
+                #   +-----------------------------+-------------------------------+-----------------------------------+
+                #   | 'lotto__tags__name'         | 'lotto__id'                   | 'lotto'                           |
+                #   |                             | + Prefetch('lotto__tags', queryset=Tag.objects.only('name'))      |
+                #   +-----------------------------+-------------------------------+-----------------------------------+
+                #
 
-                only.add(foreign_field)
-                #select_related.add(column.get('name'))
-                #select_related.add(foreign_field.split('__')[0])
-                select_related.add('__'.join(foreign_field.split('__')[0:-1]))
+                try:
+                    hops = resolve_field_path(self.model, foreign_field)
+                except KeyError:
+                    hops = None
+                to_many_indexes = [index for index, hop in enumerate(hops or []) if hop[2]]
+
+                if not to_many_indexes:
+                    only.add(foreign_field)
+                    #select_related.add(column.get('name'))
+                    #select_related.add(foreign_field.split('__')[0])
+                    select_related.add('__'.join(foreign_field.split('__')[0:-1]))
+                    continue
+
+                index = to_many_indexes[0]
+                path_items = foreign_field.split('__')
+                field, attname, to_many = hops[index]
+
+                # single-valued relations up to the to-many hop
+                if index > 0:
+                    prefix = '__'.join(path_items[:index])
+                    select_related.add(prefix)
+                    only.add(prefix + '__' + hops[index - 1][0].related_model._meta.pk.name)
+
+                lookup = '__'.join([hop[1] for hop in hops[:index + 1]])
+                if len(to_many_indexes) > 1:
+                    # nested to-many relations: just prefetch them all
+                    prefetch[lookup] = None
+                    prefetch['__'.join([hop[1] for hop in hops[:-1]])] = None
+                    continue
+
+                if lookup not in prefetch:
+                    related_only = set()
+                    if field.one_to_many:
+                        # Reverse FK: the FK itself is required to match the parent rows
+                        remote_field = getattr(field, 'field', None)
+                        if remote_field is None:
+                            prefetch[lookup] = None
+                            continue
+                        related_only.add(remote_field.name)
+                    prefetch[lookup] = (field.related_model, related_only, set())
+                if prefetch[lookup] is not None:
+                    related_model, related_only, related_select = prefetch[lookup]
+                    rest = path_items[index + 1:]
+                    related_only.add('__'.join(rest))
+                    if len(rest) > 1:
+                        related_select.add('__'.join(rest[:-1]))
             else:
                 [f.name for f in self.model._meta.get_fields()]
                 field = column.get('name')
@@ -722,7 +1594,17 @@ class DatatablesView(View):
 
         # convert to lists
         only = [item for item in list(only) if item]
-        select_related = list(select_related)
+        select_related = [item for item in list(select_related) if item]
+        prefetch_related = []
+        for lookup in sorted(prefetch.keys()):
+            if prefetch[lookup] is None:
+                prefetch_related.append(lookup)
+            else:
+                related_model, related_only, related_select = prefetch[lookup]
+                queryset = related_model._default_manager.all()
+                if related_select:
+                    queryset = queryset.select_related(*related_select)
+                prefetch_related.append(Prefetch(lookup, queryset=queryset.only(*related_only)))
 
         # apply optimizations:
 
@@ -734,6 +1616,10 @@ class DatatablesView(View):
         if only:
             qs = qs.only(*only)
 
+        # (3) use prefetch_related() to avoid a query per row for to-many relations
+        if prefetch_related:
+            qs = qs.prefetch_related(*prefetch_related)
+
         return qs
 
     def prepare_queryset(self, params, qs):
@@ -775,33 +1661,52 @@ class DatatablesView(View):
         ]
         return Q(**{column + '__in': matching_choices})
 
-    def _filter_queryset(self, column_names, search_value, qs):
+    def build_search_filters(self, column_names, search_value, qs, global_search=False):
+        """
+        Combines with OR the filters matching search_value in each of the given columns;
+        for the global search, columns use "global_lookup" (when specified) instead of "lookup".
+
+        Columns which search_value can't possibly match (i.e. text vs. numeric or date columns)
+        are skipped; see SearchPlan
+        """
+        plan = SearchPlan(
+            [(name, self.column_obj(name), self.column_spec_by_name(name)) for name in column_names],
+            search_value,
+            global_search,
+        )
 
         if TEST_FILTERS:
-            trace(', '.join(column_names), 'Filtering "%s" over fields' % search_value)
+            trace(plan.describe(), prompt='Search plan')
+            for column_name, column_filter in plan.filters:
+                trace(column_name, "Test filter")
+                qstest = qs.filter(column_filter)
+                trace('%d/%d records filtered' % (qstest.count(), qs.count()))
 
-        search_filters = Q()
-        for column_name in column_names:
+        return plan.predicate
 
-            column_obj = self.column_obj(column_name)
-            column_spec = self.column_spec_by_name(column_name)
+    def _filter_queryset(self, column_names, search_value, qs, global_search=False):
 
-            column_filter = build_column_filter(column_name, column_obj, column_spec, search_value)
-            if column_filter:
-                search_filters |= column_filter
-                if TEST_FILTERS:
-                    trace(column_name, "Test filter")
-                    qstest = qs.filter(column_filter)
-                    trace('%d/%d records filtered' % (qstest.count(), qs.count()))
+        if TEST_FILTERS:
+            trace(', '.join(column_names), 'Filtering "%s" over fields' % search_value)
+
+        search_filters = self.build_search_filters(column_names, search_value, qs, global_search)
 
         if TEST_FILTERS:
             trace(search_filters, prompt='Search filters')
 
+        if not search_filters:
+            if global_search and column_names:
+                # No searchable column can match search_value (i.e. text in numeric columns)
+                return qs.none()
+            # Nothing to search, or a column filter which can't be applied
+            # (i.e. a partial date being typed): leave qs unfiltered
+            return qs
         return qs.filter(search_filters)
 
     def filter_queryset_all_columns(self, search_value, qs):
         searchable_columns = [c['name'] for c in self.column_specs if c['searchable']]
-        return self._filter_queryset(searchable_columns, search_value, qs)
+        search_backend = self.search_backend or DEFAULT_SEARCH_BACKEND
+        return search_backend.filter_queryset(self, searchable_columns, search_value, qs)
 
     def filter_queryset_by_column(self, column_name, search_value, qs):
         return self._filter_queryset([column_name, ], search_value, qs)
@@ -810,22 +1715,14 @@ class DatatablesView(View):
 
         if self.latest_by and (date_from or date_to):
 
-            daterange_filter = Q()
-            is_datetime = isinstance(self.latest_by, models.DateTimeField)
-
-            if date_from:
-                dt = datetime.datetime.strptime(date_from, '%Y-%m-%d').date()
-                if is_datetime:
-                    daterange_filter &= Q(**{self.latest_by+'__date__gte': dt})
-                else:
-                    daterange_filter &= Q(**{self.latest_by+'__gte': dt})
-
-            if date_to:
-                dt = datetime.datetime.strptime(date_to, '%Y-%m-%d').date()
-                if is_datetime:
-                    daterange_filter &= Q(**{self.latest_by+'__date__lte': dt})
-                else:
-                    daterange_filter &= Q(**{self.latest_by+'__lte': dt})
+            # The field itself (not its name) tells whether we're filtering datetimes
+            model_field = model_fields_lut(self.model).get(self.latest_by)
+            daterange_filter = build_date_range_filter(
+                self.latest_by,
+                model_field,
+                datetime.datetime.strptime(date_from, '%Y-%m-%d').date() if date_from else None,
+                datetime.datetime.strptime(date_to, '%Y-%m-%d').date() if date_to else None,
+            )
 
             if TEST_FILTERS:
                 n0 = qs.count()
@@ -847,6 +1744,46 @@ class DatatablesView(View):
         return None
 
 
+    def get_autofilter_queryset(self, request, field):
+        """
+        Provides the (flat, distinct and ordered) list of values for "autofilter"
+        """
+        if field.model == self.model:
+            queryset = self.get_initial_queryset(request)
+        else:
+            queryset = self.get_foreign_queryset(request, field)
+        return (queryset
+            .values_list(field.name, flat=True)
+            .distinct()
+            .order_by(field.name)
+        )
+
+    def evaluate_autofilter_queryset(self, column_spec, field, queryset):
+        """
+        Use cached values when available;
+        they will expire as soon as either model is changed
+        """
+        timeout = column_spec['autofilter_cache_timeout']
+        if timeout is None:
+            timeout = AUTOFILTER_CACHE_TIMEOUT
+        if timeout:
+            return list(cached_queryset_values(queryset, [self.model, field.model], timeout, 'autofilter'))
+        return list(queryset)
+
+    def build_autofilter_choices(self, column_spec, field, values):
+        if isinstance(field, models.DateField):
+            choices = [(item, format_datetime(item)) for item in values]
+        else:
+            max_length = column_spec['max_length']
+            if max_length <= 0:
+                choices = [(item, item) for item in values]
+            else:
+                choices = [
+                    (item, self.clip_value(str(item), max_length, False))
+                    for item in values
+                ]
+        return choices
+
     def list_autofilter_choices(self, request, column_spec, field, initial_search_value):
         """
         Collects distinct values from specified field,
@@ -857,37 +1794,64 @@ class DatatablesView(View):
                 ...
                 ('William', 'William'), ('Yolanda', 'Yolanda'), ('Yvette', 'Yvette'),
             ]
+
+        When more than "autofilter_max_choices" values are available, an empty list
+        is returned and the column is marked as "autofilter_lazy";
+        choices will be loaded on demand by the client (see list_autofilter_choices_page()).
         """
+        if column_spec['autofilter_lazy']:
+            return []
+
+        max_choices = column_spec['autofilter_max_choices']
+        if max_choices is None:
+            max_choices = AUTOFILTER_MAX_CHOICES
+
         try:
-            if field.model == self.model:
-                queryset = self.get_initial_queryset(request)
-            else:
-                queryset = self.get_foreign_queryset(request, field)
-            values = list(queryset
-                .values_list(field.name, flat=True)
-                .distinct()
-                .order_by(field.name)
-            )
+            queryset = self.get_autofilter_queryset(request, field)
+            if max_choices > 0:
+                queryset = queryset[:max_choices + 1]
+            values = self.evaluate_autofilter_queryset(column_spec, field, queryset)
+
+            if max_choices > 0 and len(values) > max_choices:
+                column_spec['autofilter_lazy'] = True
+                return []
 
             # Make sure initial_search_value is available
             if initial_search_value is not None:
                 if initial_search_value not in values:
                     values.append(initial_search_value)
 
-            if isinstance(field, models.DateField):
-                choices = [(item, format_datetime(item)) for item in values]
-            else:
-                max_length = column_spec['max_length']
-                if max_length <= 0:
-                    choices = [(item, item) for item in values]
-                else:
-                    choices = [
-                        (item, self.clip_value(str(item), max_length, False))
-                        for item in values
-                    ]
+            choices = self.build_autofilter_choices(column_spec, field, values)
 
         except Exception as e:
             # TODO: investigate what happens here with FKs
             print('ERROR: ' + str(e))
             choices = []
         return choices
+
+    def list_autofilter_choices_page(self, request, column_name, prefix, offset, limit):
+        """
+        Collects a page of distinct values for an "autofilter" column,
+        optionally restricted to values starting with prefix.
+
+        The result is in the format expected by select2:
+            {
+                'results': [{'id': 'Alicia', 'text': 'Alicia'}, ...],
+                'pagination': {'more': True},
+            }
+        """
+        column_spec = self.column_spec_by_name(column_name)
+        if column_spec is None or not column_spec['autofilter']:
+            raise ValueError('Column "%s" does not provide autofilter choices' % column_name)
+        field = self.column_obj(column_name).model_field
+
+        queryset = self.get_autofilter_queryset(request, field)
+        if prefix:
+            queryset = queryset.filter(**{field.name + '__istartswith': prefix})
+        values = self.evaluate_autofilter_queryset(column_spec, field, queryset[offset:offset + limit + 1])
+
+        choices = self.build_autofilter_choices(column_spec, field, values[:limit])
+        return {
+            'results': [{'id': value, 'text': text} for value, text in choices],
+            'pagination': {'more': len(values) > limit},
+        }
@@ -23,5 +23,16 @@ def run_tests(*test_args):
     sys.exit(bool(failures))
 
 
+def run_benchmarks(*args):
+
+    # See benchmarks/runner.py
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+    from benchmarks.runner import main
+    sys.exit(main(list(args)))
+
+
 if __name__ == '__main__':
-    run_tests(*sys.argv[1:])
+    if sys.argv[1:2] == ['--benchmark']:
+        run_benchmarks(*sys.argv[2:])
+    else:
+        run_tests(*sys.argv[1:])
@@ -27,5 +27,5 @@ setup(name='django-datatables-view',
       author_email='morlandi@brainstorm.it',
       license='MIT',
       include_package_data=True,
-      packages=find_packages(),
+      packages=find_packages(exclude=['benchmarks', 'benchmarks.*']),
       zip_safe=False)
@@ -1,6 +1,7 @@
 # -*- coding: utf-8
 from __future__ import unicode_literals, absolute_import
 
+import os
 import django
 
 DEBUG = True
@@ -16,6 +17,13 @@ DATABASES = {
     }
 }
 
+# Use a file-backed database, so that queries can run concurrently on separate connections
+# (see "concurrent_queries"); for example:
+#   DATATABLES_VIEW_TEST_DB=/tmp/datatables_view_test.sqlite3 python runtests.py
+if os.environ.get('DATATABLES_VIEW_TEST_DB'):
+    DATABASES["default"]["NAME"] = os.environ['DATATABLES_VIEW_TEST_DB']
+    DATABASES["default"]["TEST"] = {"NAME": os.environ['DATATABLES_VIEW_TEST_DB']}
+
 ROOT_URLCONF = "tests.urls"
 
 INSTALLED_APPS = [
@@ -1,5 +1,5 @@
 try:
-    from django.urls import url, include
+    from django.urls import re_path as url, include
 except:
     from django.conf.urls import url, include
 